@@ -0,0 +1,55 @@
+"""Portable SQL expressions for spend aggregation (SQLite and Postgres)."""
+from sqlalchemy import case, literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import String
+from backend.models import Subscription
+
+
+class due_month(FunctionElement):
+    """'YYYY-MM' bucket of a date expression, compiled per dialect."""
+    type = String()
+    name = "due_month"
+    inherit_cache = True
+
+
+@compiles(due_month)
+def _compile_due_month(element, compiler, **kw):
+    # Literal format strings keep SELECT and GROUP BY textually identical on Postgres
+    return "to_char(%s, %s)" % (
+        compiler.process(element.clauses, **kw),
+        compiler.process(literal_column("'YYYY-MM'"), **kw),
+    )
+
+
+@compiles(due_month, "sqlite")
+def _compile_due_month_sqlite(element, compiler, **kw):
+    return "strftime(%s, %s)" % (
+        compiler.process(literal_column("'%Y-%m'"), **kw),
+        compiler.process(element.clauses, **kw),
+    )
+
+
+def monthly_cost(amount: float, cycle: str) -> float:
+    """Python twin of `monthly_cost_expr` for a single row."""
+    if cycle == "monthly":
+        return amount
+    if cycle == "annual":
+        return amount / 12
+    return 0.0
+
+
+def monthly_cost_expr():
+    """SQL expression normalizing `amount` to a monthly figure by billing cycle."""
+    return case(
+        (Subscription.cycle == "monthly", Subscription.amount),
+        (Subscription.cycle == "annual", Subscription.amount / 12.0),
+        else_=0.0,
+    )
+
+
+GROUP_DIMENSIONS = {
+    "category": Subscription.category,
+    "cycle": Subscription.cycle,
+    "due_month": due_month(Subscription.next_due),
+}
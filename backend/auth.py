@@ -1,16 +1,43 @@
-"""Authentication module with JWT and password hashing."""
+"""Authentication module with JWT and password hashing.
+
+bcrypt is deliberately slow, so request handlers hash and verify through
+`hash_password_async` / `verify_password_async`, which run it in a small
+process pool instead of on the event loop or the shared threadpool. Login
+rehashes any password stored at a different BCRYPT_ROUNDS cost. Validated
+tokens are remembered (by SHA-256 of the token) until they expire, so a
+client's repeat requests skip signature checks and claim parsing.
+
+Export links can't carry an Authorization header, so they carry a scoped
+token in the URL instead: it expires after EXPORT_TOKEN_EXPIRE_SECONDS and
+is accepted only by the export route, never as a bearer token.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Query
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# Hashes at any other cost are flagged by verify_and_update and replaced on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+EXPORT_TOKEN_EXPIRE_SECONDS = int(os.getenv("EXPORT_TOKEN_EXPIRE_SECONDS", "300"))
+EXPORT_SCOPE = "export"
 
 class TokenData(BaseModel):
     user_id: int
@@ -24,25 +51,139 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
 
-def create_access_token(user_id: int, email: str, expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token."""
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash if the stored one uses an outdated cost or scheme)."""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError:  # not a hash at all, e.g. the "!" of a password-less account
+        return False, None
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_hash_pool() -> Optional[ProcessPoolExecutor]:
+    global _hash_pool
+    if _hash_pool is None and PASSWORD_HASH_WORKERS > 0:
+        # spawn, not fork: the parent runs threads (aiosqlite, the threadpool)
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+async def _offload(fn, *args):
+    # PASSWORD_HASH_WORKERS=0 falls back to the default threadpool
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+
+async def hash_password_async(password: str) -> str:
+    return await _offload(hash_password, password)
+
+async def verify_password_async(plain_password: str,
+                                hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """`verify_and_update` in the hashing pool."""
+    return await _offload(verify_and_update, plain_password, hashed_password)
+
+def create_access_token(user_id: int, email: str, expires_delta: Optional[timedelta] = None,
+                        scope: Optional[str] = None) -> str:
+    """Create JWT access token; a `scope`d token is only good where that scope is asked for."""
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode = {"user_id": user_id, "email": email, "exp": expire}
+    if scope:
+        to_encode["scope"] = scope
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def decode_token(token: str) -> Optional[TokenData]:
-    """Decode and validate JWT token."""
+def _decode(token: str, scope: Optional[str] = None) -> Optional[Tuple[TokenData, float]]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
-        email: str = payload.get("email")
-        if user_id is None or email is None:
-            return None
-        return TokenData(user_id=user_id, email=email)
     except JWTError:
         return None
+    if payload.get("scope") != scope:
+        return None
+    user_id: int = payload.get("user_id")
+    email: str = payload.get("email")
+    if user_id is None or email is None:
+        return None
+    return TokenData(user_id=user_id, email=email), float(payload.get("exp", 0))
+
+def decode_token(token: str, scope: Optional[str] = None) -> Optional[TokenData]:
+    """Decode and validate JWT token."""
+    decoded = _decode(token, scope)
+    return decoded[0] if decoded else None
+
+def create_export_token(user: TokenData) -> str:
+    return create_access_token(
+        user.user_id, user.email, timedelta(seconds=EXPORT_TOKEN_EXPIRE_SECONDS), EXPORT_SCOPE
+    )
+
+class TokenCache:
+    """LRU of validated tokens; an entry is dropped once its token's `exp` passes.
+
+    Only touched from the event loop (by the async `get_current_user`), so it
+    needs no lock. Rejected tokens are never cached.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[TokenData, float]]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    def validate(self, token: str) -> Optional[TokenData]:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._entries[key]
+        self.misses += 1
+        decoded = _decode(token)
+        if decoded is None or self.max_entries <= 0:
+            return decoded[0] if decoded else None
+        self._entries[key] = decoded
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return decoded[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def describe(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+token_cache = TokenCache()
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> TokenData:
+    """The caller's identity from an `Authorization: Bearer` JWT; 401 if missing or invalid."""
+    # async so the per-request check runs on the loop rather than hopping to the threadpool
+    user = token_cache.validate(credentials.credentials) if credentials else None
+    if user is None:
+        raise HTTPException(
+            status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+async def get_export_user(
+    token: Optional[str] = Query(None, description="Signed export token, for links"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> TokenData:
+    """The caller from a signed export token in the URL, else from the bearer token."""
+    if token is None:
+        return await get_current_user(credentials)
+    user = decode_token(token, EXPORT_SCOPE)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Export link is invalid or has expired")
+    return user
@@ -0,0 +1,351 @@
+"""Reproducible latency and throughput baseline for every API route and the Streamlit helpers.
+
+For each size, seeds a throwaway SQLite database with one user's synthetic
+subscriptions and drives every route in `backend.main`, first in-process
+through TestClient and then over HTTP against a real uvicorn worker,
+recording p50/p99 latency and throughput. The Streamlit app's helpers are
+timed over the same number of rows. The response cache is bypassed (pass
+--cache to keep it) so the numbers reflect handler and query cost. Results
+are written as JSON; --compare reports changes against an earlier run and
+exits 1 if any p50 regressed by more than --tolerance:
+
+    python -m backend.benchmark --sizes 1000 100000 1000000 --output bench.json
+    python -m backend.benchmark --sizes 1000 --compare bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+import httpx
+import numpy as np
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+from backend import rollup, versioning
+from backend.auth import create_access_token, hash_password
+from backend.cache import LRUCache, get_cache
+from backend.database import Base, get_async_db, make_async_engine
+from backend.load_test import serve
+from backend.main import app
+from backend.models import Subscription, TableVersion, User
+from backend.routing import ReadRouter, get_read_router
+from tracker.benchmark import helper_timings
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+SEED_CHUNK = 50_000
+# Long-lived streams have no request latency to measure
+UNTIMED_ROUTES = {("GET", "/subscriptions/events")}
+EMAIL, PASSWORD = "bench@example.com", "bench-password"
+
+
+def seed(url: str, rows: int) -> int:
+    """One user owning `rows` subscriptions (ids 1..rows, each written at its own version);
+    returns the user's id."""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    today, now = date.today(), datetime.utcnow()
+    cycles = ("monthly", "annual", "one-time")
+    with Session(engine) as db:
+        user = User(email=EMAIL, hashed_password=hash_password(PASSWORD))
+        db.add(user)
+        db.commit()
+        owner_id = user.id
+        for start in range(0, rows, SEED_CHUNK):
+            db.execute(insert(Subscription), [
+                {"owner_id": owner_id, "name": f"Service {i}", "amount": 10 + i % 500,
+                 "cycle": cycles[i % 3], "next_due": today + timedelta(days=i % 365 - 30),
+                 "category": f"Cat {i % 8}", "change_version": i + 1,
+                 "created_at": now, "updated_at": now}
+                for i in range(start, min(start + SEED_CHUNK, rows))
+            ])
+        db.add(TableVersion(name=versioning.scope(owner_id), version=rows))
+        db.commit()
+        rollup.rebuild(db)
+    engine.dispose()
+    return owner_id
+
+
+class Scenario:
+    """One request shape against one route; `build(i)` gives the i-th request's kwargs."""
+
+    def __init__(self, method: str, route: str, build: Callable[[int], dict],
+                 name: Optional[str] = None, limit: Optional[int] = None):
+        self.method, self.route, self.build = method, route, build
+        self.name = name or f"{method} {route}"
+        self.limit = limit  # cap for expensive scenarios (bcrypt, full exports)
+
+
+def scenarios(rows: int) -> list:
+    """Reads first, then writes; deletes consume ids from 1 upward, reads use the middle row."""
+    sample = max(1, rows // 2)
+    deletable = itertools.count(1)
+    fresh = itertools.count()
+    row = {"name": "Bench", "amount": 199.0, "cycle": "monthly",
+           "next_due": str(date.today() + timedelta(days=3)), "category": "Cat 1"}
+
+    def get(url):
+        return lambda i: {"url": url}
+
+    return [
+        Scenario("GET", "/", get("/")),
+        Scenario("GET", "/health/pool", get("/health/pool")),
+        Scenario("GET", "/health/cache", get("/health/cache")),
+        Scenario("GET", "/health/logging", get("/health/logging")),
+        Scenario("GET", "/metrics", get("/metrics")),
+        Scenario("GET", "/subscriptions", get("/subscriptions")),
+        Scenario("GET", "/subscriptions", get("/subscriptions?category=Cat%203&cycle=annual"),
+                 name="GET /subscriptions?category&cycle"),
+        Scenario("GET", "/subscriptions/{sub_id}", get(f"/subscriptions/{sample}")),
+        Scenario("GET", "/subscriptions/{sub_id}/payments",
+                 get(f"/subscriptions/{sample}/payments")),
+        Scenario("GET", "/subscriptions/search", get("/subscriptions/search?q=service%2012")),
+        Scenario("GET", "/subscriptions/search", get("/subscriptions/search?q=srvice"),
+                 name="GET /subscriptions/search (typo)"),
+        Scenario("GET", "/subscriptions/changes",
+                 get(f"/subscriptions/changes?since={max(0, rows - 100)}"),
+                 name="GET /subscriptions/changes?since"),
+        Scenario("GET", "/subscriptions/due/today", get("/subscriptions/due/today")),
+        Scenario("GET", "/subscriptions/due/soon", get("/subscriptions/due/soon?days=7")),
+        Scenario("GET", "/subscriptions/summary/monthly", get("/subscriptions/summary/monthly")),
+        Scenario("GET", "/subscriptions/summary/monthly",
+                 get("/subscriptions/summary/monthly?group_by=category&group_by=cycle"),
+                 name="GET /subscriptions/summary/monthly?group_by"),
+        Scenario("GET", "/dashboard", get("/dashboard?soon_days=7")),
+        Scenario("GET", "/forecast", get("/forecast?months=12"), limit=20),
+        Scenario("GET", "/insights/{sub_id}", get(f"/insights/{sample}")),
+        Scenario("GET", "/subscriptions/export", get("/subscriptions/export?format=csv"),
+                 limit=3),
+        Scenario("POST", "/subscriptions/export/token",
+                 lambda i: {"url": "/subscriptions/export/token"}),
+        Scenario("POST", "/auth/token",
+                 lambda i: {"url": "/auth/token", "json": {"email": EMAIL, "password": PASSWORD}},
+                 limit=5),
+        Scenario("POST", "/auth/register", lambda i: {"url": "/auth/register", "json": {
+            "email": f"new{next(fresh)}@example.com", "password": PASSWORD,
+        }}, limit=5),
+        Scenario("POST", "/subscriptions", lambda i: {"url": "/subscriptions", "json": row}),
+        Scenario("POST", "/subscriptions/bulk", lambda i: {
+            "url": "/subscriptions/bulk",
+            "json": [{**row, "name": f"Bulk {i}-{j}", "external_id": f"bench-{next(fresh)}"}
+                     for j in range(100)],
+        }, limit=20),
+        Scenario("PUT", "/subscriptions/{sub_id}", lambda i: {
+            "url": f"/subscriptions/{sample}", "json": {"amount": 100 + i % 50},
+        }),
+        Scenario("DELETE", "/subscriptions/{sub_id}",
+                 lambda i: {"url": f"/subscriptions/{next(deletable)}"}),
+    ]
+
+
+def check_coverage(plan: list) -> None:
+    """Fail loudly when a route is added to the API without a benchmark scenario."""
+    routes = {
+        (method, route.path) for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    missing = routes - UNTIMED_ROUTES - {(s.method, s.route) for s in plan}
+    if missing:
+        raise RuntimeError(f"No benchmark scenario for: {sorted(missing)}")
+
+
+def summarize(latencies: list, wall: float) -> dict:
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+    }
+
+
+def _ok(scenario: Scenario, response) -> None:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{scenario.name}: HTTP {response.status_code} {response.text[:200]}")
+
+
+def bench_testclient(plan: list, headers: dict, requests: int, warmup: int) -> list:
+    client = TestClient(app, headers=headers)
+    results = []
+    for scenario in plan:
+        n = min(requests, scenario.limit or requests)
+        for i in range(min(warmup, n)):
+            _ok(scenario, client.request(scenario.method, **scenario.build(i)))
+        latencies = []
+        started = time.perf_counter()
+        for i in range(n):
+            t0 = time.perf_counter()
+            response = client.request(scenario.method, **scenario.build(i))
+            latencies.append(time.perf_counter() - t0)
+            _ok(scenario, response)
+        wall = time.perf_counter() - started
+        results.append({"name": scenario.name, **summarize(latencies, wall)})
+    return results
+
+
+async def _bench_http(base_url: str, plan: list, headers: dict, requests: int,
+                      concurrency: int, warmup: int) -> list:
+    limits = httpx.Limits(max_connections=concurrency)
+    results = []
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=300
+    ) as client:
+        for scenario in plan:
+            n = min(requests, scenario.limit or requests)
+            for i in range(min(warmup, n)):
+                _ok(scenario, await client.request(scenario.method, **scenario.build(i)))
+            latencies, pending = [], iter(range(n))
+
+            async def worker():
+                for i in pending:
+                    kwargs = scenario.build(i)
+                    t0 = time.perf_counter()
+                    response = await client.request(scenario.method, **kwargs)
+                    latencies.append(time.perf_counter() - t0)
+                    _ok(scenario, response)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, n))))
+            results.append({
+                "name": scenario.name, **summarize(latencies, time.perf_counter() - started)
+            })
+    return results
+
+
+def bench_uvicorn(plan: list, headers: dict, requests: int, concurrency: int,
+                  warmup: int) -> list:
+    # lifespan off: startup hooks would initialise the default database and start renewals
+    server, thread, base_url = serve(app, lifespan="off")
+    try:
+        return asyncio.run(_bench_http(base_url, plan, headers, requests, concurrency, warmup))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def bench_helpers(rows: int, repeat: int) -> list:
+    return [
+        {"name": name, **summarize(samples, sum(samples))}
+        for name, samples in helper_timings(rows, repeat).items()
+    ]
+
+
+def run(sizes: list, requests: int, concurrency: int, warmup: int, repeat: int,
+        use_cache: bool) -> list:
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            started = time.perf_counter()
+            owner_id = seed(url, rows)
+            print(f"[{rows} rows] seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            engine = make_async_engine(url)
+            factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+            async def override_get_async_db():
+                async with factory() as db:
+                    yield db
+
+            cache = LRUCache() if use_cache else LRUCache(ttl=0)
+            app.dependency_overrides[get_async_db] = override_get_async_db
+            app.dependency_overrides[get_read_router] = lambda: ReadRouter(factory, {})
+            app.dependency_overrides[get_cache] = lambda: cache
+            headers = {"Authorization": f"Bearer {create_access_token(owner_id, EMAIL)}"}
+            # One plan per size: both modes draw delete ids and fresh emails from its counters
+            plan = scenarios(rows)
+            check_coverage(plan)
+            try:
+                for mode, bench in (
+                    ("testclient", lambda plan: bench_testclient(plan, headers, requests, warmup)),
+                    ("uvicorn", lambda plan: bench_uvicorn(
+                        plan, headers, requests, concurrency, warmup
+                    )),
+                ):
+                    for result in bench(plan):
+                        results.append({"rows": rows, "mode": mode, **result})
+                    print(f"[{rows} rows] {mode} done", file=sys.stderr)
+            finally:
+                app.dependency_overrides.clear()
+                asyncio.run(engine.dispose())
+        for result in bench_helpers(rows, repeat):
+            results.append({"rows": rows, "mode": "streamlit", **result})
+    return results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Human-readable regressions: entries whose p50 grew by more than `tolerance` (0.2 = 20%)."""
+    def key(r):
+        return r["rows"], r["mode"], r["name"]
+
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get(key(result))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = result["p50_ms"] / old["p50_ms"] - 1
+        line = (f"{result['rows']:>8} {result['mode']:<10} {result['name']:<48} "
+                f"p50 {old['p50_ms']:>9.3f} -> {result['p50_ms']:>9.3f} ms ({change:+.0%})")
+        print(line)
+        if change > tolerance:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="uvicorn mode")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20, help="per Streamlit helper")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="an earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = {
+        **environment(),
+        "config": {k: getattr(args, k) for k in ("sizes", "requests", "concurrency", "warmup",
+                                                  "repeat", "cache")},
+        "results": run(args.sizes, args.requests, args.concurrency, args.warmup, args.repeat,
+                       args.cache),
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), report, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} p50 regressions over {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
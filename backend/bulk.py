@@ -0,0 +1,180 @@
+"""Bulk import of subscriptions from JSON, NDJSON or CSV payloads.
+
+Rows are validated one at a time with `SubscriptionCreate`, then written in
+batches: one executemany per batch, one commit per batch. Rows carrying an
+`external_id` are upserted on (owner, external_id); rows exported by the
+Streamlit app carry only their local `id`, which is used as the external
+key in that case.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from backend import rollup, versioning
+from backend.aggregates import monthly_cost
+from backend.models import Subscription
+from backend.schemas import SubscriptionCreate
+
+BATCH_SIZE = 1000
+
+JSON_TYPES = {"application/json"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+UPSERT_FIELDS = ("name", "amount", "cycle", "next_due", "category", "notes")
+
+
+def parse_rows(body: bytes, content_type: str) -> list:
+    """Decode a request body into a list of raw row dicts."""
+    media_type = content_type.split(";")[0].strip().lower()
+    text = body.decode("utf-8-sig")
+    if media_type in JSON_TYPES:
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("JSON body must be an array of subscriptions")
+        return rows
+    if media_type in NDJSON_TYPES:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if media_type in CSV_TYPES:
+        try:
+            return [
+                {key: (value if value != "" else None) for key, value in row.items()}
+                for row in csv.DictReader(io.StringIO(text))
+            ]
+        except csv.Error as exc:
+            raise ValueError(f"Malformed CSV: {exc}") from exc
+    raise ValueError(f"Unsupported content type: {media_type or 'missing'}")
+
+
+def _external_key(raw: dict):
+    key = raw.get("external_id")
+    if key is None:
+        key = raw.get("id")
+    return str(key) if key is not None else None
+
+
+def validate_rows(rows: Iterable) -> tuple:
+    """Validate raw rows; returns (valid (index, values) pairs, per-row errors).
+
+    A repeated external key is an error on every occurrence after the first.
+    """
+    valid, errors = [], []
+    seen = {}
+    for index, raw in enumerate(rows):
+        if not isinstance(raw, dict):
+            errors.append({"row": index, "errors": ["Row must be an object"]})
+            continue
+        try:
+            sub = SubscriptionCreate.model_validate(raw)
+        except ValidationError as exc:
+            errors.append({
+                "row": index,
+                "errors": [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()],
+            })
+            continue
+        values = sub.model_dump(include=set(UPSERT_FIELDS))
+        values["external_id"] = key = sub.external_id or _external_key(raw)
+        if key is not None:
+            if key in seen:
+                errors.append({
+                    "row": index,
+                    "errors": [f"external_id: duplicate of row {seen[key]} ({key!r})"],
+                })
+                continue
+            seen[key] = index
+        valid.append((index, values))
+    return valid, errors
+
+
+def _upsert_statement(db: Session):
+    stmt = rollup.dialect_insert(db)(Subscription)
+    set_ = {field: stmt.excluded[field] for field in UPSERT_FIELDS}
+    set_["change_version"] = stmt.excluded.change_version
+    set_["billing_day"] = None  # the imported next_due is the new anchor
+    set_["updated_at"] = datetime.utcnow()
+    return stmt.on_conflict_do_update(
+        index_elements=[Subscription.owner_id, Subscription.external_id], set_=set_
+    )
+
+
+def _write_batch(db: Session, owner_id: int, batch: list) -> tuple:
+    """Write one batch for `owner_id` in the current transaction; returns (inserted, updated)."""
+    version = versioning.bump(db, versioning.scope(owner_id))
+    keyed = {}
+    plain = []
+    for _, values in batch:
+        values = {**values, "owner_id": owner_id, "change_version": version}
+        if values["external_id"] is None:
+            plain.append(values)
+        else:
+            keyed[values["external_id"]] = values  # unique: validate_rows rejects repeats
+
+    existing = {}
+    if keyed:
+        existing = {
+            row.external_id: row
+            for row in db.execute(
+                select(
+                    Subscription.external_id, Subscription.category,
+                    Subscription.amount, Subscription.cycle,
+                ).where(Subscription.owner_id == owner_id, Subscription.external_id.in_(keyed))
+            )
+        }
+        db.execute(_upsert_statement(db), list(keyed.values()))
+    if plain:
+        db.execute(insert(Subscription), plain)
+
+    deltas = defaultdict(lambda: [0.0, 0])
+    for old in existing.values():
+        deltas[old.category][0] -= monthly_cost(old.amount, old.cycle)
+        deltas[old.category][1] -= 1
+    for values in list(keyed.values()) + plain:
+        deltas[values["category"]][0] += monthly_cost(values["amount"], values["cycle"])
+        deltas[values["category"]][1] += 1
+    for category, (monthly, count) in deltas.items():
+        rollup.apply_delta(db, owner_id, category, monthly, count)
+
+    inserted = len(plain) + len(keyed) - len(existing)
+    return inserted, len(existing)
+
+
+def write_rows(db: Session, owner_id: int, valid: list, errors: list,
+               batch_size: int = BATCH_SIZE) -> dict:
+    """Write validated rows for `owner_id` in batches, appending database failures to `errors`."""
+    errors = list(errors)
+    inserted = updated = 0
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            added, changed = _write_batch(db, owner_id, batch)
+            db.commit()
+        except DBAPIError:
+            db.rollback()
+            # Isolate the offending rows so the rest of the batch still lands
+            added = changed = 0
+            for index, values in batch:
+                try:
+                    one_added, one_changed = _write_batch(db, owner_id, [(index, values)])
+                    db.commit()
+                except DBAPIError as exc:
+                    db.rollback()
+                    errors.append({"row": index, "errors": [str(exc.orig)]})
+                    continue
+                added += one_added
+                changed += one_changed
+        inserted += added
+        updated += changed
+    errors.sort(key=lambda e: e["row"])
+    return {"inserted": inserted, "updated": updated, "errors": errors}
+
+
+def import_rows(db: Session, owner_id: int, rows: list, batch_size: int = BATCH_SIZE) -> dict:
+    """Validate and write rows for `owner_id` in batches, collecting per-row errors."""
+    valid, errors = validate_rows(rows)
+    return write_rows(db, owner_id, valid, errors, batch_size)
@@ -0,0 +1,201 @@
+"""Response cache for read endpoints with tag-based invalidation.
+
+Entries are the already-serialized JSON bodies, so a hit skips both the
+query and pydantic serialization. Keys and tags are prefixed with the owner
+id. Each collection read is tagged with what it depends on ("7:list" for
+listings, search and sync, "7:due", "7:summary", "7:forecast"); a write
+invalidates all four for its own tenant only.
+
+The default backend is an in-process LRU bounded by entry count and TTL.
+Set RESPONSE_CACHE_URL=redis://... to share one cache (and its
+invalidations) across workers; any redis-py compatible asyncio client works.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from fastapi import Depends, Request, Response
+from backend.routing import wrote_recently
+
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUCache:
+    """In-process LRU with per-entry expiry; safe to share within one event loop."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # key -> (expires_at, body, tags)
+        self._tags = {}  # tag -> set of keys
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, body: bytes, tags: Iterable[str]) -> None:
+        if key in self._entries:
+            self._drop(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, body, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                self._drop(key)
+                self.stats.invalidations += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def _drop(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key, (None, None, ()))
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def describe(self) -> dict:
+        return {"backend": "memory", "entries": len(self._entries), **self.stats.snapshot()}
+
+
+class RedisCache:
+    """Same interface on top of an asyncio redis-py compatible client."""
+
+    def __init__(self, client, ttl: float = RESPONSE_CACHE_TTL, prefix: str = "bt:cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        body = await self.client.get(self.prefix + key)
+        if body is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return body
+
+    async def set(self, key: str, body: bytes, tags: Iterable[str]) -> None:
+        ttl_ms = int(self.ttl * 1000)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self.prefix + key, body, px=ttl_ms)
+            for tag in tags:
+                pipe.sadd(self.prefix + "tag:" + tag, self.prefix + key)
+                pipe.pexpire(self.prefix + "tag:" + tag, ttl_ms)
+            await pipe.execute()
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            keys = await self.client.smembers(tag_key)
+            if keys:
+                await self.client.delete(*keys)
+                self.stats.invalidations += len(keys)
+            await self.client.delete(tag_key)
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    def describe(self) -> dict:
+        return {"backend": "redis", **self.stats.snapshot()}
+
+
+class NullCache:
+    """Stand-in that never stores anything."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, body: bytes, tags: Iterable[str]) -> None:
+        pass
+
+
+def build_cache(url: str = RESPONSE_CACHE_URL):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis.asyncio  # optional dependency, only needed for the shared backend
+        return RedisCache(redis.asyncio.Redis.from_url(url))
+    return LRUCache()
+
+
+response_cache = build_cache()
+
+
+def get_cache():
+    return response_cache
+
+
+def get_read_cache(request: Request, cache=Depends(get_cache)):
+    """The cache for a read, bypassed for clients inside their read-your-writes window."""
+    # Another worker's in-process cache may predate this client's write
+    return NullCache() if wrote_recently(request) else cache
+
+
+def cache_key(request: Request, owner_id: int) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{owner_id}:{request.url.path}?{query}"
+
+
+def owner_tags(owner_id: int, *names: str) -> list:
+    return [f"{owner_id}:{name}" for name in names]
+
+
+def json_response(body: bytes, etag: Optional[str] = None) -> Response:
+    headers = {"ETag": etag} if etag else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cache_and_respond(cache, key: str, payload, tags: Iterable[str], model=None,
+                            etag: Optional[str] = None) -> Response:
+    """Serialize `payload` (through `model` if given), store it under `key` and return it."""
+    if model is not None:
+        body = model.model_validate(payload, from_attributes=True).model_dump_json().encode()
+    else:
+        body = json.dumps(payload).encode()
+    await cache.set(key, body, tags)
+    return json_response(body, etag)
+
+
+def tags_for_write(owner_id: int) -> list:
+    """Tags whose cached responses one owner's create/update/delete can change."""
+    return owner_tags(owner_id, "list", "due", "summary", "forecast")
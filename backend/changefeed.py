@@ -0,0 +1,183 @@
+"""Live change feed: server-sent events for every write to an owner's subscriptions.
+
+Each event carries the owner's table version (see `versioning`) as its
+sequence number, so a client that reconnects with `Last-Event-ID` (or
+`?since=`) is replayed what it missed from a short per-owner backlog. When
+the backlog can't prove the client saw every version in between (it was
+evicted, a bulk import or renewal pass changed many rows, or another worker
+made the write), the client gets one `reload` event instead: refetch, then
+carry on from its `seq`.
+
+An idle connection is one suspended generator awaiting its owner's wakeup
+event, plus a keep-alive comment every CHANGE_FEED_KEEPALIVE_SECONDS; each
+event is encoded once however many clients receive it. Writes made by other
+workers are picked up by one version poll per worker, not per connection.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Optional
+from sqlalchemy import select
+from backend import versioning
+from backend.models import Subscription, TableVersion
+from backend.schemas import SubscriptionOut
+
+CHANGE_FEED_BACKLOG = int(os.getenv("CHANGE_FEED_BACKLOG", "256"))  # events kept per owner
+CHANGE_FEED_CHANNELS = int(os.getenv("CHANGE_FEED_CHANNELS", "10000"))  # owners kept in memory
+CHANGE_FEED_KEEPALIVE_SECONDS = float(os.getenv("CHANGE_FEED_KEEPALIVE_SECONDS", "15"))
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "5"))  # 0 disables
+
+RETRY_MS = 3000
+POLL_CHUNK = 500
+
+logger = logging.getLogger("bill_tracker.changefeed")
+
+
+def encode(seq: int, op: str, sub_id: Optional[int] = None, subscription=None) -> str:
+    """One SSE frame; `subscription` is the row after a create or update."""
+    data = {"seq": seq, "op": op, "id": sub_id, "subscription": subscription}
+    return f"id: {seq}\nevent: {op}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Channel:
+    """One owner's recent events (in sequence order) and the connections waiting on them."""
+
+    __slots__ = ("events", "latest", "listeners", "wakeup")
+
+    def __init__(self, backlog: int):
+        self.events = deque(maxlen=backlog)  # (seq, op, frame)
+        self.latest = 0  # highest version seen, published or not
+        self.listeners = 0
+        self.wakeup = asyncio.Event()
+
+    def add(self, seq: int, op: str, frame: str) -> None:
+        if any(seq == s for s, _, _ in self.events):
+            return
+        if not self.events or seq > self.events[-1][0]:
+            self.events.append((seq, op, frame))
+        else:
+            # Two writers can publish out of commit order; keep the backlog sorted
+            events = sorted([*self.events, (seq, op, frame)])
+            self.events = deque(events, maxlen=self.events.maxlen)
+        self.latest = max(self.latest, seq)
+
+    def notify(self) -> None:
+        self.wakeup.set()
+        self.wakeup = asyncio.Event()
+
+
+class ChangeFeed:
+    def __init__(self, backlog: int = CHANGE_FEED_BACKLOG,
+                 max_channels: int = CHANGE_FEED_CHANNELS):
+        self.backlog = backlog
+        self.max_channels = max_channels
+        self._channels: "OrderedDict[int, Channel]" = OrderedDict()
+
+    def _channel(self, owner_id: int) -> Channel:
+        channel = self._channels.get(owner_id)
+        if channel is None:
+            channel = self._channels[owner_id] = Channel(self.backlog)
+            # Forgetting an idle owner only costs its next resume a reload
+            idle = [o for o, c in self._channels.items() if not c.listeners and o != owner_id]
+            for evict in idle:
+                if len(self._channels) <= self.max_channels:
+                    break
+                del self._channels[evict]
+        else:
+            self._channels.move_to_end(owner_id)
+        return channel
+
+    def publish(self, owner_id: int, seq: int, op: str, sub: Optional[Subscription] = None,
+                sub_id: Optional[int] = None) -> None:
+        """Record a committed write at version `seq` and wake the owner's listeners."""
+        row = SubscriptionOut.model_validate(sub).model_dump(mode="json") if sub else None
+        channel = self._channel(owner_id)
+        channel.add(seq, op, encode(seq, op, sub.id if sub else sub_id, row))
+        channel.notify()
+
+    def reload(self, owner_id: int, seq: int) -> None:
+        """Many rows changed at once (or elsewhere): tell the owner's clients to refetch."""
+        self.publish(owner_id, seq, "reload")
+
+    def _pending(self, channel: Channel, last: int) -> tuple:
+        """(frames to send, new position) for a client that has seen up to `last`."""
+        if last == channel.latest:
+            return [], last
+        frames, position = [], last
+        for seq, op, frame in channel.events:
+            if seq <= position:
+                continue
+            if seq != position + 1 and op != "reload":
+                break  # a version the backlog doesn't hold
+            frames.append(frame)
+            position = seq
+        if position != channel.latest:
+            return [encode(channel.latest, "reload")], channel.latest
+        return frames, position
+
+    async def stream(self, owner_id: int, since: Optional[int], current: int,
+                     keepalive: float = CHANGE_FEED_KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+        """SSE frames for one connection, starting after `since` (or at `current`, the
+        owner's version when the client connected)."""
+        channel = self._channel(owner_id)
+        channel.listeners += 1
+        try:
+            channel.latest = max(channel.latest, current)
+            retry = f"retry: {RETRY_MS}\n\n"
+            if since is None or since > channel.latest:
+                # Fresh client, or one ahead of this database: start from a known state
+                last = channel.latest
+                yield retry + encode(last, "ready" if since is None else "reload")
+            else:
+                last = since
+                yield retry
+            while True:
+                wakeup = channel.wakeup
+                frames, last = self._pending(channel, last)
+                if frames:
+                    yield "".join(frames)
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            channel.listeners -= 1
+
+    def listening_owners(self) -> list:
+        return [owner for owner, channel in self._channels.items() if channel.listeners]
+
+    async def poll_versions(self, session_factory) -> None:
+        """Reload listeners whose owner's version moved without a local event (other workers)."""
+        owners = self.listening_owners()
+        for start in range(0, len(owners), POLL_CHUNK):
+            chunk = {versioning.scope(o): o for o in owners[start:start + POLL_CHUNK]}
+            async with session_factory() as db:
+                rows = (await db.execute(
+                    select(TableVersion.name, TableVersion.version)
+                    .where(TableVersion.name.in_(chunk))
+                )).all()
+            for name, version in rows:
+                channel = self._channels.get(chunk[name])
+                if channel is not None and version > channel.latest:
+                    self.reload(chunk[name], version)
+
+    async def run_poller(self, session_factory,
+                         interval: float = CHANGE_FEED_POLL_SECONDS) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.poll_versions(session_factory)
+            except Exception:
+                logger.exception("Change feed version poll failed")
+
+    def describe(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "listeners": sum(c.listeners for c in self._channels.values()),
+        }
+
+
+change_feed = ChangeFeed()
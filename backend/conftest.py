@@ -0,0 +1,81 @@
+"""Shared pytest fixtures: an isolated SQLite database per test."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from backend.auth import create_access_token
+from backend.cache import LRUCache, get_cache
+from backend.database import Base, get_async_db, make_engine, to_async_url
+from backend.main import app
+from backend.models import User
+from backend.routing import ReadRouter, get_read_router
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path}/test.db"
+
+
+@pytest.fixture
+def db_session_factory(db_url):
+    """Sync sessionmaker bound to a fresh SQLite file with all tables created."""
+    engine = make_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def async_session_factory(db_url, db_session_factory):
+    """Async sessionmaker over the same file, as used by the request handlers."""
+    # NullPool: TestClient may run each request on a fresh event loop
+    engine = create_async_engine(to_async_url(db_url), poolclass=NullPool)
+    yield async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def sign_up(db_session_factory, email: str) -> tuple:
+    """Insert a user directly; returns (user id, Authorization headers for them)."""
+    with db_session_factory() as db:
+        user = User(email=email, hashed_password="!")
+        db.add(user)
+        db.commit()
+        token = create_access_token(user.id, user.email)
+        return user.id, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def owner(db_session_factory):
+    """(user id, auth headers) of the user the `client` fixture is signed in as."""
+    return sign_up(db_session_factory, "owner@example.com")
+
+
+@pytest.fixture
+def client(async_session_factory, owner):
+    """Signed-in TestClient whose requests use the isolated database."""
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_router] = lambda: ReadRouter(async_session_factory, {})
+    cache = LRUCache()
+    app.dependency_overrides[get_cache] = lambda: cache
+    yield TestClient(app, headers=owner[1])
+    app.dependency_overrides.clear()
+
+
+def make_subscription(client, **overrides):
+    """Create a subscription through the API and return its JSON body."""
+    payload = {
+        "name": "Netflix",
+        "amount": 199.0,
+        "cycle": "monthly",
+        "next_due": "2030-01-15",
+        "category": "OTT",
+        "notes": None,
+    }
+    payload.update(overrides)
+    response = client.post("/subscriptions", json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()
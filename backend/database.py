@@ -1,15 +1,90 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 import os
 from pathlib import Path
+from backend.metrics import instrument_engine
+from backend.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATABASE_URL = f"sqlite:///{BASE_DIR}/subscriptions.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/subscriptions.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# Pool sizing applies to each engine (sync and async) separately
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Async drivers for the request path; the sync engine remains for startup and CLI tools
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL onto its asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine/create_async_engine for this URL."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # One shared connection; pool sizing is meaningless for an in-memory database
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if backend == "sqlite":
+        # SQLite has no statement timeout; the busy timeout bounds lock waits instead
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": DB_STATEMENT_TIMEOUT_MS / 1000,
+        }
+    elif backend == "postgresql":
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+            }
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+def make_engine(url: str):
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+def make_async_engine(url: str):
+    async_url = to_async_url(url)
+    engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -17,8 +92,28 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+async_engine = make_async_engine(DATABASE_URL)
+
+# expire_on_commit=False: attribute access after commit must not trigger implicit async I/O
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
+def describe_pool(pool) -> dict:
+    return pool.stats() if hasattr(pool, "stats") else {"status": pool.status()}
+
+def pool_stats() -> dict:
+    """Checkout/wait metrics for both engines' pools, for sizing under load."""
+    return {
+        "sync": describe_pool(engine.pool),
+        "async": describe_pool(async_engine.sync_engine.pool),
+    }
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,5 +121,24 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def read_snapshot(db: AsyncSession) -> None:
+    """Make the session's following reads all see one consistent state of the database."""
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        await conn.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+    elif conn.dialect.name == "sqlite":
+        # pysqlite only opens a transaction before writes; without one each SELECT
+        # sees whatever was committed by the time it runs
+        await conn.exec_driver_sql("BEGIN")
+
+def init_db(bind=None):
+    """Create missing tables, then bring existing ones up to the current schema."""
+    from backend import migrations  # it imports the models, which import this module
+
+    bind = bind if bind is not None else engine
+    Base.metadata.create_all(bind=bind)
+    migrations.upgrade(bind)
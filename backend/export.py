@@ -0,0 +1,72 @@
+"""Constant-memory CSV/NDJSON export streamed from a server-side cursor."""
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Callable
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.aggregates import monthly_cost_expr
+from backend.models import Subscription
+
+EXPORT_BATCH_SIZE = 1000
+
+# Same leading columns as the Streamlit Export CSV, so the file re-imports via /subscriptions/bulk
+EXPORT_COLUMNS = (
+    Subscription.id, Subscription.name, Subscription.amount, Subscription.cycle,
+    Subscription.next_due, Subscription.category, Subscription.notes,
+    Subscription.created_at, monthly_cost_expr().label("monthly_cost"),
+    Subscription.external_id, Subscription.updated_at,
+)
+FIELDNAMES = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+async def iter_batches(session_factory: Callable[[], AsyncSession],
+                       owner_id: int) -> AsyncIterator[list]:
+    """Yield lists of one owner's row mappings, holding at most one batch in memory."""
+    async with session_factory() as db:
+        result = await db.stream(
+            select(*EXPORT_COLUMNS)
+            .where(Subscription.owner_id == owner_id)
+            .order_by(Subscription.next_due, Subscription.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.mappings().partitions():
+            yield partition
+
+
+async def csv_chunks(batches: AsyncIterator[list]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def ndjson_chunks(batches: AsyncIterator[list]) -> AsyncIterator[str]:
+    async for batch in batches:
+        yield "".join(json.dumps(dict(row), default=str) + "\n" for row in batch)
+
+
+async def gzip_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(session_factory: Callable[[], AsyncSession], owner_id: int, fmt: str,
+                  gzip: bool = False):
+    """Return the body iterator for an export of `owner_id`'s rows in `fmt` ('csv' or 'ndjson')."""
+    batches = iter_batches(session_factory, owner_id)
+    chunks = csv_chunks(batches) if fmt == "csv" else ndjson_chunks(batches)
+    return gzip_chunks(chunks) if gzip else chunks
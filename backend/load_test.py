@@ -0,0 +1,201 @@
+"""Load test comparing the app's async listing route with its sync-session equivalent.
+
+Both variants run inside the real `backend.main.app` (same middleware, auth
+and response model) against the same seeded SQLite database, each reading
+the caller's table version and then the first page:
+
+- async: the real `GET /subscriptions`, an `async def` on an `AsyncSession`
+  (aiosqlite)
+- sync: the pre-async handler shape, a plain `def` on a sync `Session`
+  (pysqlite) that FastAPI runs in its threadpool
+
+Every statement first waits `--latency` ms inside the driver call, standing
+in for the round trip to a remote database: pysqlite blocks the threadpool
+worker running the handler, aiosqlite its own connection thread while the
+event loop serves other requests. The response cache is off, so every
+request reaches the database. Each variant is driven by the same number of
+concurrent clients through one uvicorn worker:
+
+    python -m backend.load_test --requests 2000 --concurrency 100 --latency 250
+
+Sync throughput is capped at roughly threadpool size (40 by default) /
+per-request latency; async keeps going until the pool or the CPU is the limit,
+so the gap shows once that cap is below what the CPU can serve.
+"""
+import argparse
+import asyncio
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI, Query, Request, Response
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from backend import bulk, versioning
+from backend.auth import TokenData, create_access_token, get_current_user
+from backend.cache import NullCache, cache_key, get_cache
+from backend.database import Base, get_async_db, to_async_url
+from backend.main import app
+from backend.models import Subscription, TableVersion, User
+from backend.pagination import DEFAULT_PAGE_SIZE, encode_cursor
+from backend.routing import ReadRouter, get_read_router
+from backend.schemas import SubscriptionPage
+
+SYNC_PATH = "/load-test/sync/subscriptions"
+
+
+def seed(url: str, rows: int) -> User:
+    """Create one user owning `rows` subscriptions; returns the user."""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    start = date.today()
+    with Session(engine, expire_on_commit=False) as db:
+        user = User(email="load@example.com", hashed_password="!")
+        db.add(user)
+        db.commit()
+        bulk.import_rows(db, user.id, [
+            {"name": f"Service {i}", "amount": 10 + i % 500, "cycle": "monthly",
+             "next_due": start + timedelta(days=i % 365), "category": f"Cat {i % 8}"}
+            for i in range(rows)
+        ])
+    engine.dispose()
+    return user
+
+
+def slow_connection(latency: float) -> type:
+    """sqlite3 connection class whose every statement first waits `latency` seconds."""
+
+    class SlowCursor(sqlite3.Cursor):
+        def execute(self, *args):
+            time.sleep(latency)
+            return super().execute(*args)
+
+    class SlowConnection(sqlite3.Connection):
+        def cursor(self, factory=SlowCursor):
+            return super().cursor(factory)
+
+    return SlowConnection
+
+
+def engine_options(latency: float, pool_size: int) -> dict:
+    """The same driver latency and pool for both variants."""
+    return {
+        "connect_args": {"factory": slow_connection(latency), "check_same_thread": False},
+        "pool_size": pool_size,
+        "max_overflow": 0,
+    }
+
+
+def add_sync_route(url: str, options: dict) -> None:
+    """Mount the pre-async shape of `GET /subscriptions` on the app at SYNC_PATH."""
+    SyncSession = sessionmaker(bind=create_engine(url, **options), autoflush=False)
+
+    def get_db():
+        with SyncSession() as db:
+            yield db
+
+    def list_subscriptions(
+        request: Request, response: Response,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+        db: Session = Depends(get_db),
+        user: TokenData = Depends(get_current_user),
+    ):
+        scope = versioning.scope(user.user_id)
+        version = db.scalar(select(TableVersion.version).where(TableVersion.name == scope))
+        response.headers["ETag"] = versioning.collection_etag(
+            version or 0, cache_key(request, user.user_id)
+        )
+        subs = db.scalars(
+            select(Subscription).where(Subscription.owner_id == user.user_id)
+            .order_by(Subscription.next_due, Subscription.id).limit(limit + 1)
+        ).all()
+        next_cursor = encode_cursor(subs[limit - 1]) if len(subs) > limit else None
+        return {"items": subs[:limit], "next_cursor": next_cursor}
+
+    app.add_api_route(SYNC_PATH, list_subscriptions, response_model=SubscriptionPage)
+
+
+def use_database(url: str, options: dict) -> None:
+    """Point the app's async sessions at `url` and turn its response cache off."""
+    factory = async_sessionmaker(
+        bind=create_async_engine(to_async_url(url), **options),
+        autoflush=False, expire_on_commit=False,
+    )
+
+    async def get_db():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_db
+    app.dependency_overrides[get_read_router] = lambda: ReadRouter(factory, {})
+    cache = NullCache()
+    app.dependency_overrides[get_cache] = lambda: cache
+
+
+def serve(app: FastAPI, **options) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning", **options))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def hammer(base_url: str, path: str, total: int, concurrency: int, headers: dict) -> float:
+    """Issue `total` GETs of `path` with `concurrency` in flight; returns req/s."""
+    remaining = iter(range(total))
+
+    async def worker():
+        # One keep-alive connection per worker: a single pool slows down as it grows
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, headers=headers) as client:
+            for _ in remaining:
+                response = await client.get(path)
+                response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=250.0,
+                        help="simulated database round trip per statement, in ms")
+    args = parser.parse_args(argv)
+
+    # Enough connections for every client, so the pool is not what limits either variant
+    options = engine_options(args.latency / 1000, args.concurrency)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'load.db'}"
+        user = seed(url, args.rows)
+        headers = {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+        add_sync_route(url, options)
+        use_database(url, options)
+        # A loaded single worker can miss the default 5s keep-alive deadline
+        server, thread, base_url = serve(app, lifespan="off", timeout_keep_alive=60)
+        try:
+            for label, path in (("sync (threadpool)", SYNC_PATH), ("async", "/subscriptions")):
+                rate = asyncio.run(
+                    hammer(base_url, path, args.requests, args.concurrency, headers)
+                )
+                print(f"{label:>18}: {rate:8.1f} req/s")
+        finally:
+            server.should_exit = True
+            thread.join()
+            app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
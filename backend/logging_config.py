@@ -1,52 +1,165 @@
-"""Logging configuration for production."""
+"""Logging configuration for production.
+
+Loggers under `bill_tracker` write into one bounded in-memory queue; a
+`QueueListener` thread formats each record as a JSON line and does the file
+I/O and rotation. A log call on the request path therefore only copies the
+record into the queue, and when the queue is full the record is dropped and
+counted instead of blocking. Nothing is set up (no `logs/` directory, no
+thread) until `setup_logging` runs at app startup.
+"""
+import contextvars
+import json
 import logging
 import logging.handlers
 import os
+import queue
+import time
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+from fastapi import Request
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_DIR = os.getenv("LOG_DIR", "logs")  # empty: console only
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_MAX_BYTES = 10485760  # 10MB
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+logger = logging.getLogger("bill_tracker")
+access_logger = logging.getLogger("bill_tracker.access")
+
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not caller-supplied `extra` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: the standard fields plus anything passed as `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RESERVED)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a record that finds the queue full is counted and dropped."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
 
-# Create logs directory
-LOGS_DIR = Path("logs")
-LOGS_DIR.mkdir(exist_ok=True)
-
-def setup_logging():
-    """Setup production logging with rotation."""
-    # Create logger
-    logger = logging.getLogger("bill_tracker")
-    logger.setLevel(logging.DEBUG)
-    
-    # Rotating file handler for errors
-    error_handler = logging.handlers.RotatingFileHandler(
-        LOGS_DIR / "error.log",
-        maxBytes=10485760,  # 10MB
-        backupCount=10
-    )
-    error_handler.setLevel(logging.ERROR)
-    
-    # Rotating file handler for info
-    info_handler = logging.handlers.RotatingFileHandler(
-        LOGS_DIR / "info.log",
-        maxBytes=10485760,  # 10MB
-        backupCount=5
-    )
-    info_handler.setLevel(logging.INFO)
-    
-    # Console handler
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve what can't cross threads safely (args, live tracebacks), but leave the
+        # JSON encoding to the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _sinks(log_dir: str) -> list:
+    formatter = JsonFormatter()
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    
-    # Formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-    )
-    
-    error_handler.setFormatter(formatter)
-    info_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(error_handler)
-    logger.addHandler(info_handler)
-    logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+    if log_dir:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+        # delay=True: files are opened by the listener on first write
+        error_handler = logging.handlers.RotatingFileHandler(
+            Path(log_dir) / "error.log", maxBytes=LOG_MAX_BYTES, backupCount=10, delay=True
+        )
+        error_handler.setLevel(logging.ERROR)
+        info_handler = logging.handlers.RotatingFileHandler(
+            Path(log_dir) / "info.log", maxBytes=LOG_MAX_BYTES, backupCount=5, delay=True
+        )
+        info_handler.setLevel(logging.INFO)
+        handlers += [error_handler, info_handler]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging(level: str = LOG_LEVEL, log_dir: str = LOG_DIR,
+                  queue_size: int = LOG_QUEUE_SIZE) -> logging.Logger:
+    """Route `bill_tracker` logs through the queue and start the listener; safe to call twice."""
+    global _handler, _listener
+    if _listener is None:
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = logging.handlers.QueueListener(
+            _handler.queue, *_sinks(log_dir), respect_handler_level=True
+        )
+        _listener.start()
+        logger.addHandler(_handler)
+        logger.setLevel(level)
+        logger.propagate = False
     return logger
 
-logger = setup_logging()
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        logger.removeHandler(_handler)
+        logger.propagate = True
+        _handler = _listener = None
+
+
+def log_stats() -> dict:
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queued": _handler.queue.qsize(),
+        "capacity": _handler.queue.maxsize,
+        "dropped": _handler.dropped,
+    }
+
+
+async def log_requests(request: Request, call_next):
+    """Middleware: tag the request with an id, echo it back and log one access record."""
+    request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+    finally:
+        access_logger.info("%s %s %d", request.method, request.url.path, status, extra={
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        })
+        request_id_var.reset(token)
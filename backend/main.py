@@ -1,12 +1,43 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, delete, func, select
 from datetime import date, timedelta
-from backend.database import get_db, init_db, engine
-from backend.models import Subscription
-from backend.schemas import SubscriptionCreate, SubscriptionUpdate, SubscriptionOut
-import os
+from typing import Optional
+from backend.aggregates import GROUP_DIMENSIONS, monthly_cost_expr
+from backend.auth import (
+    EXPORT_TOKEN_EXPIRE_SECONDS, TokenData, create_access_token, create_export_token,
+    get_current_user, get_export_user, hash_password_async, shutdown_hash_pool,
+    verify_password_async
+)
+from backend.cache import (
+    cache_and_respond, cache_key, get_cache, get_read_cache, json_response, owner_tags,
+    response_cache, tags_for_write
+)
+from backend.database import (
+    AsyncSessionLocal, get_async_db, init_db, pool_stats, read_snapshot, SessionLocal
+)
+from backend.models import CategoryRollup, Payment, Subscription, User
+from backend import (
+    bulk, export, forecast, logging_config, metrics, renewals, rollup, search, sync, versioning
+)
+from backend.changefeed import CHANGE_FEED_POLL_SECONDS, change_feed
+from backend.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, after_cursor, encode_cursor, escape_like
+)
+from backend.routing import (
+    ReadRouter, get_read_db, get_read_router, get_read_session_factory, mark_writes
+)
+from backend.schemas import (
+    BulkImportResult, Dashboard, DueSubscriptions, ExportToken, Forecast, PaymentOut, SearchResults,
+    SubscriptionChanges, SubscriptionCreate, SubscriptionUpdate, SubscriptionOut, SubscriptionPage,
+    Token, UserCreate, UserOut
+)
+import asyncio
 
 app = FastAPI(
     title="Bill Subscription Tracker",
@@ -22,87 +53,514 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(mark_writes)
+app.middleware("http")(metrics.track_requests)
+app.middleware("http")(logging_config.log_requests)
+
 @app.on_event("startup")
 def startup():
+    logging_config.setup_logging()
     init_db()
+    with SessionLocal() as db:
+        rollup.ensure_built(db)
+        search.ensure_index(db)
+
+@app.on_event("startup")
+async def start_renewals():
+    if renewals.RENEWAL_INTERVAL_SECONDS > 0:
+        app.state.renewals = asyncio.create_task(
+            renewals.run_forever(AsyncSessionLocal, cache=response_cache, feed=change_feed)
+        )
+    if CHANGE_FEED_POLL_SECONDS > 0:
+        app.state.feed_poller = asyncio.create_task(change_feed.run_poller(AsyncSessionLocal))
+
+@app.on_event("shutdown")
+async def stop_renewals():
+    for name in ("renewals", "feed_poller"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+
+@app.on_event("shutdown")
+def stop_hash_pool():
+    shutdown_hash_pool()
+
+@app.on_event("shutdown")
+def stop_logging():
+    logging_config.shutdown_logging()
+
+async def get_or_404(db: AsyncSession, sub_id: int, owner_id: int) -> Subscription:
+    sub = await db.get(Subscription, sub_id)
+    # Another owner's row is reported as missing, not forbidden, so ids don't leak
+    if not sub or sub.owner_id != owner_id:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    return sub
+
+async def conditional_read(request: Request, db: AsyncSession, cache, owner_id: int,
+                           suffix: str = ""):
+    """ETag check then cache lookup for a collection read; returns (key, etag, response or None)."""
+    key = cache_key(request, owner_id) + suffix
+    version = await versioning.current(db, versioning.scope(owner_id))
+    etag = versioning.collection_etag(version, key)
+    # Version-scoped keys: a worker whose cache missed an invalidation still never serves stale
+    key = f"{key}#{etag}"
+    response = versioning.check(request, etag)
+    if response is None:
+        body = await cache.get(key)
+        if body is not None:
+            response = json_response(body, etag)
+    return key, etag, response
+
+async def keyset_page(db: AsyncSession, stmt, limit: int, cursor: Optional[str]) -> dict:
+    """One page of `stmt` in (next_due, id) order, with the cursor of the next page."""
+    try:
+        keyset = after_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if keyset is not None:
+        stmt = stmt.where(keyset)
+    # Fetch one extra row to learn whether another page exists
+    stmt = stmt.order_by(Subscription.next_due, Subscription.id).limit(limit + 1)
+    subs = (await db.scalars(stmt)).all()
+    next_cursor = encode_cursor(subs[limit - 1]) if len(subs) > limit else None
+    return {"items": subs[:limit], "next_cursor": next_cursor}
+
+async def due_between(db: AsyncSession, owner_id: int, first: date, last: date) -> dict:
+    subs = (await db.scalars(
+        select(Subscription).where(
+            Subscription.owner_id == owner_id,
+            and_(Subscription.next_due >= first, Subscription.next_due <= last),
+        ).order_by(Subscription.next_due, Subscription.id)
+    )).all()
+    return {"count": len(subs), "subscriptions": subs}
+
+async def rollup_summary(db: AsyncSession, owner_id: int) -> dict:
+    rows = (await db.scalars(
+        select(CategoryRollup).where(CategoryRollup.owner_id == owner_id)
+    )).all()
+    summary = {row.category: row.monthly_total for row in rows}
+    return {
+        "by_category": summary,
+        "total_monthly": sum(summary.values()),
+        "count": sum(row.count for row in rows),
+    }
+
+def record_write(db: Session, owner_id: int, old: Optional[tuple] = None,
+                 new: Optional[tuple] = None) -> int:
+    """Side effects every subscription write makes in its own transaction; returns the
+    owner's new version, which is also the write's change feed sequence number."""
+    rollup.record_change(db, old=old, new=new)
+    return versioning.bump(db, versioning.scope(owner_id))
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Bill Subscription Tracker API", "version": "1.0.0"}
 
+@app.get("/health/pool")
+async def get_pool_stats(router: ReadRouter = Depends(get_read_router)):
+    """Connection-pool occupancy and checkout wait times for every engine."""
+    return {**pool_stats(), "replicas": router.stats()}
+
+@app.get("/health/cache")
+async def get_cache_stats(cache=Depends(get_cache)):
+    """Response-cache hit/miss counters."""
+    return cache.describe()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, response and query metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/health/logging")
+async def get_logging_stats():
+    """Log queue depth and records dropped because it was full."""
+    return logging_config.log_stats()
+
+@app.post("/auth/register", response_model=UserOut)
+async def register(body: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    hashed = await hash_password_async(body.password)
+    user = User(email=body.email.strip().lower(), hashed_password=hashed)
+    db.add(user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Email already registered")
+    return user
+
+@app.post("/auth/token", response_model=Token)
+async def login(body: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == body.email.strip().lower()))
+    valid, new_hash = (
+        await verify_password_async(body.password, user.hashed_password) if user else (False, None)
+    )
+    if not valid:
+        raise HTTPException(
+            status_code=401, detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if new_hash:
+        # Stored at an old BCRYPT_ROUNDS cost: upgrade while we have the plaintext
+        user.hashed_password = new_hash
+        await db.commit()
+    return {"access_token": create_access_token(user.id, user.email)}
+
 @app.post("/subscriptions", response_model=SubscriptionOut)
-def create_subscription(sub: SubscriptionCreate, db: Session = Depends(get_db)):
-    db_sub = Subscription(**sub.dict())
+async def create_subscription(
+    sub: SubscriptionCreate, db: AsyncSession = Depends(get_async_db), cache=Depends(get_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    db_sub = Subscription(**sub.dict(), owner_id=user.user_id)
     db.add(db_sub)
-    db.commit()
-    db.refresh(db_sub)
+    seq = await db.run_sync(record_write, user.user_id, new=rollup.rollup_key(db_sub))
+    db_sub.change_version = seq
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="external_id already exists")
+    await cache.invalidate(tags_for_write(user.user_id))
+    await db.refresh(db_sub)
+    change_feed.publish(user.user_id, seq, "create", db_sub)
     return db_sub
 
-@app.get("/subscriptions", response_model=list[SubscriptionOut])
-def list_subscriptions(db: Session = Depends(get_db)):
-    subs = db.query(Subscription).order_by(Subscription.next_due).all()
-    return subs
+@app.post("/subscriptions/bulk", response_model=BulkImportResult)
+async def bulk_import_subscriptions(
+    request: Request, db: AsyncSession = Depends(get_async_db), cache=Depends(get_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    """Import a JSON array, NDJSON stream or CSV file of subscriptions."""
+    body = await request.body()
+    try:
+        rows = bulk.parse_rows(body, request.headers.get("content-type", ""))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Could not parse body: {exc}")
+    # Validation is CPU-bound, so keep it off the event loop
+    valid, errors = await run_in_threadpool(bulk.validate_rows, rows)
+    result = await db.run_sync(bulk.write_rows, user.user_id, valid, errors)
+    await cache.invalidate(tags_for_write(user.user_id))
+    if result["inserted"] or result["updated"]:
+        change_feed.reload(
+            user.user_id, await versioning.current(db, versioning.scope(user.user_id))
+        )
+    return result
+
+@app.get("/subscriptions", response_model=SubscriptionPage)
+async def list_subscriptions(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    cycle: Optional[str] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    name_prefix: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    key, etag, response = await conditional_read(request, db, cache, user.user_id)
+    if response is not None:
+        return response
+    stmt = select(Subscription).where(Subscription.owner_id == user.user_id)
+    if category:
+        stmt = stmt.where(Subscription.category == category)
+    if cycle:
+        stmt = stmt.where(Subscription.cycle == cycle)
+    if due_from:
+        stmt = stmt.where(Subscription.next_due >= due_from)
+    if due_to:
+        stmt = stmt.where(Subscription.next_due <= due_to)
+    if name_prefix:
+        stmt = stmt.where(Subscription.name.like(escape_like(name_prefix) + "%", escape="\\"))
+    page = await keyset_page(db, stmt, limit, cursor)
+    return await cache_and_respond(
+        cache, key, page, owner_tags(user.user_id, "list"), model=SubscriptionPage, etag=etag
+    )
+
+@app.get("/subscriptions/export")
+async def export_subscriptions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    session_factory=Depends(get_read_session_factory),
+    user: TokenData = Depends(get_export_user),
+):
+    """Stream every subscription as CSV or NDJSON, optionally gzip-compressed.
+
+    Authenticates with a bearer token or, for plain download links, `?token=` from
+    POST /subscriptions/export/token."""
+    filename = f"subscriptions_{date.today()}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export.stream_export(session_factory, user.user_id, format, gzip=gzip),
+        media_type="application/gzip" if gzip else export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/subscriptions/export/token", response_model=ExportToken)
+async def issue_export_token(user: TokenData = Depends(get_current_user)):
+    """A short-lived token that lets a link download the caller's export."""
+    return {"token": create_export_token(user), "expires_in": EXPORT_TOKEN_EXPIRE_SECONDS}
+
+@app.get("/subscriptions/search", response_model=SearchResults)
+async def search_subscriptions(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    """Ranked search over name, category and notes: word prefixes first, then near misses."""
+    key, etag, response = await conditional_read(request, db, cache, user.user_id)
+    if response is not None:
+        return response
+    hits = await search.search(db, user.user_id, q, limit)
+    result = {"query": q, "items": [
+        {**SubscriptionOut.model_validate(sub).model_dump(), "match": match, "score": score}
+        for sub, match, score in hits
+    ]}
+    return await cache_and_respond(
+        cache, key, result, owner_tags(user.user_id, "list"), model=SearchResults, etag=etag
+    )
+
+@app.get("/subscriptions/changes", response_model=SubscriptionChanges)
+async def get_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    """Rows changed and ids deleted after version `since` (0 for everything); pass the
+    returned `version` as the next `since`, repeating while `has_more`."""
+    await read_snapshot(db)
+    key, etag, response = await conditional_read(request, db, cache, user.user_id)
+    if response is not None:
+        return response
+    changes = await sync.changes_since(db, user.user_id, since, limit)
+    return await cache_and_respond(
+        cache, key, changes, owner_tags(user.user_id, "list"), model=SubscriptionChanges,
+        etag=etag,
+    )
+
+@app.get("/subscriptions/events")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    session_factory=Depends(get_read_session_factory),
+    user: TokenData = Depends(get_current_user),
+):
+    """Server-sent events for every write to the caller's subscriptions, resumable from a
+    sequence number (`since`, or the `Last-Event-ID` an EventSource sends on reconnect)."""
+    last_event_id = request.headers.get("last-event-id", "")
+    if since is None and last_event_id.isdigit():
+        since = int(last_event_id)
+    # A short session: the stream itself must not hold a pooled connection while idle
+    async with session_factory() as db:
+        current = await versioning.current(db, versioning.scope(user.user_id))
+    return StreamingResponse(
+        change_feed.stream(user.user_id, since, current),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/subscriptions/{sub_id}", response_model=SubscriptionOut)
-def get_subscription(sub_id: int, db: Session = Depends(get_db)):
-    sub = db.query(Subscription).filter(Subscription.id == sub_id).first()
-    if not sub:
-        raise HTTPException(status_code=404, detail="Subscription not found")
+async def get_subscription(
+    request: Request, sub_id: int, response: Response, db: AsyncSession = Depends(get_read_db),
+    user: TokenData = Depends(get_current_user),
+):
+    sub = await get_or_404(db, sub_id, user.user_id)
+    etag = versioning.row_etag(sub)
+    not_modified = versioning.check(request, etag)
+    if not_modified is not None:
+        return not_modified
+    response.headers["ETag"] = etag
     return sub
 
+@app.get("/subscriptions/{sub_id}/payments", response_model=list[PaymentOut])
+async def list_payments(
+    sub_id: int, db: AsyncSession = Depends(get_read_db),
+    user: TokenData = Depends(get_current_user),
+):
+    """Charges recorded by the renewal scheduler, newest first."""
+    await get_or_404(db, sub_id, user.user_id)
+    return (await db.scalars(
+        select(Payment)
+        .where(Payment.owner_id == user.user_id, Payment.subscription_id == sub_id)
+        .order_by(Payment.due_date.desc())
+    )).all()
+
 @app.put("/subscriptions/{sub_id}", response_model=SubscriptionOut)
-def update_subscription(sub_id: int, update: SubscriptionUpdate, db: Session = Depends(get_db)):
-    sub = db.query(Subscription).filter(Subscription.id == sub_id).first()
-    if not sub:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    for key, val in update.dict(exclude_unset=True).items():
+async def update_subscription(
+    sub_id: int, update: SubscriptionUpdate, db: AsyncSession = Depends(get_async_db),
+    cache=Depends(get_cache), user: TokenData = Depends(get_current_user),
+):
+    sub = await get_or_404(db, sub_id, user.user_id)
+    old = rollup.rollup_key(sub)
+    changes = update.dict(exclude_unset=True)
+    for key, val in changes.items():
         setattr(sub, key, val)
-    db.commit()
-    db.refresh(sub)
+    if "next_due" in changes:
+        sub.billing_day = None  # a due date set by hand is the new anchor
+    seq = await db.run_sync(record_write, user.user_id, old=old, new=rollup.rollup_key(sub))
+    sub.change_version = seq
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="external_id already exists")
+    await cache.invalidate(tags_for_write(user.user_id))
+    await db.refresh(sub)
+    change_feed.publish(user.user_id, seq, "update", sub)
     return sub
 
 @app.delete("/subscriptions/{sub_id}")
-def delete_subscription(sub_id: int, db: Session = Depends(get_db)):
-    sub = db.query(Subscription).filter(Subscription.id == sub_id).first()
-    if not sub:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    db.delete(sub)
-    db.commit()
+async def delete_subscription(
+    sub_id: int, db: AsyncSession = Depends(get_async_db), cache=Depends(get_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    sub = await get_or_404(db, sub_id, user.user_id)
+    seq = await db.run_sync(record_write, user.user_id, old=rollup.rollup_key(sub))
+    await db.run_sync(sync.tombstone, user.user_id, sub_id, seq)
+    await db.execute(delete(Payment).where(Payment.subscription_id == sub_id))
+    await db.delete(sub)
+    await db.commit()
+    await cache.invalidate(tags_for_write(user.user_id))
+    change_feed.publish(user.user_id, seq, "delete", sub_id=sub_id)
     return {"message": "Subscription deleted"}
 
-@app.get("/subscriptions/due/today")
-def get_due_today(db: Session = Depends(get_db)):
+@app.get("/subscriptions/due/today", response_model=DueSubscriptions)
+async def get_due_today(
+    request: Request, db: AsyncSession = Depends(get_read_db), cache=Depends(get_read_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    key, etag, response = await conditional_read(
+        request, db, cache, user.user_id, suffix=f"&today={date.today()}"
+    )
+    if response is not None:
+        return response
     today = date.today()
-    subs = db.query(Subscription).filter(Subscription.next_due == today).all()
-    return {"count": len(subs), "subscriptions": subs}
+    payload = await due_between(db, user.user_id, today, today)
+    return await cache_and_respond(
+        cache, key, payload, owner_tags(user.user_id, "due"), model=DueSubscriptions, etag=etag
+    )
 
-@app.get("/subscriptions/due/soon")
-def get_due_soon(days: int = 7, db: Session = Depends(get_db)):
+@app.get("/subscriptions/due/soon", response_model=DueSubscriptions)
+async def get_due_soon(
+    request: Request, days: int = 7, db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache), user: TokenData = Depends(get_current_user),
+):
+    key, etag, response = await conditional_read(
+        request, db, cache, user.user_id, suffix=f"&today={date.today()}"
+    )
+    if response is not None:
+        return response
     today = date.today()
-    future = today + timedelta(days=days)
-    subs = db.query(Subscription).filter(
-        and_(Subscription.next_due > today, Subscription.next_due <= future)
-    ).order_by(Subscription.next_due).all()
-    return {"count": len(subs), "subscriptions": subs}
+    payload = await due_between(
+        db, user.user_id, today + timedelta(days=1), today + timedelta(days=days)
+    )
+    return await cache_and_respond(
+        cache, key, payload, owner_tags(user.user_id, "due"), model=DueSubscriptions, etag=etag
+    )
 
 @app.get("/subscriptions/summary/monthly")
-def get_monthly_summary(db: Session = Depends(get_db)):
-    subs = db.query(Subscription).all()
-    summary = {}
-    for sub in subs:
-        monthly_cost = sub.amount if sub.cycle == "monthly" else sub.amount / 12 if sub.cycle == "annual" else 0
-        if sub.category not in summary:
-            summary[sub.category] = 0
-        summary[sub.category] += monthly_cost
-    total = sum(summary.values())
-    return {"by_category": summary, "total_monthly": total}
+async def get_monthly_summary(
+    request: Request, group_by: list[str] = Query([]), db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache), user: TokenData = Depends(get_current_user),
+):
+    unknown = [dim for dim in group_by if dim not in GROUP_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by dimension: {unknown[0]}")
+    key, etag, response = await conditional_read(request, db, cache, user.user_id)
+    if response is not None:
+        return response
+    result = await rollup_summary(db, user.user_id)
+    if group_by:
+        monthly = func.sum(monthly_cost_expr())
+        dims = [GROUP_DIMENSIONS[dim].label(dim) for dim in group_by]
+        grouped = (await db.execute(
+            select(*dims, monthly.label("monthly_total"), func.count().label("count"))
+            .where(Subscription.owner_id == user.user_id)
+            .group_by(*dims)
+            .order_by(*dims)
+        )).mappings().all()
+        result["groups"] = [dict(row) for row in grouped]
+    return await cache_and_respond(
+        cache, key, result, owner_tags(user.user_id, "summary"), etag=etag
+    )
+
+@app.get("/dashboard", response_model=Dashboard)
+async def get_dashboard(
+    request: Request,
+    soon_days: int = Query(7, ge=1, le=365),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    """Totals, due buckets and one page of subscriptions, all read from one snapshot."""
+    await read_snapshot(db)
+    today = date.today()
+    key, etag, response = await conditional_read(
+        request, db, cache, user.user_id, suffix=f"&today={today}"
+    )
+    if response is not None:
+        return response
+    summary = await rollup_summary(db, user.user_id)
+    result = {
+        **summary,
+        "total_annual": summary["total_monthly"] * 12,
+        "due_today": await due_between(db, user.user_id, today, today),
+        "soon_days": soon_days,
+        "due_soon": await due_between(
+            db, user.user_id, today + timedelta(days=1), today + timedelta(days=soon_days)
+        ),
+        "page": await keyset_page(
+            db, select(Subscription).where(Subscription.owner_id == user.user_id), limit, cursor
+        ),
+    }
+    return await cache_and_respond(
+        cache, key, result, owner_tags(user.user_id, "list", "due", "summary"),
+        model=Dashboard, etag=etag,
+    )
+
+@app.get("/forecast", response_model=Forecast)
+async def get_forecast(
+    request: Request,
+    months: int = Query(12, ge=1, le=forecast.MAX_MONTHS),
+    start: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    cache=Depends(get_read_cache),
+    user: TokenData = Depends(get_current_user),
+):
+    """Projected charges from `start` (default today) over the next `months` months."""
+    key, etag, response = await conditional_read(
+        request, db, cache, user.user_id, suffix=f"&today={date.today()}"
+    )
+    if response is not None:
+        return response
+    rows = (await db.execute(
+        select(Subscription.amount, Subscription.cycle, Subscription.next_due,
+               Subscription.billing_day)
+        .where(Subscription.owner_id == user.user_id)
+    )).all()
+    result = await run_in_threadpool(forecast.project, rows, start or date.today(), months)
+    return await cache_and_respond(
+        cache, key, result, owner_tags(user.user_id, "forecast"), model=Forecast, etag=etag
+    )
 
 @app.get("/insights/{sub_id}")
-def get_ai_insight(sub_id: int, db: Session = Depends(get_db)):
-    sub = db.query(Subscription).filter(Subscription.id == sub_id).first()
-    if not sub:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    category_subs = db.query(Subscription).filter(Subscription.category == sub.category).all()
-    category_total = sum(s.amount if s.cycle == "monthly" else s.amount/12 for s in category_subs)
-    insight = f"You spend {category_total:.2f} on {sub.category}. {sub.name} costs {sub.amount}/month."
+async def get_ai_insight(
+    sub_id: int, db: AsyncSession = Depends(get_read_db),
+    user: TokenData = Depends(get_current_user),
+):
+    sub = await get_or_404(db, sub_id, user.user_id)
+    category = await db.get(CategoryRollup, (user.user_id, sub.category))
+    category_total = category.monthly_total if category else 0.0
+    insight = (
+        f"You spend {category_total:.2f} on {sub.category}. "
+        f"{sub.name} costs {sub.amount}/month."
+    )
     return {"subscription_id": sub_id, "insight": insight}
@@ -0,0 +1,231 @@
+"""In-process request and query metrics, exposed in Prometheus text format at /metrics.
+
+The HTTP middleware records per-route latency, response size and status
+counts (routes are labelled by their path template, so ids don't explode
+the label space). Engine event hooks time every statement and count its
+rows; statements run while serving a request are also tallied against that
+request, which gives queries-per-request and flags N+1 patterns: the same
+SELECT issued N_PLUS_ONE_THRESHOLD or more times by one request. With
+SLOW_QUERY_MS set, slower statements are logged to `bill_tracker.db`.
+
+Each worker process keeps its own numbers; Prometheus sums across scrapes
+of every worker.
+"""
+import collections
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional, Sequence
+from fastapi import Request
+from sqlalchemy import event
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))  # 0 disables the slow-query log
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 500, 1000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger("bill_tracker.db")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, total in items:
+            yield f"{self.name}{_labels(self.labels, values)} {total}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        # Per-bucket (not cumulative) counts keep an observation to one increment
+        slot = next((i for i, bound in enumerate(self.buckets) if value <= bound),
+                    len(self.buckets))
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += value
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        names = self.labels + ("le",)
+        for values, series in items:
+            running = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series[:-1]):
+                running += n
+                yield f"{self.name}_bucket{_labels(names, values + (bound,))} {running}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {series[-1]}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {running}"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route")
+)
+REQUESTS = Counter(
+    "http_requests_total", "Responses by route and status code.", ("method", "route", "status")
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size by route (when Content-Length is known).",
+    ("method", "route"), SIZE_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Statement execution time by operation.", ("operation",),
+    QUERY_BUCKETS,
+)
+QUERY_ROWS = Histogram(
+    "db_query_rows", "Rows affected or returned per statement, when the driver reports it.",
+    ("operation",), COUNT_BUCKETS,
+)
+QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Statements executed while serving one request.", ("route",),
+    COUNT_BUCKETS,
+)
+N_PLUS_ONE = Counter(
+    "db_n_plus_one_total", "Requests that repeated one SELECT N_PLUS_ONE_THRESHOLD+ times.",
+    ("route",),
+)
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.",
+                       ("operation",))
+
+REGISTRY = (REQUEST_LATENCY, REQUESTS, RESPONSE_SIZE, QUERY_LATENCY, QUERY_ROWS,
+            QUERIES_PER_REQUEST, N_PLUS_ONE, SLOW_QUERIES)
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class RequestQueries:
+    """Statements run on behalf of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.selects = collections.Counter()
+        self._lock = threading.Lock()  # sync work for a request may run in the threadpool
+
+    def record(self, operation: str, statement: str) -> None:
+        with self._lock:
+            self.count += 1
+            if operation == "SELECT":
+                self.selects[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list:
+        """(statement, times) for SELECTs issued at least `threshold` times."""
+        return [(s, n) for s, n in self.selects.most_common() if n >= threshold]
+
+
+current_queries: contextvars.ContextVar = contextvars.ContextVar("current_queries", default=None)
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, so a statement that fails leaves nothing behind
+    context._metrics_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    operation = _operation(statement)
+    QUERY_LATENCY.observe(elapsed, operation)
+    rows = getattr(cursor, "rowcount", -1)
+    if rows is not None and rows >= 0:
+        QUERY_ROWS.observe(rows, operation)
+    queries = current_queries.get()
+    if queries is not None:
+        queries.record(operation, statement)
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(operation)
+        logger.warning("Slow query (%.1f ms)", elapsed * 1000, extra={
+            "duration_ms": round(elapsed * 1000, 3), "statement": statement,
+            "rows": rows, "executemany": executemany,
+        })
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on a (sync) Engine; for an AsyncEngine pass `.sync_engine`."""
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+
+
+def route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def track_requests(request: Request, call_next):
+    """Middleware: latency, size and status per route, plus the request's query tally."""
+    queries = RequestQueries()
+    token = current_queries.set(queries)
+    started = time.perf_counter()
+    status, response = 500, None
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        current_queries.reset(token)
+        method, route = request.method, route_label(request)
+        REQUEST_LATENCY.observe(elapsed, method, route)
+        REQUESTS.inc(method, route, str(status))
+        size: Optional[str] = response.headers.get("content-length") if response else None
+        if size is not None:
+            RESPONSE_SIZE.observe(int(size), method, route)
+        QUERIES_PER_REQUEST.observe(queries.count, route)
+        repeated = queries.repeated()
+        if repeated:
+            N_PLUS_ONE.inc(route)
+            statement, times = repeated[0]
+            logger.warning("Possible N+1: one SELECT ran %d times in %s %s",
+                           times, method, route, extra={"statement": statement, "route": route})
@@ -0,0 +1,204 @@
+"""Bring a database created by an earlier version of the app up to the current schema.
+
+`create_all` only creates missing tables; it never alters one that exists.
+`upgrade` (run by `init_db` at startup, or `python -m backend.migrations`)
+adds what later versions put on existing tables: the subscription owner,
+external_id, change_version and billing_day columns, the per-owner unique
+key and indexes, the per-owner category rollup, and the payment owner and
+foreign key. Every step inspects the live schema first, so running it again
+changes nothing.
+
+Subscriptions written before accounts existed are given to
+LEGACY_OWNER_EMAIL, created without a usable password if it doesn't exist.
+The default is the standalone app's TRACKER_OWNER_EMAIL, so those rows stay
+visible there; set it to a registered account's email to hand them to that
+user instead. SQLite can't add a NOT NULL foreign key with ALTER TABLE, so
+there the table is rebuilt and its rows copied across with their ids;
+PostgreSQL alters it in place. A rollup table from before accounts is
+dropped and recreated empty, for `rollup.ensure_built` to refill.
+
+Payments take their subscription's owner. A payment whose subscription is
+gone, or was created after the payment was recorded (SQLite reused a
+deleted row's id), belonged to a deleted subscription and is dropped.
+"""
+import logging
+import os
+from datetime import datetime
+from sqlalchemy import inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+from backend.models import CategoryRollup, Payment, Subscription, User
+
+LEGACY_OWNER_EMAIL = os.getenv("LEGACY_OWNER_EMAIL", "tracker@localhost")
+
+# Columns added to `subscriptions` after the first release, with the value existing rows get
+ADDED_COLUMNS = {"external_id": None, "change_version": 0, "billing_day": None}
+# Indexes of earlier schemas that the per-owner indexes replaced
+OBSOLETE_INDEXES = (
+    "ix_subscriptions_name", "ix_subscriptions_category",
+    "ix_subscriptions_next_due_id", "ix_subscriptions_category_next_due_id",
+)
+OWNER_KEY = "uq_subscriptions_owner_external_id"
+
+logger = logging.getLogger("bill_tracker.migrations")
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def legacy_owner(conn: Connection) -> int:
+    """Id of LEGACY_OWNER_EMAIL, created without a usable password if missing."""
+    users = User.__table__
+    owner_id = conn.scalar(select(users.c.id).where(users.c.email == LEGACY_OWNER_EMAIL))
+    if owner_id is None:
+        # "!" is never a valid bcrypt hash, so nobody can sign in as this user
+        result = conn.execute(insert(users).values(
+            email=LEGACY_OWNER_EMAIL, hashed_password="!", created_at=datetime.utcnow()
+        ))
+        owner_id = result.inserted_primary_key[0]
+    return owner_id
+
+
+def _rebuild_sqlite(conn: Connection, owner_id: int, existing: set) -> None:
+    """Recreate `subscriptions` from the model and copy the old rows in, keeping their ids."""
+    for index in inspect(conn).get_indexes("subscriptions"):
+        conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{index["name"]}"')
+    conn.exec_driver_sql("ALTER TABLE subscriptions RENAME TO subscriptions_legacy")
+    table = Subscription.__table__
+    table.create(conn)
+    names, values = [], []
+    for column in table.columns:
+        names.append(column.name)
+        if column.name == "owner_id":
+            values.append(str(owner_id))
+        elif column.name in existing:
+            values.append(column.name)
+        else:
+            values.append(repr(ADDED_COLUMNS[column.name]).replace("None", "NULL"))
+    conn.exec_driver_sql(
+        f"INSERT INTO subscriptions ({', '.join(names)}) "
+        f"SELECT {', '.join(values)} FROM subscriptions_legacy"
+    )
+    conn.exec_driver_sql("DROP TABLE subscriptions_legacy")
+
+
+def _add_owner_in_place(conn: Connection, owner_id: int) -> None:
+    conn.exec_driver_sql("ALTER TABLE subscriptions ADD COLUMN owner_id INTEGER")
+    conn.exec_driver_sql(f"UPDATE subscriptions SET owner_id = {int(owner_id)}")
+    conn.exec_driver_sql("ALTER TABLE subscriptions ALTER COLUMN owner_id SET NOT NULL")
+    conn.exec_driver_sql(
+        "ALTER TABLE subscriptions ADD CONSTRAINT fk_subscriptions_owner_id "
+        "FOREIGN KEY (owner_id) REFERENCES users (id) ON DELETE CASCADE"
+    )
+
+
+def _add_columns(conn: Connection) -> None:
+    existing = _columns(conn, "subscriptions")
+    for name, default in ADDED_COLUMNS.items():
+        if name in existing:
+            continue
+        column = Subscription.__table__.c[name]
+        ddl = f"ALTER TABLE subscriptions ADD COLUMN {name} {column.type.compile(conn.dialect)}"
+        if default is not None:
+            ddl += f" NOT NULL DEFAULT {default}"
+        conn.exec_driver_sql(ddl)
+
+
+def _owner_scoped_keys(conn: Connection) -> None:
+    """external_id was once unique across all owners; it is now unique per owner."""
+    inspector = inspect(conn)
+    if conn.dialect.name != "sqlite":  # the SQLite rebuild already made the new key
+        uniques = inspector.get_unique_constraints("subscriptions")
+        for unique in uniques:
+            if unique["column_names"] == ["external_id"]:
+                conn.exec_driver_sql(
+                    f'ALTER TABLE subscriptions DROP CONSTRAINT "{unique["name"]}"'
+                )
+        if OWNER_KEY not in {unique["name"] for unique in uniques}:
+            conn.exec_driver_sql(
+                f"ALTER TABLE subscriptions ADD CONSTRAINT {OWNER_KEY} "
+                "UNIQUE (owner_id, external_id)"
+            )
+    present = {index["name"] for index in inspector.get_indexes("subscriptions")}
+    for name in OBSOLETE_INDEXES:
+        if name in present:
+            conn.exec_driver_sql(f'DROP INDEX "{name}"')
+    for index in Subscription.__table__.indexes:
+        if index.name not in present:
+            index.create(conn)
+
+
+def _rekey_rollups(conn: Connection) -> None:
+    if "owner_id" not in _columns(conn, "category_rollups"):
+        conn.exec_driver_sql("DROP TABLE category_rollups")
+        CategoryRollup.__table__.create(conn)
+
+
+# Payments still attached to the subscription they were recorded for
+LIVE_PAYMENTS = (
+    "FROM {payments} AS p JOIN subscriptions AS s ON s.id = p.subscription_id "
+    "WHERE s.created_at IS NULL OR p.recorded_at IS NULL OR p.recorded_at >= s.created_at"
+)
+
+
+def _scope_payments(conn: Connection) -> None:
+    if "owner_id" in _columns(conn, "payments"):
+        return
+    if conn.dialect.name == "sqlite":
+        # As with subscriptions, a NOT NULL foreign key means rebuilding the table
+        conn.exec_driver_sql("ALTER TABLE payments RENAME TO payments_legacy")
+        Payment.__table__.create(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO payments (id, subscription_id, owner_id, amount, due_date, recorded_at) "
+            "SELECT p.id, p.subscription_id, s.owner_id, p.amount, p.due_date, p.recorded_at "
+            + LIVE_PAYMENTS.format(payments="payments_legacy")
+        )
+        conn.exec_driver_sql("DROP TABLE payments_legacy")
+    else:
+        conn.exec_driver_sql(
+            "DELETE FROM payments WHERE id NOT IN "
+            f"(SELECT p.id {LIVE_PAYMENTS.format(payments='payments')})"
+        )
+        conn.exec_driver_sql("ALTER TABLE payments ADD COLUMN owner_id INTEGER")
+        conn.exec_driver_sql(
+            "UPDATE payments SET owner_id = subscriptions.owner_id "
+            "FROM subscriptions WHERE subscriptions.id = payments.subscription_id"
+        )
+        conn.exec_driver_sql("ALTER TABLE payments ALTER COLUMN owner_id SET NOT NULL")
+        conn.exec_driver_sql(
+            "ALTER TABLE payments ADD CONSTRAINT fk_payments_owner_id "
+            "FOREIGN KEY (owner_id) REFERENCES users (id) ON DELETE CASCADE"
+        )
+        conn.exec_driver_sql(
+            "ALTER TABLE payments ADD CONSTRAINT fk_payments_subscription_id "
+            "FOREIGN KEY (subscription_id) REFERENCES subscriptions (id) ON DELETE CASCADE"
+        )
+    logger.warning("Gave payments their subscription's owner; dropped any left by deletes")
+
+
+def upgrade(engine: Engine) -> None:
+    """Apply every outstanding schema change; call after `create_all`."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite doesn't open a transaction before DDL; make the upgrade all-or-nothing
+            conn.exec_driver_sql("BEGIN")
+        existing = _columns(conn, "subscriptions")
+        if "owner_id" not in existing:
+            owner_id = legacy_owner(conn)
+            if conn.dialect.name == "sqlite":
+                _rebuild_sqlite(conn, owner_id, existing)
+            else:
+                _add_owner_in_place(conn, owner_id)
+            logger.warning("Assigned subscriptions without an owner to %s", LEGACY_OWNER_EMAIL)
+        _add_columns(conn)
+        _owner_scoped_keys(conn)
+        _rekey_rollups(conn)
+        _scope_payments(conn)
+        conn.commit()
+
+
+if __name__ == "__main__":
+    from backend.database import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
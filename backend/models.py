@@ -1,16 +1,102 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, Float, Date, DateTime, ForeignKey, Index,
+    UniqueConstraint,
+)
 from datetime import datetime
 from backend.database import Base
 
+class User(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String(255), nullable=False, unique=True)
+    hashed_password = Column(String(255), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # Every API query is per owner, so owner_id leads each index: a tenant's page,
+        # category page or name search touches only that tenant's slice of the table
+        Index("ix_subscriptions_owner_next_due_id", "owner_id", "next_due", "id"),
+        Index("ix_subscriptions_owner_category_next_due_id",
+              "owner_id", "category", "next_due", "id"),
+        Index("ix_subscriptions_owner_name", "owner_id", "name"),
+        # Delta sync reads a tenant's rows above a version
+        Index("ix_subscriptions_owner_change_version", "owner_id", "change_version"),
+        # Bulk-import upsert key, unique per owner
+        UniqueConstraint("owner_id", "external_id", name="uq_subscriptions_owner_external_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(255), nullable=False)
     amount = Column(Float, nullable=False)
     cycle = Column(String(50), nullable=False)  # monthly, annual, one-time
-    next_due = Column(Date, nullable=False, index=True)
-    category = Column(String(100), nullable=False, index=True)
+    next_due = Column(Date, nullable=False, index=True)  # renewal scheduler scans all owners
+    # Day of month the cycle is anchored to once a renewal has clamped `next_due` to a
+    # short month's end; NULL means `next_due`'s own day
+    billing_day = Column(SmallInteger, nullable=True)
+    category = Column(String(100), nullable=False)
     notes = Column(String(500), nullable=True)
+    external_id = Column(String(255), nullable=True)
+    # The owner's table version at this row's last write (see backend.sync)
+    change_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SubscriptionTombstone(Base):
+    """Left behind by a deleted subscription so delta sync can report the delete."""
+    __tablename__ = "subscription_tombstones"
+    __table_args__ = (
+        Index("ix_subscription_tombstones_owner_change_version", "owner_id", "change_version"),
+    )
+
+    subscription_id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    change_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+class CategoryRollup(Base):
+    """Per-owner, per-category spend totals, maintained alongside every subscription write."""
+    __tablename__ = "category_rollups"
+
+    owner_id = Column(Integer, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    monthly_total = Column(Float, nullable=False, default=0.0)
+    annual_total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+class TableVersion(Base):
+    """Change counter per table and owner, bumped by every write transaction (drives ETags)."""
+    __tablename__ = "table_versions"
+
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class Payment(Base):
+    """A charge recorded when the renewal scheduler rolls `next_due` past it."""
+    __tablename__ = "payments"
+    __table_args__ = (
+        # One row per (subscription, due date) makes re-running a renewal a no-op
+        UniqueConstraint("subscription_id", "due_date", name="uq_payments_subscription_due"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # SQLite doesn't enforce the cascade (foreign keys are off), so deletes remove payments
+    # explicitly; the owner keeps a reused subscription id from exposing an old row's history
+    subscription_id = Column(
+        Integer, ForeignKey("subscriptions.id", ondelete="CASCADE"), nullable=False
+    )
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Float, nullable=False)
+    due_date = Column(Date, nullable=False)
+    recorded_at = Column(DateTime, default=datetime.utcnow)
+
+class Lease(Base):
+    """Named lock with an expiry, so only one worker runs a periodic job at a time."""
+    __tablename__ = "leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,46 @@
+"""Keyset (cursor) pagination helpers for subscription listings."""
+import base64
+import binascii
+from datetime import date
+from typing import Optional, Tuple
+from sqlalchemy import and_, or_
+from backend.models import Subscription
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(sub: Subscription) -> str:
+    """Encode the (next_due, id) sort key of the last row on a page."""
+    raw = f"{sub.next_due.isoformat()}:{sub.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        due, _, sub_id = base64.urlsafe_b64decode(padded).decode().partition(":")
+        return date.fromisoformat(due), int(sub_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def after_cursor(cursor: Optional[str]):
+    """Return a WHERE clause selecting rows strictly after `cursor` in (next_due, id) order."""
+    if not cursor:
+        return None
+    due, sub_id = decode_cursor(cursor)
+    return or_(
+        Subscription.next_due > due,
+        and_(Subscription.next_due == due, Subscription.id > sub_id),
+    )
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -0,0 +1,161 @@
+"""Background renewal scheduler: roll overdue `next_due` dates forward.
+
+An asyncio task started with the app wakes every RENEWAL_INTERVAL_SECONDS.
+Whichever worker holds the `renewals` lease walks overdue recurring
+subscriptions in `next_due` order, records a payment for every missed due
+date and advances `next_due` with one executemany UPDATE per batch, bumping
+the version of every owner it touched (their live change feeds are told to
+reload). A row keeps its billing day across short months: Jan 31 renews on
+Feb 29 and then Mar 31. Each UPDATE is guarded on the old `next_due` and
+payments are unique per (subscription, due date), so
+overlapping or repeated runs change nothing.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import date, datetime, timedelta
+from typing import Optional
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+from backend import versioning
+from backend.forecast import CYCLE_MONTHS
+from backend.models import Lease, Payment, Subscription
+from backend.rollup import dialect_insert
+
+RENEWAL_INTERVAL_SECONDS = float(os.getenv("RENEWAL_INTERVAL_SECONDS", "3600"))
+RENEWAL_LEASE_SECONDS = float(os.getenv("RENEWAL_LEASE_SECONDS", "300"))
+RENEWAL_BATCH_SIZE = int(os.getenv("RENEWAL_BATCH_SIZE", "1000"))
+
+LEASE_NAME = "renewals"
+HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+
+logger = logging.getLogger("bill_tracker.renewals")
+
+
+def acquire_lease(db: Session, holder: str = HOLDER, ttl: float = RENEWAL_LEASE_SECONDS,
+                  name: str = LEASE_NAME) -> bool:
+    """Take or extend the lease unless another holder's copy is still live."""
+    now = datetime.utcnow()
+    stmt = dialect_insert(db)(Lease).values(
+        name=name, holder=holder, expires_at=now + timedelta(seconds=ttl)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+        where=or_(Lease.holder == holder, Lease.expires_at < now),
+    ).returning(Lease.holder)
+    return db.execute(stmt).scalar_one_or_none() == holder
+
+
+def release_lease(db: Session, holder: str = HOLDER, name: str = LEASE_NAME) -> None:
+    db.execute(
+        update(Lease).where(Lease.name == name, Lease.holder == holder)
+        .values(expires_at=datetime.utcnow())
+    )
+
+
+def missed_dates(due: date, cycle: str, today: date, day: Optional[int] = None) -> tuple:
+    """Due dates before `today` and the first one on or after it, stepping from `due`.
+
+    `day` is the billing day the row is anchored to (default: `due`'s own day).
+    """
+    step = CYCLE_MONTHS[cycle]
+    day = day or due.day
+    missed, periods, upcoming = [], 0, due
+    while upcoming < today:
+        missed.append(upcoming)
+        periods += step
+        # Each date is the anchor day clamped to its month (Jan 31 -> Feb 29 -> Mar 31),
+        # so a clamped `due` doesn't drag the following months back with it
+        upcoming = due + relativedelta(months=periods, day=day)
+    return missed, upcoming
+
+
+def advance_batch(db: Session, today: date, batch_size: int = RENEWAL_BATCH_SIZE,
+                  touched: Optional[dict] = None) -> int:
+    """Advance up to `batch_size` overdue subscriptions; returns how many were selected.
+
+    `touched`, if given, collects each affected owner's new version.
+    """
+    rows = db.execute(
+        select(Subscription.id, Subscription.owner_id, Subscription.amount, Subscription.cycle,
+               Subscription.next_due, Subscription.billing_day)
+        .where(Subscription.next_due < today, Subscription.cycle.in_(list(CYCLE_MONTHS)))
+        .order_by(Subscription.next_due, Subscription.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+    # Each owner's new version stamps the rows it moves, for delta sync
+    versions = {
+        owner_id: versioning.bump(db, versioning.scope(owner_id))
+        for owner_id in sorted({row.owner_id for row in rows})
+    }
+    payments, moves = [], []
+    for sub_id, owner_id, amount, cycle, due, day in rows:
+        day = day or due.day
+        missed, upcoming = missed_dates(due, cycle, today, day)
+        payments.extend(
+            {"subscription_id": sub_id, "owner_id": owner_id, "amount": amount,
+             "due_date": missed_day}
+            for missed_day in missed
+        )
+        moves.append({"sub_id": sub_id, "old_due": due, "new_due": upcoming, "day": day,
+                      "version": versions[owner_id]})
+
+    db.execute(dialect_insert(db)(Payment).on_conflict_do_nothing(), payments)
+    table = Subscription.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("sub_id"), table.c.next_due == bindparam("old_due"))
+        .values(next_due=bindparam("new_due"), billing_day=bindparam("day"),
+                change_version=bindparam("version")),
+        moves,
+    )
+    if touched is not None:
+        touched.update(versions)
+    return len(rows)
+
+
+async def run_once(session_factory, today: Optional[date] = None, holder: str = HOLDER,
+                   batch_size: int = RENEWAL_BATCH_SIZE, cache=None, feed=None) -> int:
+    """One scheduler pass; returns the number of subscriptions advanced (0 without the lease)."""
+    today = today or date.today()
+    advanced = 0
+    touched = {}
+    async with session_factory() as db:
+        acquired = await db.run_sync(acquire_lease, holder)
+        await db.commit()
+        if not acquired:
+            return 0
+        while True:
+            count = await db.run_sync(advance_batch, today, batch_size, touched)
+            # Extending the lease in the batch's transaction keeps it alive on long runs
+            await db.run_sync(acquire_lease, holder)
+            await db.commit()
+            advanced += count
+            if count < batch_size:
+                break
+        await db.run_sync(release_lease, holder)
+        await db.commit()
+    if advanced and cache is not None:
+        # A pass can touch any number of owners; their version bumps already retire old keys
+        await cache.clear()
+    if feed is not None:
+        for owner_id, version in touched.items():
+            feed.reload(owner_id, version)
+    return advanced
+
+
+async def run_forever(session_factory, cache=None, feed=None,
+                      interval: float = RENEWAL_INTERVAL_SECONDS) -> None:
+    while True:
+        try:
+            advanced = await run_once(session_factory, cache=cache, feed=feed)
+            if advanced:
+                logger.info("Advanced %d overdue subscriptions", advanced)
+        except Exception:
+            logger.exception("Renewal pass failed")
+        await asyncio.sleep(interval)
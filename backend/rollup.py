@@ -0,0 +1,138 @@
+"""Incrementally maintained per-owner, per-category spend rollup.
+
+Write handlers call `record_change` inside their own transaction so the
+rollup commits (or rolls back) together with the subscription row. The
+`rebuild` and `verify` commands recompute it from the base table:
+
+    python -m backend.rollup rebuild
+    python -m backend.rollup verify
+"""
+import argparse
+import math
+import sys
+from typing import Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from backend.aggregates import monthly_cost, monthly_cost_expr
+from backend.models import CategoryRollup, Subscription
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def dialect_insert(db: Session):
+    """The INSERT construct with ON CONFLICT support for the session's dialect."""
+    name = db.get_bind().dialect.name
+    try:
+        return _INSERTS[name]
+    except KeyError:
+        raise NotImplementedError(f"Rollup upserts are not supported on {name}")
+
+
+def apply_delta(db: Session, owner_id: int, category: str, monthly_delta: float,
+                count_delta: int) -> None:
+    """Atomically add a delta to one owner's category totals, creating the row if needed."""
+    insert = dialect_insert(db)
+    stmt = insert(CategoryRollup).values(
+        owner_id=owner_id,
+        category=category,
+        monthly_total=monthly_delta,
+        annual_total=monthly_delta * 12,
+        count=count_delta,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[CategoryRollup.owner_id, CategoryRollup.category],
+        set_={
+            "monthly_total": CategoryRollup.monthly_total + stmt.excluded.monthly_total,
+            "annual_total": CategoryRollup.annual_total + stmt.excluded.annual_total,
+            "count": CategoryRollup.count + stmt.excluded.count,
+        },
+    ))
+    if count_delta < 0:
+        db.execute(delete(CategoryRollup).where(
+            CategoryRollup.owner_id == owner_id,
+            CategoryRollup.category == category,
+            CategoryRollup.count <= 0,
+        ))
+
+
+def record_change(db: Session, old: Optional[tuple] = None, new: Optional[tuple] = None) -> None:
+    """Apply a subscription write given (owner_id, category, amount, cycle) before and after it."""
+    if old is not None:
+        owner_id, category, amount, cycle = old
+        apply_delta(db, owner_id, category, -monthly_cost(amount, cycle), -1)
+    if new is not None:
+        owner_id, category, amount, cycle = new
+        apply_delta(db, owner_id, category, monthly_cost(amount, cycle), 1)
+
+
+def rollup_key(sub: Subscription) -> tuple:
+    """The fields of a subscription that feed the rollup."""
+    return (sub.owner_id, sub.category, sub.amount, sub.cycle)
+
+
+def _computed(db: Session) -> dict:
+    rows = db.execute(
+        select(
+            Subscription.owner_id, Subscription.category,
+            func.sum(monthly_cost_expr()), func.count(),
+        ).group_by(Subscription.owner_id, Subscription.category)
+    ).all()
+    return {(owner, category): (total, count) for owner, category, total, count in rows}
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every rollup row from the subscriptions table; returns row count."""
+    computed = _computed(db)
+    db.execute(delete(CategoryRollup))
+    db.add_all(
+        CategoryRollup(owner_id=o, category=c, monthly_total=t, annual_total=t * 12, count=n)
+        for (o, c), (t, n) in computed.items()
+    )
+    db.commit()
+    return len(computed)
+
+
+def verify(db: Session) -> list:
+    """Return human-readable mismatches between the rollup and the base table."""
+    computed = _computed(db)
+    stored = {
+        (r.owner_id, r.category): (r.monthly_total, r.count)
+        for r in db.scalars(select(CategoryRollup))
+    }
+    problems = []
+    for owner, category in sorted(computed.keys() | stored.keys()):
+        want = computed.get((owner, category), (0.0, 0))
+        have = stored.get((owner, category), (0.0, 0))
+        if have[1] != want[1] or not math.isclose(have[0], want[0], rel_tol=1e-9, abs_tol=1e-6):
+            problems.append(f"owner {owner} / {category}: stored {have}, expected {want}")
+    return problems
+
+
+def ensure_built(db: Session) -> None:
+    """Populate an empty rollup for databases created before it existed."""
+    if db.scalar(select(CategoryRollup.category).limit(1)) is None:
+        if db.scalar(select(Subscription.id).limit(1)) is not None:
+            rebuild(db)
+
+
+def main(argv=None) -> int:
+    from backend.database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Maintain the category spend rollup.")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args(argv)
+    init_db()
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            print(f"Rebuilt {rebuild(db)} category rows")
+            return 0
+        problems = verify(db)
+        for problem in problems:
+            print(problem)
+        print("Rollup OK" if not problems else f"{len(problems)} mismatched categories")
+        return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Read/write session routing across the primary and read replicas.
+
+GET handlers take their session from `get_read_db`, which round-robins over
+the replicas in DATABASE_REPLICA_URLS, skipping any that recently failed to
+connect and falling back to the primary when none are usable. Mutating
+requests stay on the primary and set a short-lived cookie; reads carrying
+that cookie are pinned to the primary so clients see their own writes
+before replication catches up.
+"""
+import itertools
+import os
+import threading
+import time
+from typing import Callable
+from fastapi import Depends, Request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from backend.database import AsyncSessionLocal, describe_pool, make_async_engine
+
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+LAST_WRITE_COOKIE = "bt_last_write"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# POSTs that write nothing (a signed token is issued, no row changes), so reads stay on replicas
+NON_WRITING_PATHS = {"/subscriptions/export/token"}
+
+SessionFactory = Callable[[], AsyncSession]
+
+
+class ReadRouter:
+    """Round-robin replica selection with health-aware fallback to the primary."""
+
+    def __init__(self, primary: SessionFactory, replicas: dict,
+                 retry_after: float = REPLICA_RETRY_SECONDS):
+        self.primary = primary
+        self.replicas = replicas
+        self.retry_after = retry_after
+        self._turn = itertools.count()
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> list:
+        """Healthy replica names, starting from the next one in rotation."""
+        with self._lock:
+            now = time.monotonic()
+            names = list(self.replicas)
+            if not names:
+                return []
+            start = next(self._turn) % len(names)
+            order = names[start:] + names[:start]
+            return [name for name in order if self._down_until.get(name, 0) <= now]
+
+    def mark_down(self, name: str) -> None:
+        with self._lock:
+            self._down_until[name] = time.monotonic() + self.retry_after
+
+    def factory(self, use_primary: bool = False) -> SessionFactory:
+        """Pick a session factory without probing the connection (for streaming)."""
+        healthy = [] if use_primary else self.candidates()
+        return self.replicas[healthy[0]] if healthy else self.primary
+
+    async def open(self, use_primary: bool = False) -> AsyncSession:
+        """Open a session on a replica that accepts a connection, else on the primary."""
+        if not use_primary:
+            for name in self.candidates():
+                db = self.replicas[name]()
+                try:
+                    await db.connection()
+                    return db
+                except (DBAPIError, OSError):
+                    await db.close()
+                    self.mark_down(name)
+        return self.primary()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "healthy": self._down_until.get(name, 0) <= now,
+                    **describe_pool(factory.kw["bind"].sync_engine.pool),
+                }
+                for name, factory in self.replicas.items()
+            }
+
+
+def _replica_factories(urls: list) -> dict:
+    return {
+        f"replica{index}": async_sessionmaker(
+            bind=make_async_engine(url), autoflush=False, expire_on_commit=False
+        )
+        for index, url in enumerate(urls, start=1)
+    }
+
+
+read_router = ReadRouter(AsyncSessionLocal, _replica_factories(DATABASE_REPLICA_URLS))
+
+
+def get_read_router() -> ReadRouter:
+    return read_router
+
+
+def wrote_recently(request: Request) -> bool:
+    """True if this client made a write within the read-your-writes window."""
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, "0"))
+    except ValueError:
+        return False
+    return time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+async def get_read_db(request: Request, router: ReadRouter = Depends(get_read_router)):
+    db = await router.open(use_primary=wrote_recently(request))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def get_read_session_factory(
+    request: Request, router: ReadRouter = Depends(get_read_router)
+) -> SessionFactory:
+    return router.factory(use_primary=wrote_recently(request))
+
+
+async def mark_writes(request: Request, call_next):
+    """HTTP middleware: stamp successful mutating responses with the write cookie."""
+    response = await call_next(request)
+    if (request.method not in SAFE_METHODS and request.url.path not in NON_WRITING_PATHS
+            and response.status_code < 400):
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=max(1, int(READ_YOUR_WRITES_SECONDS)),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
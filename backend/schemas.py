@@ -2,6 +2,26 @@ from pydantic import BaseModel
 from datetime import date, datetime
 from typing import Optional
 
+class UserCreate(BaseModel):
+    email: str
+    password: str
+
+class UserOut(BaseModel):
+    id: int
+    email: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+class ExportToken(BaseModel):
+    token: str  # pass as ?token= on /subscriptions/export
+    expires_in: int  # seconds
+
 class SubscriptionBase(BaseModel):
     name: str
     amount: float
@@ -9,6 +29,7 @@ class SubscriptionBase(BaseModel):
     next_due: date
     category: str
     notes: Optional[str] = None
+    external_id: Optional[str] = None
 
 class SubscriptionCreate(SubscriptionBase):
     pass
@@ -20,11 +41,87 @@ class SubscriptionUpdate(BaseModel):
     next_due: Optional[date] = None
     category: Optional[str] = None
     notes: Optional[str] = None
+    external_id: Optional[str] = None
 
 class SubscriptionOut(SubscriptionBase):
     id: int
+    change_version: int = 0
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+class SubscriptionPage(BaseModel):
+    items: list[SubscriptionOut]
+    next_cursor: Optional[str] = None
+
+class SubscriptionChanges(BaseModel):
+    version: int  # send back as `since` for the next sync
+    has_more: bool
+    reset: bool = False  # drop the local copy before applying
+    changed: list[SubscriptionOut]
+    deleted: list[int]
+
+class SearchHit(SubscriptionOut):
+    match: str  # "prefix" or "fuzzy"; prefix matches come first
+    score: float
+
+class SearchResults(BaseModel):
+    query: str
+    items: list[SearchHit]
+
+class DueSubscriptions(BaseModel):
+    count: int
+    subscriptions: list[SubscriptionOut]
+
+class BulkRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    updated: int
+    errors: list[BulkRowError]
+
+class PaymentOut(BaseModel):
+    id: int
+    subscription_id: int
+    amount: float
+    due_date: date
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ForecastDay(BaseModel):
+    date: date
+    amount: float
+
+class ForecastWeek(BaseModel):
+    week_start: date
+    amount: float
+
+class ForecastMonth(BaseModel):
+    month: str
+    amount: float
+
+class Forecast(BaseModel):
+    start: date
+    end: date
+    months: int
+    total: float
+    charges: int
+    daily: list[ForecastDay]
+    weekly: list[ForecastWeek]
+    monthly: list[ForecastMonth]
+
+class Dashboard(BaseModel):
+    count: int
+    total_monthly: float
+    total_annual: float
+    by_category: dict[str, float]
+    due_today: DueSubscriptions
+    soon_days: int
+    due_soon: DueSubscriptions
+    page: SubscriptionPage
@@ -0,0 +1,279 @@
+"""Ranked, typo-tolerant search over subscription name, category and notes.
+
+On SQLite two contentless FTS5 indexes shadow `subscriptions`, kept current by
+triggers so every write path (handlers, bulk upserts, renewals, the tracker's
+SQL storage) maintains them: a word index for prefix matches ranked by bm25
+(name above category above notes), and a trigram index on name and category
+for typo tolerance. On PostgreSQL a weighted tsvector GIN index plays the
+first part and pg_trgm, where the extension can be installed, the second.
+Each indexed row carries its owner as a token, so a match never leaves the
+caller's rows.
+
+A search takes prefix matches first; when they don't fill the page, rows
+whose name or category words are close enough to the query's words
+(trigram similarity >= SEARCH_MIN_SIMILARITY) fill the rest.
+"""
+import logging
+import os
+import re
+from sqlalchemy import Table, event, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend.models import Subscription
+from backend.pagination import escape_like
+
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.4"))
+SEARCH_MAX_TERMS = 8
+FUZZY_CANDIDATES = 10  # trigram candidates fetched per result still wanted
+
+logger = logging.getLogger("bill_tracker.search")
+
+# bm25 column weights: name, category, notes, owner
+WORD_WEIGHTS = "10.0, 4.0, 1.0, 0.0"
+
+_OWNER = "'#' || {row}.owner_id || '#'"
+_WORD_VALUES = "{row}.id, {row}.name, {row}.category, coalesce({row}.notes, ''), " + _OWNER
+_TRIGRAM_VALUES = "{row}.id, {row}.name, {row}.category, " + _OWNER
+
+SQLITE_INDEX = {
+    "subscription_search": """CREATE VIRTUAL TABLE subscription_search USING fts5(
+        name, category, notes, owner, content='',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    "subscription_trigrams": """CREATE VIRTUAL TABLE subscription_trigrams USING fts5(
+        name, category, owner, content='', tokenize='trigram')""",
+}
+
+# Contentless FTS5 tables forget their text, so a delete must repeat the indexed values
+SQLITE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS subscriptions_search_insert AFTER INSERT ON subscriptions
+    BEGIN
+        INSERT INTO subscription_search(rowid, name, category, notes, owner)
+        VALUES ({_WORD_VALUES.format(row="new")});
+        INSERT INTO subscription_trigrams(rowid, name, category, owner)
+        VALUES ({_TRIGRAM_VALUES.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS subscriptions_search_delete AFTER DELETE ON subscriptions
+    BEGIN
+        INSERT INTO subscription_search(subscription_search, rowid, name, category, notes, owner)
+        VALUES ('delete', {_WORD_VALUES.format(row="old")});
+        INSERT INTO subscription_trigrams(subscription_trigrams, rowid, name, category, owner)
+        VALUES ('delete', {_TRIGRAM_VALUES.format(row="old")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS subscriptions_search_update
+    AFTER UPDATE OF name, category, notes, owner_id ON subscriptions
+    BEGIN
+        INSERT INTO subscription_search(subscription_search, rowid, name, category, notes, owner)
+        VALUES ('delete', {_WORD_VALUES.format(row="old")});
+        INSERT INTO subscription_trigrams(subscription_trigrams, rowid, name, category, owner)
+        VALUES ('delete', {_TRIGRAM_VALUES.format(row="old")});
+        INSERT INTO subscription_search(rowid, name, category, notes, owner)
+        VALUES ({_WORD_VALUES.format(row="new")});
+        INSERT INTO subscription_trigrams(rowid, name, category, owner)
+        VALUES ({_TRIGRAM_VALUES.format(row="new")});
+    END""",
+]
+
+# Indexes the rows of a table that predates the index
+SQLITE_BACKFILL = {
+    "subscription_search": f"""INSERT INTO subscription_search(rowid, name, category, notes, owner)
+    SELECT {_WORD_VALUES.format(row="s")} FROM subscriptions AS s""",
+    "subscription_trigrams": f"""INSERT INTO subscription_trigrams(rowid, name, category, owner)
+    SELECT {_TRIGRAM_VALUES.format(row="s")} FROM subscriptions AS s""",
+}
+
+# The handler's WHERE clause must repeat these expressions exactly for the indexes to apply
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', category), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(notes, '')), 'C')"
+)
+PG_TRIGRAM_TEXT = "(name || ' ' || category)"
+
+POSTGRES_INDEX = [
+    f"""CREATE INDEX IF NOT EXISTS ix_subscriptions_search
+    ON subscriptions USING gin (({PG_DOCUMENT}))""",
+]
+POSTGRES_TRIGRAM_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""CREATE INDEX IF NOT EXISTS ix_subscriptions_trigram
+    ON subscriptions USING gin ({PG_TRIGRAM_TEXT} gin_trgm_ops)""",
+]
+
+
+def _sqlite_tables(conn) -> set:
+    found = conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master "
+        "WHERE name IN ('subscription_search', 'subscription_trigrams')"
+    )
+    return {name for (name,) in found}
+
+
+def install(conn) -> None:
+    """Create the search index and its maintenance for the connection's dialect; idempotent."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        existing = _sqlite_tables(conn)
+        for name, statement in SQLITE_INDEX.items():
+            if name not in existing:
+                conn.exec_driver_sql(statement)
+                conn.exec_driver_sql(SQLITE_BACKFILL[name])
+        for statement in SQLITE_TRIGGERS:
+            conn.exec_driver_sql(statement)
+    elif dialect == "postgresql":
+        for statement in POSTGRES_INDEX:
+            conn.exec_driver_sql(statement)
+        try:
+            with conn.begin_nested():
+                for statement in POSTGRES_TRIGRAM_INDEX:
+                    conn.exec_driver_sql(statement)
+        except DBAPIError:
+            logger.warning("pg_trgm is not available; search will not tolerate typos")
+
+
+def ensure_index(db: Session) -> None:
+    """Add the search index to a database created before it existed."""
+    install(db.connection())
+    db.commit()
+
+
+@event.listens_for(Subscription.__table__, "after_create")
+def _index_new_table(target: Table, connection, **kw) -> None:
+    install(connection)
+
+
+def terms(query: str) -> list:
+    return re.findall(r"\w+", query.lower())[:SEARCH_MAX_TERMS]
+
+
+def word_trigrams(word: str) -> set:
+    """pg_trgm's trigrams of one word: padded with two spaces before and one after."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(words: list, text_value: str) -> float:
+    """Mean over the query words of their best trigram similarity to a word of `text_value`."""
+    candidates = [word_trigrams(w) for w in re.findall(r"\w+", text_value.lower())]
+    if not words or not candidates:
+        return 0.0
+    total = 0.0
+    for word in words:
+        mine = word_trigrams(word)
+        total += max(len(mine & theirs) / len(mine | theirs) for theirs in candidates)
+    return total / len(words)
+
+
+async def _features(db: AsyncSession) -> set:
+    conn = await db.connection()
+    if conn.dialect.name == "sqlite":
+        tables = await conn.run_sync(_sqlite_tables)
+        return {"words" if name == "subscription_search" else "trigrams" for name in tables}
+    if conn.dialect.name == "postgresql":
+        found = await conn.exec_driver_sql("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return {"words", "trigrams"} if found.first() else {"words"}
+    return set()
+
+
+async def _prefix_matches(db: AsyncSession, dialect: str, owner_id: int, words: list,
+                          limit: int) -> list:
+    """(id, score) of rows where every word starts some word of name, category or notes."""
+    if dialect == "sqlite":
+        prefixes = " AND ".join(f'"{w}"*' for w in words)
+        match = f'owner : "{owner_id}" AND {{name category notes}} : ({prefixes})'
+        rows = await db.execute(text(
+            f"SELECT rowid, -bm25(subscription_search, {WORD_WEIGHTS}) AS score "
+            "FROM subscription_search WHERE subscription_search MATCH :match "
+            "ORDER BY score DESC LIMIT :limit"
+        ), {"match": match, "limit": limit})
+    else:
+        rows = await db.execute(text(
+            f"SELECT id, ts_rank({PG_DOCUMENT}, query) AS score "
+            "FROM subscriptions, to_tsquery('simple', :query) AS query "
+            f"WHERE owner_id = :owner_id AND ({PG_DOCUMENT}) @@ query "
+            "ORDER BY score DESC, id LIMIT :limit"
+        ), {"query": " & ".join(f"{w}:*" for w in words), "owner_id": owner_id, "limit": limit})
+    return [(row[0], float(row[1])) for row in rows]
+
+
+async def _fuzzy_candidates(db: AsyncSession, dialect: str, owner_id: int, words: list,
+                            limit: int) -> list:
+    """Ids of rows sharing trigrams with the query, most similar first."""
+    if dialect == "sqlite":
+        grams = sorted({w[i:i + 3] for w in words for i in range(len(w) - 2)})
+        if not grams:
+            return []
+        any_gram = " OR ".join(f'"{g}"' for g in grams)
+        match = f'owner : "#{owner_id}#" AND {{name category}} : ({any_gram})'
+        rows = await db.execute(text(
+            "SELECT rowid FROM subscription_trigrams WHERE subscription_trigrams MATCH :match "
+            "ORDER BY bm25(subscription_trigrams) LIMIT :limit"
+        ), {"match": match, "limit": limit})
+    else:
+        await db.execute(text(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"
+        ), {"threshold": str(SEARCH_MIN_SIMILARITY)})
+        rows = await db.execute(text(
+            "SELECT id FROM subscriptions "
+            f"WHERE owner_id = :owner_id AND :query <% {PG_TRIGRAM_TEXT} "
+            f"ORDER BY word_similarity(:query, {PG_TRIGRAM_TEXT}) DESC, id LIMIT :limit"
+        ), {"query": " ".join(words), "owner_id": owner_id, "limit": limit})
+    return [row[0] for row in rows]
+
+
+async def _like_matches(db: AsyncSession, owner_id: int, words: list, limit: int) -> list:
+    """Substring matching for databases without either index."""
+    stmt = select(Subscription.id).where(Subscription.owner_id == owner_id)
+    for word in words:
+        pattern = f"%{escape_like(word)}%"
+        stmt = stmt.where(or_(*(
+            column.ilike(pattern, escape="\\")
+            for column in (Subscription.name, Subscription.category, Subscription.notes)
+        )))
+    rows = await db.scalars(stmt.order_by(Subscription.next_due, Subscription.id).limit(limit))
+    return [(sub_id, 0.0) for sub_id in rows]
+
+
+async def search(db: AsyncSession, owner_id: int, query: str, limit: int) -> list:
+    """(subscription, match kind, score) for the owner's best matches, best first."""
+    words = terms(query)
+    if not words:
+        return []
+    conn = await db.connection()
+    dialect, features = conn.dialect.name, await _features(db)
+    if "words" in features:
+        hits = await _prefix_matches(db, dialect, owner_id, words, limit)
+    else:
+        hits = await _like_matches(db, owner_id, words, limit)
+    ranked = [(sub_id, "prefix", score) for sub_id, score in hits]
+
+    wanted = limit - len(ranked)
+    rows = {}
+    if wanted > 0 and "trigrams" in features:
+        seen = {sub_id for sub_id, _ in hits}
+        candidates = [
+            sub_id for sub_id in await _fuzzy_candidates(
+                db, dialect, owner_id, words, (wanted + len(seen)) * FUZZY_CANDIDATES
+            ) if sub_id not in seen
+        ]
+        rows = await _load(db, owner_id, candidates + list(seen))
+        fuzzy = []
+        for sub_id in candidates:
+            sub = rows.get(sub_id)
+            score = similarity(words, f"{sub.name} {sub.category}") if sub else 0.0
+            if score >= SEARCH_MIN_SIMILARITY:
+                fuzzy.append((sub_id, "fuzzy", round(score, 4)))
+        fuzzy.sort(key=lambda hit: -hit[2])
+        ranked += fuzzy[:wanted]
+    else:
+        rows = await _load(db, owner_id, [sub_id for sub_id, _ in hits])
+    return [(rows[sub_id], match, score) for sub_id, match, score in ranked if sub_id in rows]
+
+
+async def _load(db: AsyncSession, owner_id: int, ids: list) -> dict:
+    if not ids:
+        return {}
+    subs = await db.scalars(
+        select(Subscription).where(Subscription.owner_id == owner_id, Subscription.id.in_(ids))
+    )
+    return {sub.id: sub for sub in subs}
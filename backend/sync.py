@@ -0,0 +1,74 @@
+"""Delta sync: what changed in an owner's subscriptions since a version they hold.
+
+Every write stamps the rows it touches with the owner's new table version
+(`change_version`, the same number the change feed uses as its sequence),
+and a delete leaves a tombstone at its version. `changes_since` reads only
+rows and tombstones above the client's version through the
+(owner_id, change_version) indexes, so a sync costs what changed, not the
+size of the account. Clients apply `deleted` first, then upsert `changed`:
+a tombstone is always older than a live row that reuses its id.
+"""
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend import versioning
+from backend.models import Subscription, SubscriptionTombstone
+from backend.rollup import dialect_insert
+
+
+def tombstone(db: Session, owner_id: int, sub_id: int, version: int) -> None:
+    """Record the delete of `sub_id` at `version` in the current transaction."""
+    stmt = dialect_insert(db)(SubscriptionTombstone).values(
+        subscription_id=sub_id, owner_id=owner_id, change_version=version,
+        deleted_at=datetime.utcnow(),
+    )
+    # SQLite can hand a deleted row's id out again, and that row can be deleted too
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[SubscriptionTombstone.subscription_id],
+        set_={"owner_id": stmt.excluded.owner_id,
+              "change_version": stmt.excluded.change_version,
+              "deleted_at": stmt.excluded.deleted_at},
+    ))
+
+
+async def _read(db: AsyncSession, owner_id: int, above: int, upto=None, limit=None) -> tuple:
+    rows = select(Subscription).where(
+        Subscription.owner_id == owner_id, Subscription.change_version > above
+    ).order_by(Subscription.change_version, Subscription.id)
+    Tombstone = SubscriptionTombstone
+    gone = select(Tombstone.subscription_id, Tombstone.change_version).where(
+        Tombstone.owner_id == owner_id, Tombstone.change_version > above
+    ).order_by(Tombstone.change_version, Tombstone.subscription_id)
+    if upto is not None:
+        rows = rows.where(Subscription.change_version <= upto)
+        gone = gone.where(Tombstone.change_version <= upto)
+    if limit is not None:
+        rows, gone = rows.limit(limit), gone.limit(limit)
+    return (await db.scalars(rows)).all(), (await db.execute(gone)).all()
+
+
+async def changes_since(db: AsyncSession, owner_id: int, since: int, limit: int) -> dict:
+    """Up to about `limit` changes above `since`; a version is never split across pages."""
+    current = await versioning.current(db, versioning.scope(owner_id))
+    reset = since > current  # e.g. the client synced against another database
+    # Rows written before change versions existed sit at 0; a full sync includes them
+    above = -1 if since == 0 or reset else since
+    rows, gone = await _read(db, owner_id, above, limit=limit + 1)
+    versions = sorted([r.change_version for r in rows] + [g.change_version for g in gone])
+    has_more = len(versions) > limit
+    if not has_more:
+        upto = current
+    elif versions[limit] > versions[0]:
+        upto = versions[limit] - 1  # stop short of the version that overflows the page
+    else:
+        # One write (a bulk batch) changed more than a page: send all of it
+        upto = versions[0]
+        rows, gone = await _read(db, owner_id, above, upto=upto)
+    return {
+        "version": upto,
+        "has_more": has_more,
+        "reset": reset,
+        "changed": [r for r in rows if r.change_version <= upto],
+        "deleted": [g.subscription_id for g in gone if g.change_version <= upto],
+    }
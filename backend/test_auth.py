@@ -0,0 +1,50 @@
+"""Tests for password hashing offload and the validated-token cache."""
+from datetime import timedelta
+from passlib.context import CryptContext
+from backend import auth
+from backend.models import User
+
+
+def test_token_cache_reuses_validations_until_expiry(monkeypatch):
+    cache = auth.TokenCache(max_entries=2)
+    token = auth.create_access_token(7, "a@example.com")
+    assert cache.validate(token).user_id == 7
+    assert cache.validate(token).email == "a@example.com"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    short = auth.create_access_token(8, "b@example.com", timedelta(seconds=30))
+    assert cache.validate(short).user_id == 8
+    # Past the token's exp the entry is dropped and the token decoded afresh
+    monkeypatch.setattr(auth.time, "time", lambda: 4e9)
+    monkeypatch.setattr(auth, "_decode", lambda token: None)
+    assert cache.validate(short) is None
+    assert cache.validate("not-a-jwt") is None
+    assert cache.describe() == {"entries": 1, "hits": 1, "misses": 4}
+
+
+def test_token_cache_is_bounded():
+    cache = auth.TokenCache(max_entries=2)
+    tokens = [auth.create_access_token(i, f"{i}@example.com") for i in range(3)]
+    for token in tokens:
+        cache.validate(token)
+    cache.validate(tokens[0])
+    assert cache.describe() == {"entries": 2, "hits": 0, "misses": 4}
+
+
+def test_login_rehashes_passwords_stored_at_another_cost(client, db_session_factory):
+    cheap = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("hunter22")
+    with db_session_factory() as db:
+        db.add(User(email="old@example.com", hashed_password=cheap))
+        db.commit()
+    credentials = {"email": "old@example.com", "password": "hunter22"}
+    assert client.post("/auth/token", json=credentials).status_code == 200
+    with db_session_factory() as db:
+        stored = db.query(User).filter_by(email="old@example.com").one().hashed_password
+    assert stored != cheap and auth.verify_password("hunter22", stored)
+    assert auth.pwd_context.identify(stored) == "bcrypt" and f"${auth.BCRYPT_ROUNDS:02d}$" in stored
+    assert client.post("/auth/token", json=credentials).status_code == 200
+
+
+def test_password_less_accounts_cannot_sign_in(client):
+    credentials = {"email": "owner@example.com", "password": "!"}
+    assert client.post("/auth/token", json=credentials).status_code == 401
@@ -0,0 +1,19 @@
+"""Tests for the benchmark harness itself (not performance assertions)."""
+from backend import benchmark
+
+
+def test_every_route_has_a_scenario():
+    benchmark.check_coverage(benchmark.scenarios(1000))
+
+
+def test_compare_flags_p50_regressions_beyond_tolerance():
+    def report(p50s):
+        return {"results": [
+            {"rows": 1000, "mode": "testclient", "name": name, "p50_ms": p50}
+            for name, p50 in p50s.items()
+        ]}
+
+    baseline = report({"GET /a": 10.0, "GET /b": 10.0})
+    current = report({"GET /a": 11.0, "GET /b": 13.0, "GET /new": 5.0})
+    regressions = benchmark.compare(baseline, current, tolerance=0.2)
+    assert len(regressions) == 1 and "GET /b" in regressions[0]
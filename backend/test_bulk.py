@@ -0,0 +1,96 @@
+"""Tests for POST /subscriptions/bulk."""
+import json
+from sqlalchemy.exc import DBAPIError
+from backend import bulk, rollup
+
+ROWS = [
+    {"external_id": "a", "name": "Netflix", "amount": 199, "cycle": "monthly",
+     "next_due": "2030-01-10", "category": "OTT"},
+    {"external_id": "b", "name": "Prime", "amount": 1200, "cycle": "annual",
+     "next_due": "2030-02-01", "category": "OTT"},
+    {"name": "Power", "amount": 800, "cycle": "monthly",
+     "next_due": "2030-01-05", "category": "Utility"},
+]
+
+
+def test_json_import_reports_row_errors_without_aborting(client):
+    rows = ROWS + [{"name": "Broken", "amount": "lots", "cycle": "monthly",
+                    "next_due": "2030-01-01", "category": "OTT"}]
+    body = client.post("/subscriptions/bulk", json=rows).json()
+    assert body["inserted"] == 3
+    assert body["updated"] == 0
+    assert [e["row"] for e in body["errors"]] == [3]
+    assert body["errors"][0]["errors"][0].startswith("amount:")
+    assert client.get("/subscriptions/summary/monthly").json()["count"] == 3
+
+
+def test_ndjson_upserts_by_external_key(client, db_session_factory):
+    client.post("/subscriptions/bulk", json=ROWS)
+    changed = dict(ROWS[0], amount=249)
+    response = client.post(
+        "/subscriptions/bulk",
+        content="\n".join(json.dumps(r) for r in [changed, ROWS[1]]),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.json() == {"inserted": 0, "updated": 2, "errors": []}
+    items = client.get("/subscriptions", params={"category": "OTT"}).json()["items"]
+    assert sorted(s["amount"] for s in items) == [249.0, 1200.0]
+    with db_session_factory() as db:
+        assert rollup.verify(db) == []
+
+
+def test_csv_from_streamlit_export_uses_local_id_as_key(client):
+    csv_body = (
+        "id,name,amount,cycle,next_due,category,notes,created_at,monthly_cost\n"
+        "1,Netflix,199,monthly,2030-01-10,OTT,,2030-01-01 10:00:00,199\n"
+        "2,Prime,1499,annual,2030-02-01,OTT,Annual,2030-01-01 10:00:00,124.9\n"
+    )
+    for expected in ({"inserted": 2, "updated": 0}, {"inserted": 0, "updated": 2}):
+        body = client.post(
+            "/subscriptions/bulk", content=csv_body, headers={"content-type": "text/csv"}
+        ).json()
+        assert {k: body[k] for k in expected} == expected
+    items = client.get("/subscriptions").json()["items"]
+    assert [s["external_id"] for s in items] == ["1", "2"]
+
+
+def test_database_failure_is_isolated_to_offending_row(db_session_factory, owner, monkeypatch):
+    real_write = bulk._write_batch
+
+    def flaky_write(db, owner_id, batch):
+        if any(values["name"] == "Poison" for _, values in batch):
+            raise DBAPIError("INSERT", {}, Exception("constraint failed"))
+        return real_write(db, owner_id, batch)
+
+    monkeypatch.setattr(bulk, "_write_batch", flaky_write)
+    rows = [dict(ROWS[2], name=name) for name in ("One", "Poison", "Two", "Three")]
+    with db_session_factory() as db:
+        result = bulk.import_rows(db, owner[0], rows, batch_size=2)
+    assert result["inserted"] == 3
+    assert [e["row"] for e in result["errors"]] == [1]
+
+
+def test_unsupported_content_type_is_rejected(client):
+    response = client.post(
+        "/subscriptions/bulk", content="x", headers={"content-type": "text/plain"}
+    )
+    assert response.status_code == 400
+
+
+def test_repeated_external_id_is_reported_per_row(client):
+    rows = [ROWS[0], dict(ROWS[0], amount=249), ROWS[1], dict(ROWS[0], amount=1)]
+    body = client.post("/subscriptions/bulk", json=rows).json()
+    assert body["inserted"] == 2
+    assert [e["row"] for e in body["errors"]] == [1, 3]
+    assert body["errors"][0]["errors"] == ["external_id: duplicate of row 0 ('a')"]
+    items = client.get("/subscriptions", params={"category": "OTT"}).json()["items"]
+    assert sorted(s["amount"] for s in items) == [199.0, 1200.0]
+
+
+def test_malformed_csv_is_rejected(client):
+    csv_body = "name,amount\n" + "x" * 200_000 + ",1\n"
+    response = client.post(
+        "/subscriptions/bulk", content=csv_body, headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 400
+    assert "Malformed CSV" in response.json()["detail"]
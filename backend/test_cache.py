@@ -0,0 +1,77 @@
+"""Tests for the response cache and its write invalidation."""
+import asyncio
+import pytest
+from backend.cache import LRUCache, RedisCache, get_cache
+from backend.main import app
+from conftest import make_subscription
+
+
+def test_lru_evicts_least_recently_used_and_expires():
+    async def scenario():
+        cache = LRUCache(max_entries=2, ttl=60)
+        await cache.set("a", b"1", ["list"])
+        await cache.set("b", b"2", ["list"])
+        assert await cache.get("a") == b"1"  # "b" is now least recently used
+        await cache.set("c", b"3", ["due"])
+        assert await cache.get("b") is None
+        assert cache.stats.evictions == 1
+
+        await cache.invalidate(["list"])
+        assert await cache.get("a") is None
+        assert await cache.get("c") == b"3"
+
+        expired = LRUCache(ttl=0)
+        await expired.set("x", b"1", [])
+        assert await expired.get("x") is None
+        return cache.describe()
+
+    stats = asyncio.run(scenario())
+    assert stats["hits"] == 2
+    assert stats["entries"] == 1
+
+
+def test_redis_backend_with_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        cache = RedisCache(fakeredis.FakeAsyncRedis(), ttl=60)
+        await cache.set("/subscriptions?", b"page", ["list"])
+        await cache.set("/subscriptions/summary/monthly?", b"sum", ["summary"])
+        assert await cache.get("/subscriptions?") == b"page"
+        await cache.invalidate(["list"])
+        assert await cache.get("/subscriptions?") is None
+        assert await cache.get("/subscriptions/summary/monthly?") == b"sum"
+        await cache.clear()
+        assert await cache.get("/subscriptions/summary/monthly?") is None
+        return cache.describe()
+
+    assert asyncio.run(scenario())["hits"] == 2
+
+
+def test_repeat_reads_hit_and_writes_invalidate(client):
+    sub = make_subscription(client, name="Netflix", amount=199)
+    client.cookies.clear()  # leave the read-your-writes window so reads use the cache
+    cache = app.dependency_overrides[get_cache]()
+
+    first = client.get("/subscriptions/summary/monthly").json()
+    assert client.get("/subscriptions/summary/monthly").json() == first
+    client.get("/subscriptions")
+    client.get("/subscriptions")
+    assert cache.describe()["hits"] == 2
+
+    client.put(f"/subscriptions/{sub['id']}", json={"amount": 299})
+    client.cookies.clear()
+    assert client.get("/subscriptions/summary/monthly").json()["total_monthly"] == 299
+    assert client.get("/subscriptions").json()["items"][0]["amount"] == 299
+
+    client.delete(f"/subscriptions/{sub['id']}")
+    client.cookies.clear()
+    assert client.get("/subscriptions").json()["items"] == []
+
+
+def test_recent_writer_bypasses_cache(client):
+    make_subscription(client, name="Netflix")
+    cache = app.dependency_overrides[get_cache]()
+    client.get("/subscriptions")
+    client.get("/subscriptions")
+    assert cache.describe()["hits"] == 0
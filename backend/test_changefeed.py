@@ -0,0 +1,118 @@
+"""Tests for the server-sent change feed."""
+import asyncio
+import json
+from backend import changefeed, renewals
+from backend.changefeed import ChangeFeed
+from conftest import make_subscription
+
+
+def frames(text: str) -> list:
+    """(event, data) for every SSE event in `text`, skipping comments and retry hints."""
+    events = []
+    for block in text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line
+                      and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def collect(feed: ChangeFeed, owner_id, since, current, publish=(), count=1):
+    """Open a stream, run `publish` once it has connected, and return its first `count` events."""
+    async def run():
+        stream = feed.stream(owner_id, since, current, keepalive=0.05)
+        received, pending = [], list(publish)
+        async for chunk in stream:
+            received += frames(chunk)
+            if len(received) >= count:
+                break
+            while pending:
+                pending.pop(0)()
+        await stream.aclose()
+        return received
+
+    return asyncio.run(asyncio.wait_for(run(), 5))
+
+
+def test_fresh_client_gets_ready_then_live_events():
+    feed = ChangeFeed()
+    events = collect(feed, 1, None, 4, count=2,
+                     publish=[lambda: feed.publish(1, 5, "delete", sub_id=9)])
+    assert events == [
+        ("ready", {"seq": 4, "op": "ready", "id": None, "subscription": None}),
+        ("delete", {"seq": 5, "op": "delete", "id": 9, "subscription": None}),
+    ]
+    assert feed.describe() == {"channels": 1, "listeners": 0}
+
+
+def test_resume_replays_the_backlog_or_asks_for_a_reload():
+    feed = ChangeFeed(backlog=3)
+    for seq in range(1, 6):
+        feed.publish(1, seq, "delete", sub_id=seq)
+    replayed = collect(feed, 1, 3, 5, count=2)
+    assert [(op, data["seq"]) for op, data in replayed] == [("delete", 4), ("delete", 5)]
+    # Version 1 has left the backlog, so the client can't be caught up event by event
+    assert [(op, data["seq"]) for op, data in collect(feed, 1, 0, 5)] == [("reload", 5)]
+    # A write this worker never saw (another worker, a bulk import) shows up as a gap
+    assert [(op, data["seq"]) for op, data in collect(feed, 1, 5, 7)] == [("reload", 7)]
+
+
+def test_other_owners_events_are_not_delivered():
+    feed = ChangeFeed()
+    feed.publish(2, 1, "delete", sub_id=1)
+    events = collect(feed, 1, 0, 0, count=1, publish=[
+        lambda: feed.publish(2, 2, "delete", sub_id=2),
+        lambda: feed.publish(1, 1, "delete", sub_id=3),
+    ])
+    assert [data["id"] for _, data in events] == [3]
+
+
+def test_writes_publish_their_version(client, owner, monkeypatch):
+    feed = ChangeFeed()
+    monkeypatch.setattr("backend.main.change_feed", feed)
+    sub = make_subscription(client)
+    client.put(f"/subscriptions/{sub['id']}", json={"amount": 5})
+    client.delete(f"/subscriptions/{sub['id']}")
+    client.post("/subscriptions/bulk", json=[
+        {"name": "Gym", "amount": 10, "cycle": "monthly", "next_due": "2030-01-01",
+         "category": "Fitness"},
+    ])
+    events = collect(feed, owner[0], 0, 4, count=4)
+    assert [(op, data["seq"], data["id"]) for op, data in events] == [
+        ("create", 1, sub["id"]), ("update", 2, sub["id"]), ("delete", 3, sub["id"]),
+        ("reload", 4, None),
+    ]
+    assert events[1][1]["subscription"]["amount"] == 5
+
+
+def test_renewal_pass_reloads_touched_owners(client, owner, async_session_factory):
+    make_subscription(client, next_due="2024-01-31")
+    feed = ChangeFeed()
+    asyncio.run(renewals.run_once(async_session_factory, feed=feed))
+    events = collect(feed, owner[0], 1, 1, count=1)
+    assert [(op, data["seq"]) for op, data in events] == [("reload", 2)]
+
+
+def test_poll_reloads_listeners_on_versions_written_elsewhere(
+    client, owner, async_session_factory
+):
+    feed = ChangeFeed()
+    make_subscription(client)
+
+    async def run():
+        stream = feed.stream(owner[0], None, 0, keepalive=0.05)
+        assert frames(await stream.__anext__())[0][0] == "ready"
+        await feed.poll_versions(async_session_factory)
+        event = frames(await stream.__anext__())
+        await stream.aclose()
+        return event
+
+    assert [(op, data["seq"]) for op, data in asyncio.run(run())] == [("reload", 1)]
+
+
+def test_idle_channels_are_evicted(monkeypatch):
+    feed = ChangeFeed(max_channels=2)
+    for owner_id in range(1, 4):
+        feed.publish(owner_id, 1, "delete", sub_id=1)
+    assert list(feed._channels) == [2, 3]
+    assert changefeed.encode(3, "reload").startswith("id: 3\nevent: reload\n")
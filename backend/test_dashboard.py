@@ -0,0 +1,49 @@
+"""Tests for the one-request dashboard endpoint."""
+from datetime import date, timedelta
+from conftest import make_subscription, sign_up
+
+
+def test_dashboard_matches_the_individual_endpoints(client):
+    today = date.today()
+    make_subscription(client, name="Today", amount=100, next_due=str(today))
+    make_subscription(client, name="Soon", amount=1200, cycle="annual",
+                      next_due=str(today + timedelta(days=3)), category="Cloud")
+    make_subscription(client, name="Later", amount=50, next_due=str(today + timedelta(days=30)))
+
+    dashboard = client.get("/dashboard", params={"soon_days": 7}).json()
+    summary = client.get("/subscriptions/summary/monthly").json()
+    assert dashboard["count"] == summary["count"] == 3
+    assert dashboard["by_category"] == summary["by_category"] == {"OTT": 150, "Cloud": 100}
+    assert dashboard["total_monthly"] == 250
+    assert dashboard["total_annual"] == 3000
+    assert dashboard["due_today"] == client.get("/subscriptions/due/today").json()
+    assert dashboard["due_soon"] == client.get("/subscriptions/due/soon?days=7").json()
+    assert [s["name"] for s in dashboard["page"]["items"]] == ["Today", "Soon", "Later"]
+
+
+def test_dashboard_pages_and_revalidates(client):
+    for day in range(3):
+        make_subscription(client, next_due=str(date.today() + timedelta(days=day + 10)))
+    first = client.get("/dashboard", params={"limit": 2})
+    page = first.json()["page"]
+    assert len(page["items"]) == 2 and page["next_cursor"]
+    rest = client.get("/dashboard", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert len(rest["page"]["items"]) == 1 and rest["page"]["next_cursor"] is None
+    assert client.get("/dashboard", params={"cursor": "garbage"}).status_code == 400
+
+    etag = first.headers["ETag"]
+    repeat = client.get("/dashboard", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    make_subscription(client)
+    changed = client.get("/dashboard", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["count"] == 4
+
+
+def test_dashboard_only_covers_the_callers_rows(client, db_session_factory):
+    make_subscription(client, next_due=str(date.today()))
+    _, other = sign_up(db_session_factory, "other@example.com")
+    dashboard = client.get("/dashboard", headers=other).json()
+    assert dashboard["count"] == 0
+    assert dashboard["due_today"]["count"] == 0
+    assert dashboard["page"]["items"] == []
@@ -0,0 +1,43 @@
+"""Tests for engine configuration, SQLite pragmas and pool metrics."""
+from sqlalchemy import text
+from backend import database
+
+
+def test_postgres_statement_timeout_is_passed_to_both_drivers():
+    url = "postgresql://bill_user:pw@postgres:5432/bill_tracker"
+    sync_opts = database.engine_options(url)
+    async_opts = database.engine_options(database.to_async_url(url), is_async=True)
+    timeout = database.DB_STATEMENT_TIMEOUT_MS
+    assert sync_opts["connect_args"] == {"options": f"-c statement_timeout={timeout}"}
+    assert async_opts["connect_args"] == {"server_settings": {"statement_timeout": str(timeout)}}
+    for opts in (sync_opts, async_opts):
+        assert opts["pool_size"] == database.DB_POOL_SIZE
+        assert opts["pool_pre_ping"] == database.DB_POOL_PRE_PING
+
+
+def test_async_url_keeps_credentials():
+    url = database.to_async_url("postgresql://bill_user:pw@postgres:5432/bill_tracker")
+    assert url == "postgresql+asyncpg://bill_user:pw@postgres:5432/bill_tracker"
+
+
+def test_sqlite_engine_applies_pragmas_and_counts_checkouts(tmp_path):
+    engine = database.make_engine(f"sqlite:///{tmp_path}/pragmas.db")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA mmap_size")).scalar() == database.SQLITE_MMAP_SIZE
+        with engine.connect():
+            pass
+        stats = engine.pool.stats()
+        assert stats["checkouts"] >= 1
+        assert stats["checked_out"] == 0
+        assert stats["wait_seconds_max"] >= 0.0
+    finally:
+        engine.dispose()
+
+
+def test_pool_stats_endpoint(client):
+    body = client.get("/health/pool").json()
+    assert set(body) == {"sync", "async", "replicas"}
+    assert "checkouts" in body["sync"]
@@ -0,0 +1,60 @@
+"""Tests for ETag / If-None-Match handling on read endpoints."""
+import json
+import pytest
+from conftest import make_subscription
+
+
+@pytest.mark.parametrize("path", [
+    "/subscriptions",
+    "/subscriptions/summary/monthly",
+    "/subscriptions/due/today",
+    "/subscriptions/due/soon?days=3",
+])
+def test_collection_reads_answer_304(client, path):
+    make_subscription(client)
+    first = client.get(path)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    again = client.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert client.get(path, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_writes_change_collection_etags(client):
+    sub = make_subscription(client)
+    etag = client.get("/subscriptions").headers["ETag"]
+    assert client.get("/subscriptions?limit=1").headers["ETag"] != etag
+
+    client.put(f"/subscriptions/{sub['id']}", json={"amount": 20.0})
+    resp = client.get("/subscriptions", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert resp.json()["items"][0]["amount"] == 20.0
+
+
+def test_bulk_import_bumps_version(client):
+    etag = client.get("/subscriptions/summary/monthly").headers["ETag"]
+    rows = [{"name": "Gym", "amount": 30, "cycle": "monthly", "next_due": "2030-01-01",
+             "category": "Health"}]
+    client.post("/subscriptions/bulk", content=json.dumps(rows),
+                headers={"content-type": "application/json"})
+    resp = client.get("/subscriptions/summary/monthly", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 1
+
+
+def test_single_row_etag(client):
+    sub = make_subscription(client)
+    first = client.get(f"/subscriptions/{sub['id']}")
+    etag = first.headers["ETag"]
+    assert client.get(
+        f"/subscriptions/{sub['id']}", headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    client.put(f"/subscriptions/{sub['id']}", json={"notes": "shared plan"})
+    assert client.get(
+        f"/subscriptions/{sub['id']}", headers={"If-None-Match": etag}
+    ).status_code == 200
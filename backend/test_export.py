@@ -0,0 +1,67 @@
+"""Tests for the streaming GET /subscriptions/export endpoint."""
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from backend import auth, export
+from conftest import make_subscription
+
+
+def _seed(client, n=5):
+    for i in range(n):
+        make_subscription(client, name=f"Service {i}", next_due=f"2030-01-{10 + i}")
+
+
+def test_csv_export_streams_in_batches(client, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    _seed(client)
+    response = client.get("/subscriptions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["name"] for r in rows] == [f"Service {i}" for i in range(5)]
+    assert rows[0]["monthly_cost"] == "199.0"
+
+
+def test_ndjson_gzip_export(client):
+    _seed(client, n=3)
+    response = client.get("/subscriptions/export", params={"format": "ndjson", "gzip": True})
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Service 0", "Service 1", "Service 2"]
+
+
+def test_csv_export_round_trips_through_bulk_import(client):
+    _seed(client, n=2)
+    body = client.get("/subscriptions/export").text
+    result = client.post(
+        "/subscriptions/bulk", content=body, headers={"content-type": "text/csv"}
+    ).json()
+    assert result["errors"] == []
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/subscriptions/export", params={"format": "xml"}).status_code == 422
+
+
+def test_export_link_authenticates_with_a_scoped_token(client, owner):
+    _seed(client, n=2)
+    issued = client.post("/subscriptions/export/token").json()
+    assert issued["expires_in"] == auth.EXPORT_TOKEN_EXPIRE_SECONDS
+    link = {"format": "ndjson", "token": issued["token"]}
+    del client.headers["Authorization"]  # a browser following the link sends none
+
+    response = client.get("/subscriptions/export", params=link)
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == [
+        "Service 0", "Service 1",
+    ]
+    assert client.get("/subscriptions/export").status_code == 401
+    # The link's token is no bearer token, and it stops working once it expires
+    bearer = {"Authorization": f"Bearer {issued['token']}"}
+    assert client.get("/subscriptions", headers=bearer).status_code == 401
+    expired = auth.create_access_token(
+        owner[0], "owner@example.com", timedelta(seconds=-1), auth.EXPORT_SCOPE
+    )
+    assert client.get("/subscriptions/export", params={"token": expired}).status_code == 401
@@ -0,0 +1,61 @@
+"""Tests for the vectorized renewal forecast."""
+import asyncio
+from datetime import date
+import pytest
+from backend import renewals
+from backend.forecast import project
+from conftest import make_subscription
+
+
+def test_month_end_anchors_clamp_without_drifting():
+    rows = [
+        (10.0, "monthly", date(2024, 1, 31), None), (120.0, "annual", date(2024, 2, 29), None)
+    ]
+    body = project(rows, date(2024, 1, 1), 14)
+    monthly_dates = [d["date"] for d in body["daily"] if d["amount"] in (10.0, 130.0)]
+    assert monthly_dates[:4] == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)
+    ]
+    assert {"date": date(2025, 2, 28), "amount": 130.0} in body["daily"]
+    assert body["end"] == date(2025, 3, 1)
+    assert body["charges"] == 16
+    assert body["total"] == pytest.approx(14 * 10 + 2 * 120)
+
+
+def test_overdue_and_one_time_rows_only_count_inside_window():
+    rows = [
+        (1.0, "monthly", date(2020, 6, 15), None),
+        (5.0, "one-time", date(2024, 3, 3), None),
+        (7.0, "one-time", date(2023, 12, 31), None),
+    ]
+    body = project(rows, date(2024, 1, 1), 3)
+    assert [d["date"] for d in body["daily"]] == [
+        date(2024, 1, 15), date(2024, 2, 15), date(2024, 3, 3), date(2024, 3, 15)
+    ]
+    assert [m["month"] for m in body["monthly"]] == ["2024-01", "2024-02", "2024-03"]
+    assert sum(w["amount"] for w in body["weekly"]) == pytest.approx(body["total"])
+    assert all(w["week_start"].weekday() == 0 for w in body["weekly"])
+
+
+def test_clamped_month_end_follows_the_billing_day():
+    # Renewed from Jan 31 to Feb 29, which keeps billing day 31
+    body = project([(10.0, "monthly", date(2024, 2, 29), 31)], date(2024, 2, 1), 3)
+    assert [d["date"] for d in body["daily"]] == [
+        date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)
+    ]
+
+
+def test_forecast_matches_the_charges_renewals_create(client, async_session_factory):
+    make_subscription(client, amount=10, cycle="monthly", next_due="2024-01-31")
+    asyncio.run(renewals.run_once(async_session_factory, today=date(2024, 2, 1)))
+    body = client.get("/forecast", params={"months": 2, "start": "2024-02-01"}).json()
+    assert [d["date"] for d in body["daily"]] == ["2024-02-29", "2024-03-31"]
+
+
+def test_forecast_endpoint(client):
+    make_subscription(client, amount=100, cycle="monthly", next_due="2030-01-10")
+    make_subscription(client, amount=1200, cycle="annual", next_due="2030-06-01")
+    body = client.get("/forecast", params={"months": 12, "start": "2030-01-01"}).json()
+    assert body["total"] == pytest.approx(2400.0)
+    assert body["monthly"][5] == {"month": "2030-06", "amount": 1300.0}
+    assert client.get("/forecast", params={"months": 0}).status_code == 422
@@ -0,0 +1,55 @@
+"""Tests for the queued JSON logging pipeline."""
+import json
+import logging
+import queue
+from backend import logging_config
+
+
+def test_json_records_carry_extra_fields_and_request_id():
+    handler = logging_config.DroppingQueueHandler(queue.Queue())
+    token = logging_config.request_id_var.set("abc123")
+    try:
+        record = logging.makeLogRecord({
+            "name": "bill_tracker.test", "levelno": logging.INFO, "levelname": "INFO",
+            "msg": "took %d ms", "args": (12,), "duration_ms": 12.5,
+        })
+        handler.handle(record)
+    finally:
+        logging_config.request_id_var.reset(token)
+    line = logging_config.JsonFormatter().format(handler.queue.get_nowait())
+    entry = json.loads(line)
+    assert entry["message"] == "took 12 ms"
+    assert entry["request_id"] == "abc123"
+    assert entry["duration_ms"] == 12.5
+    assert entry["logger"] == "bill_tracker.test"
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = logging_config.DroppingQueueHandler(queue.Queue(maxsize=1))
+    for i in range(3):
+        handler.handle(logging.makeLogRecord({"msg": f"record {i}"}))
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().getMessage() == "record 0"
+
+
+def test_requests_get_an_id_and_an_access_record(client, caplog):
+    with caplog.at_level(logging.INFO, logger="bill_tracker.access"):
+        response = client.get("/subscriptions", headers={"X-Request-ID": "req-1"})
+    assert response.headers["X-Request-ID"] == "req-1"
+    record = next(r for r in caplog.records if r.name == "bill_tracker.access")
+    assert (record.request_id, record.status, record.path) == ("req-1", 200, "/subscriptions")
+    assert record.duration_ms >= 0
+    assert client.get("/").headers["X-Request-ID"] != "req-1"
+
+
+def test_setup_starts_lazily_and_flushes_on_shutdown(tmp_path):
+    log_dir = tmp_path / "logs"
+    logging_config.setup_logging(log_dir=str(log_dir))
+    try:
+        logging.getLogger("bill_tracker.test").error("boom", extra={"request_id": "r9"})
+        assert logging_config.log_stats()["dropped"] == 0
+    finally:
+        logging_config.shutdown_logging()
+    entry = json.loads((log_dir / "error.log").read_text().splitlines()[-1])
+    assert (entry["message"], entry["request_id"], entry["level"]) == ("boom", "r9", "ERROR")
+    assert logging_config.log_stats() == {"enabled": False}
@@ -0,0 +1,62 @@
+"""Tests for the /metrics surface and query instrumentation."""
+import logging
+from sqlalchemy import select, text
+from backend import metrics
+from backend.models import Subscription
+from conftest import make_subscription
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        hist.observe(value, "/x")
+    lines = list(hist.render())
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{route="/x"} 4' in lines
+
+
+def test_requests_and_their_queries_are_recorded_per_route(client, async_session_factory):
+    metrics.instrument_engine(async_session_factory.kw["bind"].sync_engine)
+    route = "/subscriptions/{sub_id}"
+    before = metrics.REQUESTS.value("GET", route, "200")
+    queries_before = metrics.QUERIES_PER_REQUEST.count(route)
+    sub = make_subscription(client)
+    client.get(f"/subscriptions/{sub['id']}")
+    client.get("/subscriptions/999999")
+
+    assert metrics.REQUESTS.value("GET", route, "200") == before + 1
+    assert metrics.REQUESTS.value("GET", route, "404") >= 1
+    assert metrics.QUERIES_PER_REQUEST.count(route) == queries_before + 2
+    body = client.get("/metrics")
+    assert body.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/subscriptions/{sub_id}"' \
+        in body.text
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in body.text
+
+
+def test_repeated_selects_in_one_request_are_flagged(db_session_factory):
+    queries = metrics.RequestQueries()
+    token = metrics.current_queries.set(queries)
+    try:
+        with db_session_factory() as db:
+            for sub_id in range(metrics.N_PLUS_ONE_THRESHOLD):
+                db.execute(select(Subscription).where(Subscription.id == sub_id))
+            db.execute(select(Subscription.id))
+    finally:
+        metrics.current_queries.reset(token)
+    assert queries.count == metrics.N_PLUS_ONE_THRESHOLD + 1
+    [(statement, times)] = queries.repeated()
+    assert times == metrics.N_PLUS_ONE_THRESHOLD and "WHERE subscriptions.id" in statement
+
+
+def test_slow_queries_are_logged(db_session_factory, monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 1e-9)
+    before = metrics.SLOW_QUERIES.value("SELECT")
+    with caplog.at_level(logging.WARNING, logger="bill_tracker.db"):
+        with db_session_factory() as db:
+            db.execute(text("SELECT 1"))
+    assert metrics.SLOW_QUERIES.value("SELECT") == before + 1
+    record = next(r for r in caplog.records if r.name == "bill_tracker.db")
+    assert record.statement == "SELECT 1" and record.duration_ms >= 0
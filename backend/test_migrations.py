@@ -0,0 +1,108 @@
+"""Tests for upgrading databases created by earlier versions of the schema."""
+from datetime import date
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from backend import migrations, rollup
+from backend.database import init_db, make_engine
+from backend.models import Payment, Subscription, User
+
+# The first release's tables, plus the external_id the bulk importer added before accounts
+FIRST_RELEASE = [
+    """CREATE TABLE subscriptions (
+        id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(255) NOT NULL, amount FLOAT NOT NULL,
+        cycle VARCHAR(50) NOT NULL, next_due DATE NOT NULL, category VARCHAR(100) NOT NULL,
+        notes VARCHAR(500), external_id VARCHAR(255) UNIQUE,
+        created_at DATETIME, updated_at DATETIME)""",
+    "CREATE INDEX ix_subscriptions_name ON subscriptions (name)",
+    "CREATE INDEX ix_subscriptions_next_due ON subscriptions (next_due)",
+    """CREATE TABLE category_rollups (
+        category VARCHAR(100) NOT NULL PRIMARY KEY, monthly_total FLOAT NOT NULL,
+        annual_total FLOAT NOT NULL, count INTEGER NOT NULL)""",
+    """INSERT INTO subscriptions (id, name, amount, cycle, next_due, category, external_id)
+        VALUES (5, 'Netflix', 199, 'monthly', '2030-01-31', 'OTT', 'a'),
+               (9, 'Gym', 1200, 'annual', '2030-03-01', 'Fitness', NULL)""",
+    "INSERT INTO category_rollups VALUES ('OTT', 199, 2388, 1)",
+]
+
+
+def legacy_engine(tmp_path, statements):
+    engine = make_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+    return engine
+
+
+def test_first_release_rows_move_to_the_legacy_owner(tmp_path):
+    engine = legacy_engine(tmp_path, FIRST_RELEASE)
+    init_db(engine)
+    init_db(engine)  # a second run finds nothing to do
+
+    columns = {c["name"] for c in inspect(engine).get_columns("subscriptions")}
+    assert columns == set(Subscription.__table__.columns.keys())
+    indexes = {i["name"] for i in inspect(engine).get_indexes("subscriptions")}
+    assert indexes == {i.name for i in Subscription.__table__.indexes}
+    with Session(engine) as db:
+        owner = db.query(User).filter_by(email=migrations.LEGACY_OWNER_EMAIL).one()
+        rows = db.query(Subscription).order_by(Subscription.id).all()
+        assert [(s.id, s.owner_id, s.change_version, s.billing_day) for s in rows] == [
+            (5, owner.id, 0, None), (9, owner.id, 0, None),
+        ]
+        assert rows[0].next_due == date(2030, 1, 31)
+        rollup.ensure_built(db)
+        assert rollup.verify(db) == []
+        # The rebuilt table is indexed for search like a new one
+        matches = db.execute(text(
+            "SELECT rowid FROM subscription_search WHERE subscription_search MATCH 'gym'"
+        )).scalars().all()
+        assert matches == [9]
+    engine.dispose()
+
+
+def test_added_columns_and_indexes_are_applied_in_place(tmp_path):
+    engine = legacy_engine(tmp_path, [
+        "CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, email VARCHAR(255) NOT NULL "
+        "UNIQUE, hashed_password VARCHAR(255) NOT NULL, created_at DATETIME)",
+        """CREATE TABLE subscriptions (
+            id INTEGER NOT NULL PRIMARY KEY,
+            owner_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            name VARCHAR(255) NOT NULL, amount FLOAT NOT NULL, cycle VARCHAR(50) NOT NULL,
+            next_due DATE NOT NULL, category VARCHAR(100) NOT NULL, notes VARCHAR(500),
+            external_id VARCHAR(255), created_at DATETIME, updated_at DATETIME,
+            CONSTRAINT uq_subscriptions_owner_external_id UNIQUE (owner_id, external_id))""",
+        "INSERT INTO users (id, email, hashed_password) VALUES (3, 'me@example.com', '!')",
+        """INSERT INTO subscriptions (id, owner_id, name, amount, cycle, next_due, category)
+            VALUES (1, 3, 'Netflix', 199, 'monthly', '2030-01-31', 'OTT')""",
+    ])
+    init_db(engine)
+
+    indexes = {i["name"] for i in inspect(engine).get_indexes("subscriptions")}
+    assert "ix_subscriptions_owner_change_version" in indexes
+    with Session(engine) as db:
+        sub = db.get(Subscription, 1)
+        assert (sub.owner_id, sub.change_version, sub.billing_day) == (3, 0, None)
+        assert db.query(User).filter_by(email=migrations.LEGACY_OWNER_EMAIL).count() == 0
+    engine.dispose()
+
+
+def test_payments_left_by_deleted_subscriptions_are_dropped(tmp_path):
+    engine = legacy_engine(tmp_path, FIRST_RELEASE + [
+        """CREATE TABLE payments (
+            id INTEGER NOT NULL PRIMARY KEY, subscription_id INTEGER NOT NULL,
+            amount FLOAT NOT NULL, due_date DATE NOT NULL, recorded_at DATETIME,
+            CONSTRAINT uq_payments_subscription_due UNIQUE (subscription_id, due_date))""",
+        "UPDATE subscriptions SET created_at = '2030-02-01 00:00:00' WHERE id = 9",
+        # Netflix's own charge; one left by a deleted row 9 before Gym took its id; no row 4
+        """INSERT INTO payments (id, subscription_id, amount, due_date, recorded_at)
+            VALUES (1, 5, 199, '2030-01-31', '2030-02-01 01:00:00'),
+                   (2, 9, 50, '2029-12-01', '2029-12-02 01:00:00'),
+                   (3, 4, 80, '2029-12-01', '2029-12-02 01:00:00')""",
+    ])
+    init_db(engine)
+    init_db(engine)
+
+    with Session(engine) as db:
+        owner = db.query(User).filter_by(email=migrations.LEGACY_OWNER_EMAIL).one()
+        payments = db.query(Payment).all()
+        assert [(p.id, p.subscription_id, p.owner_id) for p in payments] == [(1, 5, owner.id)]
+    engine.dispose()
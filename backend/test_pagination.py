@@ -0,0 +1,64 @@
+"""Tests for keyset pagination and filtering on GET /subscriptions."""
+from datetime import date, timedelta
+from conftest import make_subscription
+
+
+def _seed(client, n=7):
+    start = date(2030, 1, 1)
+    for i in range(n):
+        make_subscription(
+            client,
+            name=f"Service {i}",
+            next_due=str(start + timedelta(days=i // 2)),
+            category="OTT" if i % 2 else "Utility",
+            cycle="monthly" if i % 3 else "annual",
+        )
+
+
+def test_pages_cover_every_row_once_in_order(client):
+    _seed(client)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/subscriptions", params=params).json()
+        assert len(page["items"]) <= 3
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    keys = [(s["next_due"], s["id"]) for s in seen]
+    assert keys == sorted(keys)
+    assert len({s["id"] for s in seen}) == 7
+
+
+def test_filters_are_applied_server_side(client):
+    _seed(client)
+    make_subscription(client, name="Spotify", category="OTT", next_due="2030-02-01")
+    page = client.get("/subscriptions", params={"category": "OTT"}).json()
+    assert {s["category"] for s in page["items"]} == {"OTT"}
+
+    page = client.get("/subscriptions", params={"cycle": "annual"}).json()
+    assert {s["cycle"] for s in page["items"]} == {"annual"}
+
+    page = client.get(
+        "/subscriptions", params={"due_from": "2030-01-02", "due_to": "2030-01-03"}
+    ).json()
+    assert all("2030-01-02" <= s["next_due"] <= "2030-01-03" for s in page["items"])
+    assert len(page["items"]) == 4
+
+    page = client.get("/subscriptions", params={"name_prefix": "Spot"}).json()
+    assert [s["name"] for s in page["items"]] == ["Spotify"]
+
+
+def test_name_prefix_matches_wildcards_literally(client):
+    make_subscription(client, name="100% Fit")
+    make_subscription(client, name="100 Mbps")
+    page = client.get("/subscriptions", params={"name_prefix": "100%"}).json()
+    assert [s["name"] for s in page["items"]] == ["100% Fit"]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/subscriptions", params={"cursor": "not-a-cursor!"})
+    assert response.status_code == 400
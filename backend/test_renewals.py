@@ -0,0 +1,95 @@
+"""Tests for the background renewal scheduler."""
+import asyncio
+from datetime import date
+from backend import renewals
+from backend.models import Lease, Payment, Subscription
+from conftest import make_subscription, sign_up
+
+
+def run(async_session_factory, today, **kwargs):
+    return asyncio.run(renewals.run_once(async_session_factory, today=today, **kwargs))
+
+
+def test_missed_dates_clamp_to_month_end_without_drift():
+    missed, upcoming = renewals.missed_dates(date(2024, 1, 31), "monthly", date(2024, 4, 1))
+    assert missed == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]
+    assert upcoming == date(2024, 4, 30)
+    assert renewals.missed_dates(date(2024, 2, 29), "annual", date(2025, 1, 1)) == (
+        [date(2024, 2, 29)], date(2025, 2, 28)
+    )
+    # From a clamped date, the anchor day picks the month back up
+    assert renewals.missed_dates(date(2024, 2, 29), "monthly", date(2024, 3, 1), 31) == (
+        [date(2024, 2, 29)], date(2024, 3, 31)
+    )
+
+
+def test_run_advances_overdue_rows_in_batches_and_is_idempotent(
+    client, async_session_factory, db_session_factory
+):
+    monthly = make_subscription(client, cycle="monthly", amount=10, next_due="2024-01-31")
+    annual = make_subscription(client, cycle="annual", amount=120, next_due="2023-06-01")
+    once = make_subscription(client, cycle="one-time", amount=5, next_due="2024-01-01")
+    current = make_subscription(client, cycle="monthly", next_due="2024-05-01")
+    etag = client.get("/subscriptions").headers["ETag"]
+
+    assert run(async_session_factory, date(2024, 4, 1), batch_size=1) == 2
+    assert run(async_session_factory, date(2024, 4, 1)) == 0
+
+    with db_session_factory() as db:
+        due = dict(db.query(Subscription.id, Subscription.next_due))
+        assert due[monthly["id"]] == date(2024, 4, 30)
+        assert due[annual["id"]] == date(2024, 6, 1)
+        assert due[once["id"]] == date(2024, 1, 1)
+        assert due[current["id"]] == date(2024, 5, 1)
+        assert db.query(Payment).count() == 4
+
+    history = client.get(f"/subscriptions/{monthly['id']}/payments").json()
+    assert [p["due_date"] for p in history] == ["2024-03-31", "2024-02-29", "2024-01-31"]
+    assert client.get("/subscriptions", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_billing_day_survives_a_clamped_month(client, async_session_factory, db_session_factory):
+    sub = make_subscription(client, cycle="monthly", next_due="2024-01-31")
+    for today in (date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)):
+        assert run(async_session_factory, today) == 1
+    with db_session_factory() as db:
+        row = db.get(Subscription, sub["id"])
+        assert (row.next_due, row.billing_day) == (date(2024, 4, 30), 31)
+
+    # A due date set by hand is the new anchor
+    client.put(f"/subscriptions/{sub['id']}", json={"next_due": "2024-05-15"})
+    with db_session_factory() as db:
+        assert db.get(Subscription, sub["id"]).billing_day is None
+
+
+def test_a_reused_id_does_not_inherit_payment_history(
+    client, async_session_factory, db_session_factory
+):
+    gone = make_subscription(client, cycle="monthly", next_due="2024-01-31")
+    run(async_session_factory, date(2024, 4, 1))
+    assert client.delete(f"/subscriptions/{gone['id']}").status_code == 200
+    with db_session_factory() as db:
+        assert db.query(Payment).count() == 0
+
+    _, other = sign_up(db_session_factory, "other@example.com")
+    reused = client.post("/subscriptions", headers=other, json={
+        "name": "Gym", "amount": 10, "cycle": "monthly", "next_due": "2030-01-01",
+        "category": "Fitness",
+    }).json()
+    assert reused["id"] == gone["id"]  # SQLite hands the freed id out again
+    assert client.get(f"/subscriptions/{reused['id']}/payments", headers=other).json() == []
+
+
+def test_lease_keeps_a_second_worker_out(async_session_factory, db_session_factory):
+    with db_session_factory() as db:
+        assert renewals.acquire_lease(db, holder="worker-a", ttl=60)
+        assert not renewals.acquire_lease(db, holder="worker-b", ttl=60)
+        assert renewals.acquire_lease(db, holder="worker-a", ttl=60)
+        db.commit()
+
+    assert run(async_session_factory, date(2030, 1, 1), holder="worker-b") == 0
+    with db_session_factory() as db:
+        renewals.release_lease(db, holder="worker-a")
+        db.commit()
+        assert renewals.acquire_lease(db, holder="worker-b", ttl=60)
+        assert db.get(Lease, renewals.LEASE_NAME).holder == "worker-b"
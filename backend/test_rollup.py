@@ -0,0 +1,50 @@
+"""Tests for the incrementally maintained category rollup."""
+import pytest
+from sqlalchemy import select
+from backend import rollup
+from backend.models import CategoryRollup
+from conftest import make_subscription
+
+
+def _stored(db_session_factory):
+    with db_session_factory() as db:
+        return {
+            r.category: (pytest.approx(r.monthly_total), pytest.approx(r.annual_total), r.count)
+            for r in db.scalars(select(CategoryRollup))
+        }
+
+
+def test_writes_keep_rollup_in_step(client, db_session_factory):
+    netflix = make_subscription(client, name="Netflix", amount=199, category="OTT")
+    make_subscription(client, name="Prime", amount=1200, cycle="annual", category="OTT")
+    power = make_subscription(client, name="Power", amount=800, category="Utility")
+    assert _stored(db_session_factory) == {
+        "OTT": (299.0, 3588.0, 2),
+        "Utility": (800.0, 9600.0, 1),
+    }
+
+    client.put(f"/subscriptions/{netflix['id']}", json={"amount": 249, "category": "Streaming"})
+    client.delete(f"/subscriptions/{power['id']}")
+    assert _stored(db_session_factory) == {
+        "OTT": (100.0, 1200.0, 1),
+        "Streaming": (249.0, 2988.0, 1),
+    }
+    with db_session_factory() as db:
+        assert rollup.verify(db) == []
+
+
+def test_verify_detects_and_rebuild_repairs_drift(client, db_session_factory, owner):
+    make_subscription(client, name="Netflix", amount=199, category="OTT")
+    with db_session_factory() as db:
+        db.get(CategoryRollup, (owner[0], "OTT")).monthly_total = 1.0
+        db.commit()
+        assert len(rollup.verify(db)) == 1
+        assert rollup.rebuild(db) == 1
+        assert rollup.verify(db) == []
+
+
+def test_insight_reads_category_total_from_rollup(client):
+    sub = make_subscription(client, name="Netflix", amount=199, category="OTT")
+    make_subscription(client, name="Prime", amount=1200, cycle="annual", category="OTT")
+    body = client.get(f"/insights/{sub['id']}").json()
+    assert body["insight"].startswith("You spend 299.00 on OTT.")
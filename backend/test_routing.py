@@ -0,0 +1,83 @@
+"""Tests for read-replica routing and read-your-writes pinning."""
+from datetime import date
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from backend.cache import LRUCache, get_cache
+from backend.database import Base, make_engine, to_async_url
+from backend.main import app
+from backend.models import Subscription
+from backend.routing import LAST_WRITE_COOKIE, ReadRouter, get_read_router
+from conftest import make_subscription
+
+
+def _replica(path, name, owner_id):
+    """A separate SQLite file standing in for a replica, holding one marker row."""
+    url = f"sqlite:///{path}"
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Subscription.__table__.insert(), {
+            "name": name, "amount": 1.0, "cycle": "monthly",
+            "next_due": date(2030, 1, 1), "category": "OTT", "owner_id": owner_id,
+        })
+    engine.dispose()
+    return async_sessionmaker(
+        bind=create_async_engine(to_async_url(url), poolclass=NullPool), expire_on_commit=False
+    )
+
+
+@pytest.fixture
+def routed(client, async_session_factory, owner, tmp_path):
+    router = ReadRouter(async_session_factory, {
+        "replica1": _replica(tmp_path / "r1.db", "from replica1", owner[0]),
+        "replica2": _replica(tmp_path / "r2.db", "from replica2", owner[0]),
+    })
+    app.dependency_overrides[get_read_router] = lambda: router
+    app.dependency_overrides[get_cache] = lambda: LRUCache(ttl=0)  # observe routing, not the cache
+    return client, router
+
+
+def _names(client):
+    return [s["name"] for s in client.get("/subscriptions").json()["items"]]
+
+
+def test_reads_round_robin_across_replicas(routed):
+    client, _ = routed
+    seen = {_names(client)[0] for _ in range(4)}
+    assert seen == {"from replica1", "from replica2"}
+
+
+def test_client_reads_its_own_write_from_primary(routed):
+    client, _ = routed
+    make_subscription(client, name="Fresh")
+    assert LAST_WRITE_COOKIE in client.cookies
+    assert _names(client) == ["Fresh"]
+
+    client.cookies.clear()
+    assert _names(client) != ["Fresh"]
+
+
+def test_issuing_an_export_token_does_not_pin_reads_to_the_primary(routed):
+    client, _ = routed
+    assert client.post("/subscriptions/export/token").status_code == 200
+    assert LAST_WRITE_COOKIE not in client.cookies
+
+
+def test_unreachable_replica_is_skipped_and_marked_down(routed, tmp_path):
+    client, router = routed
+    router.replicas["replica2"] = async_sessionmaker(bind=create_async_engine(
+        to_async_url(f"sqlite:///{tmp_path}/missing/dir/r2.db"), poolclass=NullPool
+    ))
+    assert {_names(client)[0] for _ in range(4)} == {"from replica1"}
+    assert router.candidates() == ["replica1"]
+    assert router.stats()["replica2"]["healthy"] is False
+
+
+def test_all_replicas_down_falls_back_to_primary(routed):
+    client, router = routed
+    make_subscription(client, name="Primary row")
+    client.cookies.clear()
+    for name in router.replicas:
+        router.mark_down(name)
+    assert _names(client) == ["Primary row"]
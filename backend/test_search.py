@@ -0,0 +1,67 @@
+"""Tests for GET /subscriptions/search and the index its writes maintain."""
+from backend import search
+from conftest import make_subscription, sign_up
+
+
+def names(client, q, **params):
+    response = client.get("/subscriptions/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [(hit["name"], hit["match"]) for hit in response.json()["items"]]
+
+
+def test_prefix_matches_rank_name_above_category_and_notes(client):
+    make_subscription(client, name="Cloud backup", category="Storage", notes="netflix gift card")
+    make_subscription(client, name="Spotify", category="Music")
+    make_subscription(client, name="Netflix Premium", category="OTT")
+    make_subscription(client, name="Disney", category="Netcasts")
+    assert names(client, "net") == [
+        ("Netflix Premium", "prefix"), ("Disney", "prefix"), ("Cloud backup", "prefix"),
+    ]
+    assert names(client, "netflix prem") == [("Netflix Premium", "prefix")]
+    assert names(client, "  ") == []
+
+
+def test_typos_fall_back_to_trigram_matches(client):
+    make_subscription(client, name="Netflix", category="OTT")
+    make_subscription(client, name="Spotify", category="Music")
+    assert names(client, "netflx") == [("Netflix", "fuzzy")]
+    assert names(client, "spotfy musc") == [("Spotify", "fuzzy")]
+    assert names(client, "zzzz") == []
+
+
+def test_writes_keep_the_index_current(client):
+    sub = make_subscription(client, name="Gym", category="Fitness")
+    client.put(f"/subscriptions/{sub['id']}", json={"name": "Yoga studio"})
+    assert names(client, "gym") == []
+    assert names(client, "yoga") == [("Yoga studio", "prefix")]
+    client.post("/subscriptions/bulk", json=[
+        {"name": "Yoga mat rental", "amount": 3, "cycle": "monthly", "next_due": "2030-01-01",
+         "category": "Fitness"},
+    ])
+    assert len(names(client, "yoga")) == 2
+    client.delete(f"/subscriptions/{sub['id']}")
+    assert names(client, "studio") == []
+
+
+def test_search_only_sees_the_callers_rows(client, db_session_factory):
+    make_subscription(client, name="Netflix")
+    _, other = sign_up(db_session_factory, "other@example.com")
+    for q in ("netflix", "netflx"):
+        response = client.get("/subscriptions/search", params={"q": q}, headers=other)
+        assert response.json()["items"] == []
+
+
+def test_existing_rows_are_indexed_once(client, db_session_factory):
+    make_subscription(client, name="Netflix")
+    with db_session_factory() as db:
+        db.connection().exec_driver_sql("DROP TABLE subscription_search")
+        db.commit()
+        search.ensure_index(db)
+        search.ensure_index(db)
+    assert names(client, "netf") == [("Netflix", "prefix")]
+
+
+def test_similarity_matches_pg_trgm_word_trigrams():
+    assert search.word_trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert search.similarity(["netflx"], "Netflix Premium") == 0.5
+    assert search.similarity(["netflix"], "Netflix") == 1.0
@@ -0,0 +1,40 @@
+"""Tests for the SQL-side monthly summary."""
+import pytest
+from conftest import make_subscription
+
+
+@pytest.fixture
+def seeded(client):
+    make_subscription(client, name="Netflix", amount=199, cycle="monthly",
+                      category="OTT", next_due="2030-01-10")
+    make_subscription(client, name="Prime", amount=1200, cycle="annual",
+                      category="OTT", next_due="2030-02-01")
+    make_subscription(client, name="Laptop", amount=5000, cycle="one-time",
+                      category="Other", next_due="2030-01-20")
+    make_subscription(client, name="Power", amount=800, cycle="monthly",
+                      category="Utility", next_due="2030-01-05")
+    return client
+
+
+def test_summary_normalizes_cycles_in_sql(seeded):
+    body = seeded.get("/subscriptions/summary/monthly").json()
+    assert body["by_category"] == {"OTT": pytest.approx(299.0), "Other": 0.0, "Utility": 800.0}
+    assert body["total_monthly"] == pytest.approx(1099.0)
+    assert body["count"] == 4
+    assert "groups" not in body
+
+
+def test_summary_groups_by_requested_dimensions(seeded):
+    body = seeded.get(
+        "/subscriptions/summary/monthly", params=[("group_by", "due_month"), ("group_by", "cycle")]
+    ).json()
+    groups = {(g["due_month"], g["cycle"]): g for g in body["groups"]}
+    assert groups[("2030-01", "monthly")]["monthly_total"] == pytest.approx(999.0)
+    assert groups[("2030-01", "monthly")]["count"] == 2
+    assert groups[("2030-02", "annual")]["monthly_total"] == pytest.approx(100.0)
+    assert groups[("2030-01", "one-time")]["monthly_total"] == 0.0
+
+
+def test_summary_rejects_unknown_dimension(client):
+    response = client.get("/subscriptions/summary/monthly", params={"group_by": "owner"})
+    assert response.status_code == 400
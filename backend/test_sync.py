@@ -0,0 +1,73 @@
+"""Tests for delta sync: change versions, tombstones and GET /subscriptions/changes."""
+import asyncio
+from backend import renewals
+from backend.models import SubscriptionTombstone
+from conftest import make_subscription, sign_up
+
+
+def changes(client, since, **params):
+    response = client.get("/subscriptions/changes", params={"since": since, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_changes_since_a_version_cover_only_later_writes(client, db_session_factory):
+    first = make_subscription(client, name="First")
+    second = make_subscription(client, name="Second")
+    full = changes(client, 0)
+    assert [s["name"] for s in full["changed"]] == ["First", "Second"]
+    assert full["version"] == second["change_version"] == 2
+    assert not full["has_more"] and not full["reset"]
+
+    client.put(f"/subscriptions/{first['id']}", json={"amount": 5})
+    client.delete(f"/subscriptions/{second['id']}")
+    delta = changes(client, full["version"])
+    assert [(s["id"], s["amount"]) for s in delta["changed"]] == [(first["id"], 5)]
+    assert delta["deleted"] == [second["id"]]
+    assert delta["version"] == 4
+    assert changes(client, 4) == {
+        "version": 4, "has_more": False, "reset": False, "changed": [], "deleted": [],
+    }
+    with db_session_factory() as db:
+        assert db.get(SubscriptionTombstone, second["id"]).change_version == 4
+
+
+def test_unchanged_since_revalidates_with_304(client):
+    make_subscription(client)
+    response = client.get("/subscriptions/changes", params={"since": 1})
+    again = client.get("/subscriptions/changes", params={"since": 1},
+                       headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_pages_never_split_a_version(client):
+    for i in range(3):
+        make_subscription(client, name=f"One {i}")
+    client.post("/subscriptions/bulk", json=[
+        {"name": f"Bulk {i}", "amount": 1, "cycle": "monthly", "next_due": "2030-01-01",
+         "category": "OTT"} for i in range(3)
+    ])
+    page = changes(client, 0, limit=2)
+    assert [s["name"] for s in page["changed"]] == ["One 0", "One 1"]
+    assert page["has_more"] and page["version"] == 2
+    page = changes(client, 2, limit=2)
+    # The bulk import is one version bigger than the page: it arrives whole
+    assert [s["name"] for s in page["changed"]] == ["One 2"]
+    page = changes(client, 3, limit=2)
+    assert [s["name"] for s in page["changed"]] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert page["version"] == 4 and page["has_more"]
+    assert changes(client, 4, limit=2)["has_more"] is False
+
+
+def test_renewals_and_other_owners(client, db_session_factory, async_session_factory):
+    sub = make_subscription(client, next_due="2024-01-31")
+    asyncio.run(renewals.run_once(async_session_factory))
+    delta = changes(client, 1)
+    assert [s["id"] for s in delta["changed"]] == [sub["id"]]
+    assert delta["changed"][0]["next_due"] > "2024-01-31"
+
+    _, other = sign_up(db_session_factory, "other@example.com")
+    theirs = client.get("/subscriptions/changes", params={"since": 0}, headers=other).json()
+    assert theirs["changed"] == [] and theirs["version"] == 0
+    ahead = client.get("/subscriptions/changes", params={"since": 9}, headers=other).json()
+    assert ahead["reset"] and ahead["version"] == 0
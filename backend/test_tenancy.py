@@ -0,0 +1,56 @@
+"""Tests for per-owner scoping of every subscription endpoint."""
+from conftest import make_subscription, sign_up
+
+
+def test_requests_without_a_valid_token_are_rejected(client):
+    for headers in ({"Authorization": ""}, {"Authorization": "Bearer not-a-jwt"}):
+        response = client.get("/subscriptions", headers=headers)
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_register_then_sign_in(client):
+    credentials = {"email": "New@Example.com", "password": "hunter22"}
+    user = client.post("/auth/register", json=credentials).json()
+    assert user["email"] == "new@example.com"
+    assert client.post("/auth/register", json=credentials).status_code == 409
+
+    assert client.post(
+        "/auth/token", json={**credentials, "password": "wrong"}
+    ).status_code == 401
+    token = client.post("/auth/token", json=credentials).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    make_subscription(client)
+    assert client.get("/subscriptions", headers=headers).json()["items"] == []
+
+
+def test_owners_cannot_see_or_change_each_others_rows(client, db_session_factory):
+    mine = make_subscription(client, name="Mine", amount=100)
+    _, other = sign_up(db_session_factory, "other@example.com")
+    theirs = client.post("/subscriptions", headers=other, json={
+        "name": "Theirs", "amount": 50, "cycle": "monthly",
+        "next_due": "2030-01-15", "category": "OTT",
+    }).json()
+
+    assert [s["name"] for s in client.get("/subscriptions").json()["items"]] == ["Mine"]
+    assert client.get("/subscriptions/summary/monthly").json()["total_monthly"] == 100
+    assert client.get(
+        "/subscriptions/summary/monthly", headers=other
+    ).json()["by_category"] == {"OTT": 50}
+    for method in ("get", "delete"):
+        assert getattr(client, method)(f"/subscriptions/{theirs['id']}").status_code == 404
+    assert client.put(f"/subscriptions/{theirs['id']}", json={"amount": 1}).status_code == 404
+    assert client.get(f"/insights/{theirs['id']}").status_code == 404
+    assert client.get(f"/subscriptions/{mine['id']}", headers=other).status_code == 404
+
+
+def test_one_owners_writes_keep_anothers_etags(client, db_session_factory):
+    make_subscription(client)
+    etag = client.get("/subscriptions").headers["ETag"]
+    _, other = sign_up(db_session_factory, "other@example.com")
+    client.post(
+        "/subscriptions/bulk", headers=other,
+        json=[{"name": "Gym", "amount": 10, "cycle": "monthly", "next_due": "2030-01-01",
+               "category": "Fitness"}],
+    )
+    assert client.get("/subscriptions", headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,67 @@
+"""Table change counters and strong ETags for conditional GETs.
+
+Every write transaction bumps the owner's `subscriptions:<owner_id>`
+counter. Collection responses take their ETag from (counter, request key),
+single rows from (id, updated_at), so a client's If-None-Match can be
+answered with 304 before anything is serialized, and one tenant's writes
+never invalidate another's.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend.models import Subscription, TableVersion
+from backend.rollup import dialect_insert
+
+SUBSCRIPTIONS = "subscriptions"
+
+
+def scope(owner_id: int, table: str = SUBSCRIPTIONS) -> str:
+    return f"{table}:{owner_id}"
+
+
+def bump(db: Session, table: str) -> int:
+    """Increment and return the table's version inside the current transaction."""
+    stmt = dialect_insert(db)(TableVersion).values(name=table, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableVersion.name],
+        set_={"version": TableVersion.version + 1},
+    ).returning(TableVersion.version)
+    return db.execute(stmt).scalar_one()
+
+
+async def current(db: AsyncSession, table: str) -> int:
+    version = await db.scalar(select(TableVersion.version).where(TableVersion.name == table))
+    return version or 0
+
+
+def collection_etag(version: int, key: str) -> str:
+    digest = hashlib.sha1(f"{version}:{key}".encode()).hexdigest()[:20]
+    return f'"{version}-{digest}"'
+
+
+def row_etag(sub: Subscription) -> str:
+    stamp = sub.updated_at.strftime("%Y%m%d%H%M%S%f") if sub.updated_at else "0"
+    return f'"{sub.id}-{stamp}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 specifies for this header)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def check(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client already holds `etag`, else None."""
+    return not_modified(etag) if matches(request, etag) else None
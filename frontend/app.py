@@ -1,11 +1,52 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import date, timedelta
 import json
+import time
 
 API_URL = "http://localhost:8000"
+PAGE_SIZE = 50
+ETAG_CACHE_SIZE = 64
+REMINDER_DAYS = 7
+HTTP_POOL_SIZE = 4
+EXPORT_LINK_MARGIN = 30  # seconds: stop showing links this close to their token's expiry
+
+def get_json(path, params=None):
+    """GET a backend resource, revalidating the session's last copy with If-None-Match."""
+    url = requests.Request("GET", f"{API_URL}{path}", params=params).prepare().url
+    cache = st.session_state.etag_cache
+    cached = cache.get(url)
+    resp = http.get(url, headers={"If-None-Match": cached[0]} if cached else {})
+    if resp.status_code == 304 and cached:
+        return cached[1]
+    resp.raise_for_status()
+    body = resp.json()
+    if "ETag" in resp.headers:
+        cache.pop(url, None)
+        cache[url] = (resp.headers["ETag"], body)
+        if len(cache) > ETAG_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+    return body
+
+def forget_rejected_token(resp, *args, **kwargs):
+    """Response hook: a 401 to a signed-in request means the token expired, so sign out."""
+    if resp.status_code == 401 and "Authorization" in resp.request.headers:
+        st.session_state.http.headers.pop("Authorization", None)
+        st.session_state.etag_cache.clear()
+        st.session_state.page_cursors = [None]
+        st.session_state.pop("export_token", None)
+        st.session_state.session_expired = True
+
+def fetch_page(cursor=None, **filters):
+    """Fetch one page of subscriptions; returns (items, next_cursor)."""
+    params = {"limit": PAGE_SIZE, **{k: v for k, v in filters.items() if v}}
+    if cursor:
+        params["cursor"] = cursor
+    page = get_json("/subscriptions", params)
+    return page["items"], page["next_cursor"]
 
 st.set_page_config(
     page_title="Bill Subscription Tracker",
@@ -14,9 +55,57 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# One HTTP session per browser session: keeps the backend's read-your-writes cookie and
+# reuses its keep-alive connections across reruns
+if "http" not in st.session_state:
+    st.session_state.http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+    st.session_state.http.mount("http://", adapter)
+    st.session_state.http.mount("https://", adapter)
+    st.session_state.http.hooks["response"].append(forget_rejected_token)
+    st.session_state.etag_cache = {}
+http = st.session_state.http
+
 st.title(" Bill & Subscription Tracker")
 st.markdown("*Track recurring payments, visualize spending, and never miss a renewal*")
 
+# Every subscription endpoint is per user: sign in once, then the session sends the token
+if "Authorization" not in http.headers:
+    if st.session_state.pop("session_expired", False):
+        st.info("Your session has expired. Please sign in again.")
+    with st.form("sign_in"):
+        email = st.text_input("Email")
+        password = st.text_input("Password", type="password")
+        col1, col2 = st.columns(2)
+        sign_in = col1.form_submit_button("Sign in")
+        register = col2.form_submit_button("Create account")
+    if sign_in or register:
+        credentials = {"email": email, "password": password}
+        resp = http.post(f"{API_URL}/auth/register", json=credentials) if register else None
+        if resp is not None and resp.status_code != 200:
+            st.error(resp.json().get("detail", "Could not create account"))
+        else:
+            resp = http.post(f"{API_URL}/auth/token", json=credentials)
+            if resp.status_code == 200:
+                http.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+                st.rerun()
+            st.error("Incorrect email or password")
+    st.stop()
+
+# One backend round trip per rerun: totals, due buckets and the current page together.
+# Cursor stack: the last entry is the cursor of the page being shown
+if "page_cursors" not in st.session_state:
+    st.session_state.page_cursors = [None]
+try:
+    dashboard = get_json("/dashboard", {
+        "soon_days": REMINDER_DAYS, "limit": PAGE_SIZE,
+        "cursor": st.session_state.page_cursors[-1],
+    })
+except requests.RequestException:
+    dashboard = None
+if "Authorization" not in http.headers:
+    st.rerun()  # the token was rejected: back to the sign-in form
+
 with st.sidebar:
     st.header("Navigation")
     page = st.radio(
@@ -25,44 +114,38 @@ with st.sidebar:
     )
     st.markdown("---")
     st.markdown("### Quick Stats")
-    try:
-        resp = requests.get(f"{API_URL}/subscriptions")
-        if resp.status_code == 200:
-            subs = resp.json()
-            st.metric("Total Subscriptions", len(subs))
-            total_monthly = sum(s["amount"] if s["cycle"] == "monthly" else s["amount"]/12 for s in subs)
-            st.metric("Monthly Cost", f"${total_monthly:.2f}")
-    except:
+    if dashboard:
+        st.metric("Total Subscriptions", dashboard["count"])
+        st.metric("Monthly Cost", f"${dashboard['total_monthly']:.2f}")
+    else:
         st.warning("Backend not reachable")
 
 if page == "Dashboard":
     col1, col2, col3 = st.columns(3)
-    try:
-        resp = requests.get(f"{API_URL}/subscriptions/due/today")
-        data = resp.json()
-        col1.metric("Due Today", data["count"], ":red" if data["count"] > 0 else ":green")
-    except:
-        col1.metric("Due Today", "0")
-    try:
-        resp = requests.get(f"{API_URL}/subscriptions/due/soon?days=3")
-        data = resp.json()
-        col2.metric("Due in 3 Days", data["count"], ":orange" if data["count"] > 0 else ":green")
-    except:
-        col2.metric("Due in 3 Days", "0")
-    try:
-        resp = requests.get(f"{API_URL}/subscriptions")
-        subs = resp.json()
-        col3.metric("Total Subscriptions", len(subs))
-    except:
-        col3.metric("Total Subscriptions", "0")
+    if dashboard:
+        due_today = dashboard["due_today"]["count"]
+        horizon = str(date.today() + timedelta(days=3))
+        due_3 = sum(s["next_due"] <= horizon for s in dashboard["due_soon"]["subscriptions"])
+        col1.metric("Due Today", due_today, ":red" if due_today > 0 else ":green")
+        col2.metric("Due in 3 Days", due_3, ":orange" if due_3 > 0 else ":green")
+        col3.metric("Total Subscriptions", dashboard["count"])
+    else:
+        for col, label in zip((col1, col2, col3), ("Due Today", "Due in 3 Days", "Total Subscriptions")):
+            col.metric(label, "0")
     st.markdown("---")
     st.subheader("All Subscriptions")
     try:
-        resp = requests.get(f"{API_URL}/subscriptions")
-        subs = resp.json()
+        subs, next_cursor = dashboard["page"]["items"], dashboard["page"]["next_cursor"]
         if subs:
             df = pd.DataFrame(subs)
             st.dataframe(df, use_container_width=True)
+            prev_col, next_col = st.columns(2)
+            if len(st.session_state.page_cursors) > 1 and prev_col.button("Previous page"):
+                st.session_state.page_cursors.pop()
+                st.rerun()
+            if next_cursor and next_col.button("Next page"):
+                st.session_state.page_cursors.append(next_cursor)
+                st.rerun()
         else:
             st.info("No subscriptions yet. Add one to get started!")
     except:
@@ -88,7 +171,7 @@ elif page == "Add Subscription":
                     "category": category,
                     "notes": notes
                 }
-                resp = requests.post(f"{API_URL}/subscriptions", json=payload)
+                resp = http.post(f"{API_URL}/subscriptions", json=payload)
                 if resp.status_code == 200:
                     st.success("Subscription added successfully!")
                 else:
@@ -98,9 +181,13 @@ elif page == "Add Subscription":
 
 elif page == "Manage":
     st.subheader("Manage Subscriptions")
+    search = st.text_input("Search", placeholder="Name, category or notes...")
     try:
-        resp = requests.get(f"{API_URL}/subscriptions")
-        subs = resp.json()
+        if search.strip():
+            found = get_json("/subscriptions/search", {"q": search.strip(), "limit": PAGE_SIZE})
+            subs = found["items"]
+        else:
+            subs, _ = fetch_page()
         if subs:
             selected = st.selectbox("Select subscription to edit/delete:", [s["name"] for s in subs])
             sub = next((s for s in subs if s["name"] == selected), None)
@@ -108,7 +195,7 @@ elif page == "Manage":
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("Delete"):
-                        resp = requests.delete(f"{API_URL}/subscriptions/{sub['id']}")
+                        resp = http.delete(f"{API_URL}/subscriptions/{sub['id']}")
                         if resp.status_code == 200:
                             st.success("Deleted!")
                         else:
@@ -123,10 +210,8 @@ elif page == "Manage":
 elif page == "Analytics":
     st.subheader("Spending Analytics")
     try:
-        resp = requests.get(f"{API_URL}/subscriptions/summary/monthly")
-        summary = resp.json()
-        fig = go.Figure(data=[go.Pie(labels=list(summary["by_category"].keys()), values=list(summary["by_category"].values()))])
-        fig.update_layout(title=f"Monthly Spending by Category (Total: ${summary['total_monthly']:.2f})")
+        fig = go.Figure(data=[go.Pie(labels=list(dashboard["by_category"].keys()), values=list(dashboard["by_category"].values()))])
+        fig.update_layout(title=f"Monthly Spending by Category (Total: ${dashboard['total_monthly']:.2f})")
         st.plotly_chart(fig, use_container_width=True)
     except:
         st.error("Failed to fetch analytics")
@@ -134,15 +219,13 @@ elif page == "Analytics":
 elif page == "Reminders":
     st.subheader("Renewal Reminders")
     try:
-        resp = requests.get(f"{API_URL}/subscriptions/due/today")
-        today_data = resp.json()
+        today_data = dashboard["due_today"]
         st.warning(f"⚠️ Due Today: {today_data['count']} subscriptions")
         if today_data["subscriptions"]:
             for sub in today_data["subscriptions"]:
                 st.info(f"{sub['name']} - ${sub['amount']} ({sub['cycle']})")
-        resp = requests.get(f"{API_URL}/subscriptions/due/soon?days=7")
-        soon_data = resp.json()
-        st.info(f"📅 Due in Next 7 Days: {soon_data['count']} subscriptions")
+        soon_data = dashboard["due_soon"]
+        st.info(f"📅 Due in Next {REMINDER_DAYS} Days: {soon_data['count']} subscriptions")
         if soon_data["subscriptions"]:
             for sub in soon_data["subscriptions"]:
                 st.success(f"{sub['name']} - {sub['next_due']}")
@@ -151,17 +234,35 @@ elif page == "Reminders":
 
 elif page == "Export":
     st.subheader("Export Data")
-    try:
-        resp = requests.get(f"{API_URL}/subscriptions")
-        subs = resp.json()
-        if subs:
-            df = pd.DataFrame(subs)
-            csv = df.to_csv(index=False)
-            st.download_button("Download CSV", csv, "subscriptions.csv", "text/csv")
-        else:
-            st.info("No data to export")
-    except:
-        st.error("Failed to export data")
+    # The backend streams the file straight to the browser; nothing is buffered here.
+    # A link can't send the Authorization header, so it carries a short-lived export token,
+    # issued on request and reused until it expires rather than on every rerun
+    issued = st.session_state.get("export_token")
+    if issued and issued["expires_at"] - EXPORT_LINK_MARGIN <= time.time():
+        del st.session_state.export_token
+        issued = None
+    if not issued and st.button("Prepare download links"):
+        try:
+            resp = http.post(f"{API_URL}/subscriptions/export/token")
+            resp.raise_for_status()
+            body = resp.json()
+            issued = {"token": body["token"], "expires_at": time.time() + body["expires_in"]}
+            st.session_state.export_token = issued
+        except requests.RequestException:
+            st.error("Failed to prepare export links")
+        if "Authorization" not in http.headers:
+            st.rerun()
+    if issued:
+        export_url = f"{API_URL}/subscriptions/export"
+        for label, params in (
+            ("Download CSV", {"format": "csv"}),
+            ("Download NDJSON", {"format": "ndjson"}),
+            ("Download CSV (gzip)", {"format": "csv", "gzip": "true"}),
+        ):
+            link = {**params, "token": issued["token"]}
+            st.link_button(label, requests.Request("GET", export_url, params=link).prepare().url)
+        minutes = max(1, int(issued["expires_at"] - time.time() - EXPORT_LINK_MARGIN) // 60)
+        st.caption(f"Links expire in about {minutes} minutes; prepare new ones after that.")
 
 st.markdown("---")
 st.caption("Bill Subscription Tracker | Track smart, pay smart")
@@ -3,7 +3,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import date, timedelta, datetime
+import io
 import json
+from tracker.analytics import analytics
+from tracker.storage import TRACKER_STORAGE, SyncedStore, open_storage
 
 # Page config
 st.set_page_config(
@@ -54,112 +57,115 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state with better sample data
-if 'subscriptions' not in st.session_state:
-    st.session_state.subscriptions = [
-        {
-            "id": 1, 
-            "name": "Netflix", 
-            "amount": 199, 
-            "cycle": "monthly", 
-            "next_due": str(date.today() + timedelta(days=2)), 
-            "category": "OTT", 
-            "notes": "Premium HD plan",
-            "created_at": str(datetime.now())
-        },
-        {
-            "id": 2, 
-            "name": "Spotify Premium", 
-            "amount": 119, 
-            "cycle": "monthly", 
-            "next_due": str(date.today() + timedelta(days=5)), 
-            "category": "OTT", 
-            "notes": "Music streaming",
-            "created_at": str(datetime.now())
-        },
-        {
-            "id": 3, 
-            "name": "Amazon Prime", 
-            "amount": 1499, 
-            "cycle": "annual", 
-            "next_due": str(date.today() + timedelta(days=30)), 
-            "category": "OTT", 
-            "notes": "Annual membership",
-            "created_at": str(datetime.now())
-        },
-        {
-            "id": 4, 
-            "name": "Mobile Recharge", 
-            "amount": 399, 
-            "cycle": "monthly", 
-            "next_due": str(date.today()), 
-            "category": "Recharge", 
-            "notes": "Jio plan",
-            "created_at": str(datetime.now())
-        },
-    ]
+# Sample data for TRACKER_STORAGE=memory
+SAMPLE_SUBSCRIPTIONS = [
+    {
+        "id": 1, 
+        "name": "Netflix", 
+        "amount": 199, 
+        "cycle": "monthly", 
+        "next_due": str(date.today() + timedelta(days=2)), 
+        "category": "OTT", 
+        "notes": "Premium HD plan",
+        "created_at": str(datetime.now())
+    },
+    {
+        "id": 2, 
+        "name": "Spotify Premium", 
+        "amount": 119, 
+        "cycle": "monthly", 
+        "next_due": str(date.today() + timedelta(days=5)), 
+        "category": "OTT", 
+        "notes": "Music streaming",
+        "created_at": str(datetime.now())
+    },
+    {
+        "id": 3, 
+        "name": "Amazon Prime", 
+        "amount": 1499, 
+        "cycle": "annual", 
+        "next_due": str(date.today() + timedelta(days=30)), 
+        "category": "OTT", 
+        "notes": "Annual membership",
+        "created_at": str(datetime.now())
+    },
+    {
+        "id": 4, 
+        "name": "Mobile Recharge", 
+        "amount": 399, 
+        "cycle": "monthly", 
+        "next_due": str(date.today()), 
+        "category": "Recharge", 
+        "notes": "Jio plan",
+        "created_at": str(datetime.now())
+    },
+]
 
-if 'next_id' not in st.session_state:
-    st.session_state.next_id = 5
+@st.cache_resource
+def shared_store(spec):
+    """Load persisted subscriptions once per server process; every session shares them"""
+    return SyncedStore(open_storage(spec))
+
+if TRACKER_STORAGE == "memory":
+    if 'synced' not in st.session_state:
+        st.session_state.synced = SyncedStore(open_storage("memory", seed=SAMPLE_SUBSCRIPTIONS))
+    synced = st.session_state.synced
+else:
+    synced = shared_store(TRACKER_STORAGE)
+
+# Typed columns plus a due-date index; writes go through `synced` so storage sees them too.
+# This rerun's snapshot: reloaded if the API changed the rows, never mutated by other sessions
+store = synced.refresh()
 
 # Helper functions
-def calculate_monthly_cost(amount, cycle):
-    """Convert any subscription to monthly cost"""
-    if cycle == "monthly":
-        return amount
-    elif cycle == "annual":
-        return amount / 12
-    else:  # one-time
-        return 0
+def subscriptions_to_csv(store):
+    """CSV text of every subscription plus its monthly cost, written from the columns"""
+    buffer = io.StringIO()
+    store.write_csv(buffer)
+    return buffer.getvalue()
 
 def get_due_subscriptions(days=0):
-    """Get subscriptions due in next N days"""
+    """Get subscriptions due today (days=0) or in the next N days, earliest first"""
+    stats = analytics(store)
+    if days == 0:
+        return store.records(stats.due_today)
+    if days in stats.due_within:
+        return store.records(stats.due_within[days])
     today = date.today()
-    target_date = today + timedelta(days=days)
-    
-    due_subs = []
-    for sub in st.session_state.subscriptions:
-        due_date = date.fromisoformat(sub["next_due"])
-        if days == 0:
-            if due_date == today:
-                due_subs.append(sub)
-        else:
-            if today < due_date <= target_date:
-                due_subs.append(sub)
-    return due_subs
+    return store.records(
+        store.due_index.between(today + timedelta(days=1), today + timedelta(days=days))
+    )
+
+def search_subscriptions(query):
+    """Subscriptions matching `query`, best first: word-prefix matches on name, category or
+    notes (name matches ahead), then names and categories within a typo or two"""
+    return store.records(synced.search(query, store))
 
 def get_ai_insights():
     """Generate AI-powered insights"""
-    subs = st.session_state.subscriptions
-    if not subs:
+    stats = analytics(store)
+    if not stats.count:
         return []
     
     insights = []
     
-    # Calculate category spending
-    category_spending = {}
-    for sub in subs:
-        monthly = calculate_monthly_cost(sub["amount"], sub["cycle"])
-        category_spending[sub["category"]] = category_spending.get(sub["category"], 0) + monthly
-    
     # Find highest spending category
-    if category_spending:
-        max_category = max(category_spending, key=category_spending.get)
-        insights.append(f"💡 Your highest spending category is **{max_category}** (₹{category_spending[max_category]:.2f}/month)")
+    if stats.top_category:
+        max_category = stats.top_category
+        insights.append(f"💡 Your highest spending category is **{max_category}** (₹{stats.category_monthly[max_category]:.2f}/month)")
     
     # Check for annual subscriptions
-    annual_count = sum(1 for s in subs if s["cycle"] == "annual")
+    annual_count = stats.cycle_counts["annual"]
     if annual_count > 0:
         insights.append(f"📊 You have **{annual_count}** annual subscriptions. Consider switching to monthly for better cash flow.")
     
     # Check for due subscriptions
-    due_soon = get_due_subscriptions(7)
+    due_soon = stats.due_within[7]
     if len(due_soon) > 3:
         insights.append(f"⚠️ You have **{len(due_soon)}** renewals in the next 7 days. Budget accordingly!")
     
     # Total spending insight
-    total_monthly = sum(calculate_monthly_cost(s["amount"], s["cycle"]) for s in subs)
-    insights.append(f"💰 Your total monthly subscription cost is **₹{total_monthly:.2f}**")
+    insights.append(f"💰 Your total monthly subscription cost is **₹{stats.total_monthly:.2f}**")
     
     return insights
 
@@ -179,15 +185,12 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📌 Quick Stats")
     
-    subs = st.session_state.subscriptions
-    total_monthly = sum(calculate_monthly_cost(s["amount"], s["cycle"]) for s in subs)
-    total_annual = total_monthly * 12
-    
-    st.metric("Total Subscriptions", len(subs))
-    st.metric("Monthly Cost", f"₹{total_monthly:.2f}")
-    st.metric("Annual Cost", f"₹{total_annual:.2f}")
+    stats = analytics(store)
+    st.metric("Total Subscriptions", stats.count)
+    st.metric("Monthly Cost", f"₹{stats.total_monthly:.2f}")
+    st.metric("Annual Cost", f"₹{stats.total_annual:.2f}")
     
-    due_today = get_due_subscriptions(0)
+    due_today = stats.due_today
     if due_today:
         st.error(f"⚠️ {len(due_today)} due today!")
     
@@ -222,11 +225,10 @@ if page == "📊 Dashboard":
         )
     
     with col3:
-        st.metric("Active Subscriptions", len(st.session_state.subscriptions))
+        st.metric("Active Subscriptions", stats.count)
     
     with col4:
-        total_monthly = sum(calculate_monthly_cost(s["amount"], s["cycle"]) for s in st.session_state.subscriptions)
-        st.metric("Monthly Spend", f"₹{total_monthly:.2f}")
+        st.metric("Monthly Spend", f"₹{stats.total_monthly:.2f}")
     
     st.markdown("---")
     
@@ -241,11 +243,9 @@ if page == "📊 Dashboard":
     
     st.subheader("📋 All Subscriptions")
     
-    if st.session_state.subscriptions:
-        df = pd.DataFrame(st.session_state.subscriptions)
-        
-        # Add monthly cost column
-        df['monthly_cost'] = df.apply(lambda row: calculate_monthly_cost(row['amount'], row['cycle']), axis=1)
+    if len(store):
+        # Columnar frame; monthly cost is already a vectorized column
+        df = store.frame()
         
         # Reorder columns
         column_order = ['name', 'amount', 'cycle', 'next_due', 'category', 'monthly_cost', 'notes']
@@ -288,18 +288,15 @@ elif page == "➕ Add Subscription":
             
             if submit:
                 if name and amount:
-                    new_sub = {
-                        "id": st.session_state.next_id,
+                    synced.add({
                         "name": name.strip(),
                         "amount": float(amount),
                         "cycle": cycle,
-                        "next_due": str(next_due),
+                        "next_due": next_due,
                         "category": category,
                         "notes": notes.strip(),
                         "created_at": str(datetime.now())
-                    }
-                    st.session_state.subscriptions.append(new_sub)
-                    st.session_state.next_id += 1
+                    })
                     st.success(f"✅ '{name}' added successfully!")
                     st.rerun()
                 else:
@@ -316,22 +313,17 @@ elif page == "➕ Add Subscription":
         - Use **Notes** for payment methods, discount codes, etc.
         """)
         
-        if st.session_state.subscriptions:
-            st.success(f"📊 You currently have **{len(st.session_state.subscriptions)}** active subscriptions.")
+        if len(store):
+            st.success(f"📊 You currently have **{len(store)}** active subscriptions.")
 
 elif page == "⚙️ Manage":
     st.subheader("Manage Subscriptions")
     
-    if st.session_state.subscriptions:
+    if len(store):
         # Search/filter
         search = st.text_input("🔍 Search subscriptions", placeholder="Type to filter...")
         
-        filtered_subs = st.session_state.subscriptions
-        if search:
-            filtered_subs = [
-                s for s in st.session_state.subscriptions 
-                if search.lower() in s["name"].lower() or search.lower() in s["category"].lower()
-            ]
+        filtered_subs = search_subscriptions(search)
         
         if not filtered_subs:
             st.warning("No subscriptions match your search.")
@@ -362,25 +354,13 @@ elif page == "⚙️ Manage":
                 
                 with col2:
                     if st.button("🗑️ Delete", type="primary", use_container_width=True):
-                        st.session_state.subscriptions = [
-                            s for s in st.session_state.subscriptions if s["id"] != sub["id"]
-                        ]
+                        synced.delete(sub["id"])
                         st.success(f"✅ '{sub['name']}' deleted successfully!")
                         st.rerun()
                     
                     if st.button("🔄 Mark as Paid", use_container_width=True):
-                        # Update next due date based on cycle
-                        current_due = date.fromisoformat(sub["next_due"])
-                        if sub["cycle"] == "monthly":
-                            new_due = current_due + timedelta(days=30)
-                        elif sub["cycle"] == "annual":
-                            new_due = current_due + timedelta(days=365)
-                        else:
-                            new_due = current_due
-                        
-                        for s in st.session_state.subscriptions:
-                            if s["id"] == sub["id"]:
-                                s["next_due"] = str(new_due)
+                        # Steps from the billing day, so Jan 31 -> Feb 28 -> Mar 31
+                        new_due = synced.mark_paid(sub["id"])
                         
                         st.success(f"✅ Marked as paid! Next due: {new_due}")
                         st.rerun()
@@ -390,14 +370,11 @@ elif page == "⚙️ Manage":
 elif page == "📈 Analytics":
     st.subheader("Spending Analytics")
     
-    if st.session_state.subscriptions:
+    if len(store):
         # Category breakdown
-        category_data = {}
-        for sub in st.session_state.subscriptions:
-            monthly = calculate_monthly_cost(sub["amount"], sub["cycle"])
-            category_data[sub["category"]] = category_data.get(sub["category"], 0) + monthly
+        category_data = stats.category_monthly
         
-        total_monthly = sum(category_data.values())
+        total_monthly = stats.total_monthly
         
         col1, col2 = st.columns(2)
         
@@ -436,10 +413,9 @@ elif page == "📈 Analytics":
         st.subheader("Detailed Breakdown")
         breakdown_data = []
         for category, amount in category_data.items():
-            count = sum(1 for s in st.session_state.subscriptions if s["category"] == category)
             breakdown_data.append({
                 "Category": category,
-                "Subscriptions": count,
+                "Subscriptions": stats.category_counts[category],
                 "Monthly Cost (₹)": f"₹{amount:.2f}",
                 "Annual Cost (₹)": f"₹{amount * 12:.2f}",
                 "Percentage": f"{(amount/total_monthly)*100:.1f}%"
@@ -483,7 +459,7 @@ elif page == "🔔 Reminders":
     if due_3days:
         st.warning(f"⚠️ **Due in Next 3 Days:** {len(due_3days)} subscriptions")
         for sub in due_3days:
-            days_left = (date.fromisoformat(sub['next_due']) - today).days
+            days_left = (store.due_index.due_date(sub['id']) - today).days
             st.info(f"📅 **{sub['name']}** - ₹{sub['amount']} (Due in {days_left} days)")
     
     st.markdown("---")
@@ -492,7 +468,7 @@ elif page == "🔔 Reminders":
     if due_week:
         st.info(f"📆 **Due in Next 7 Days:** {len(due_week)} subscriptions")
         for sub in due_week:
-            days_left = (date.fromisoformat(sub['next_due']) - today).days
+            days_left = (store.due_index.due_date(sub['id']) - today).days
             if days_left > 3:  # Don't show ones already shown in 3-day section
                 st.success(f"✓ **{sub['name']}** - ₹{sub['amount']} (Due in {days_left} days)")
     
@@ -502,7 +478,7 @@ elif page == "🔔 Reminders":
 elif page == "💾 Export":
     st.subheader("Export Your Data")
     
-    if st.session_state.subscriptions:
+    if len(store):
         col1, col2 = st.columns(2)
         
         with col1:
@@ -517,29 +493,16 @@ elif page == "💾 Export":
             """)
         
         with col2:
-            df = pd.DataFrame(st.session_state.subscriptions)
-            
-            # Calculate monthly costs
-            df['monthly_cost'] = df.apply(
-                lambda row: calculate_monthly_cost(row['amount'], row['cycle']), 
-                axis=1
-            )
-            
-            # Add summary stats
-            total_monthly = df['monthly_cost'].sum()
-            total_annual = total_monthly * 12
-            
-            st.metric("Total Subscriptions", len(df))
-            st.metric("Monthly Cost", f"₹{total_monthly:.2f}")
-            st.metric("Annual Cost", f"₹{total_annual:.2f}")
+            st.metric("Total Subscriptions", stats.count)
+            st.metric("Monthly Cost", f"₹{stats.total_monthly:.2f}")
+            st.metric("Annual Cost", f"₹{stats.total_annual:.2f}")
         
         st.markdown("---")
         
         # CSV download
-        csv = df.to_csv(index=False)
         st.download_button(
             label="📥 Download CSV",
-            data=csv,
+            data=subscriptions_to_csv(store),
             file_name=f"subscriptions_{date.today()}.csv",
             mime="text/csv",
             use_container_width=True,
@@ -547,7 +510,7 @@ elif page == "💾 Export":
         )
         
         # JSON download
-        json_data = json.dumps(st.session_state.subscriptions, indent=2)
+        json_data = json.dumps(store.records(), indent=2)
         st.download_button(
             label="📥 Download JSON",
             data=json_data,
@@ -558,7 +521,9 @@ elif page == "💾 Export":
         
         st.markdown("---")
         st.subheader("Preview")
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        st.dataframe(store.frame().head(100), use_container_width=True, hide_index=True)
+        if len(store) > 100:
+            st.caption(f"Showing the first 100 of {len(store)} subscriptions.")
     else:
         st.info("📭 No data to export. Add subscriptions first!")
 
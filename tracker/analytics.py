@@ -0,0 +1,64 @@
+"""One-pass analytics over the columnar store, memoized per data version.
+
+The sidebar, dashboard, analytics and reminders pages all read the same
+`Analytics` object. Spend and counts are bincounts over joint (category,
+cycle) codes, so per-category sums and counts, cycle counts and totals all
+fall out of the same two arrays; due buckets come from the due-date index.
+It is recomputed only when the store's version or the calendar day changes.
+"""
+import weakref
+from datetime import date, timedelta
+import numpy as np
+from tracker.store import CYCLES, SubscriptionStore
+
+DUE_WINDOWS = (3, 7)  # "due within N days" buckets shown across the app
+
+_memo = weakref.WeakKeyDictionary()
+
+
+class Analytics:
+    """Aggregates for one store version on one day."""
+
+    def __init__(self, store: SubscriptionStore, today: date):
+        ncycles = len(CYCLES)
+        ncategories = len(store.categories)
+        joint = store.column("category").astype(np.int64) * ncycles + store.column("cycle")
+        size = ncategories * ncycles
+        spend = np.bincount(joint, weights=store.monthly_cost, minlength=size)
+        spend = spend.reshape(ncategories, ncycles)
+        counts = np.bincount(joint, minlength=size).reshape(ncategories, ncycles)
+
+        self.count = len(store)
+        self.total_monthly = float(spend.sum())
+        self.total_annual = self.total_monthly * 12
+        self.cycle_counts = dict(zip(CYCLES, counts.sum(axis=0).tolist()))
+        per_category = counts.sum(axis=1)
+        # Categories are never forgotten by the store, so skip the empty ones
+        self.category_counts = {
+            cat: int(n) for cat, n in zip(store.categories, per_category) if n
+        }
+        self.category_monthly = {
+            cat: float(total) for cat, total, n
+            in zip(store.categories, spend.sum(axis=1), per_category) if n
+        }
+        self.top_category = (
+            max(self.category_monthly, key=self.category_monthly.get)
+            if self.category_monthly else None
+        )
+
+        index = store.due_index
+        self.due_today = index.between(today, today)
+        self.due_within = {
+            days: index.between(today + timedelta(days=1), today + timedelta(days=days))
+            for days in DUE_WINDOWS
+        }
+
+
+def analytics(store: SubscriptionStore, today: date = None) -> Analytics:
+    """The store's analytics, reused until it is mutated or the day rolls over."""
+    today = today or date.today()
+    key = (store.version, today)
+    cached = _memo.get(store)
+    if cached is None or cached[0] != key:
+        cached = _memo[store] = (key, Analytics(store, today))
+    return cached[1]
@@ -0,0 +1,125 @@
+"""Micro-benchmarks for the standalone Streamlit app's in-memory helpers.
+
+    python -m tracker.benchmark --sizes 10000 100000
+
+`helper_timings` times what `streamlit_app.py`'s helpers do on each rerun;
+`python -m backend.benchmark` folds it into the full JSON baseline.
+"""
+import argparse
+import io
+import random
+import time
+from datetime import date, timedelta
+from tracker.analytics import Analytics, analytics
+from tracker.due_index import DueIndex
+from tracker.store import SubscriptionStore
+
+
+def sample_subscriptions(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    today = date.today()
+    return [
+        {
+            "id": i + 1,
+            "name": f"Service {i + 1}",
+            "amount": round(rng.uniform(50, 2000), 2),
+            "cycle": rng.choice(["monthly", "annual", "one-time"]),
+            "next_due": str(today + timedelta(days=rng.randint(-30, 365))),
+            "category": rng.choice(["OTT", "Utility", "Recharge", "SaaS", "Other"]),
+            "notes": "",
+        }
+        for i in range(n)
+    ]
+
+
+def scan_due(subs: list, days: int) -> list:
+    """The original linear `get_due_subscriptions`, kept as the baseline."""
+    today = date.today()
+    target = today + timedelta(days=days)
+    due = []
+    for sub in subs:
+        due_date = date.fromisoformat(sub["next_due"])
+        if (due_date == today) if days == 0 else (today < due_date <= target):
+            due.append(sub)
+    return due
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_due_index(n: int, repeat: int) -> dict:
+    subs = sample_subscriptions(n)
+    by_id = {s["id"]: s for s in subs}
+    today = date.today()
+    index = DueIndex.build(subs)
+
+    def lookups():
+        # One rerun's worth of windows: sidebar, dashboard and reminders
+        for days in (0, 0, 7, 7, 3):
+            if days == 0:
+                ids = index.between(today, today)
+            else:
+                ids = index.between(today + timedelta(days=1), today + timedelta(days=days))
+            [by_id[i] for i in ids]
+
+    assert len(scan_due(subs, 7)) == index.count_between(
+        today + timedelta(days=1), today + timedelta(days=7)
+    )
+    return {
+        "rows": n,
+        "build_s": timed(lambda: DueIndex.build(subs), 1),
+        "scan_s": timed(lambda: [scan_due(subs, d) for d in (0, 0, 7, 7, 3)], repeat),
+        "index_s": timed(lookups, repeat),
+    }
+
+
+def helper_timings(n: int, repeat: int) -> dict:
+    """Per-call seconds (`repeat` samples each) for the app's helpers over `n` rows.
+
+    The helpers live in `streamlit_app.py`, which renders on import, so this
+    times the store and analytics calls they consist of.
+    """
+    started = time.perf_counter()
+    store = SubscriptionStore.from_records(sample_subscriptions(n))
+    timings = {"load_store": [time.perf_counter() - started]}
+    today = date.today()
+
+    def due_subscriptions():
+        # get_due_subscriptions(0) and (7): memoized analytics plus the row lookups
+        stats = analytics(store)
+        return store.records(stats.due_today), store.records(stats.due_within[7])
+
+    helpers = {
+        "monthly_cost_total": lambda: store.monthly_cost.sum(),
+        "get_due_subscriptions": due_subscriptions,
+        # After any write the analytics are recomputed: time that cold path
+        "get_ai_insights": lambda: Analytics(store, today),
+        "subscriptions_to_csv": lambda: store.write_csv(io.StringIO()),
+    }
+    for name, fn in helpers.items():
+        samples = timings[name] = []
+        for _ in range(repeat if name != "subscriptions_to_csv" else max(1, repeat // 10)):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'rows':>8}  {'build':>9}  {'scan/rerun':>11}  {'index/rerun':>12}  speedup")
+    for n in args.sizes:
+        r = bench_due_index(n, args.repeat)
+        print(f"{n:>8}  {r['build_s'] * 1000:>7.1f}ms  {r['scan_s'] * 1000:>9.1f}ms  "
+              f"{r['index_s'] * 1000:>10.3f}ms  {r['scan_s'] / r['index_s']:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
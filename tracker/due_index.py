@@ -0,0 +1,64 @@
+"""Sorted due-date index for the standalone Streamlit app.
+
+Keeps `(ordinal, id)` pairs in a sorted list so the due-today and
+due-within-N-days windows are two bisections instead of a scan that
+re-parses every ISO date string.
+"""
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Iterable, List
+
+
+class DueIndex:
+    """Subscription ids ordered by due date; O(log n) range lookups."""
+
+    def __init__(self):
+        self._keys = []  # sorted (ordinal, id)
+        self._ordinals = {}
+
+    @classmethod
+    def build(cls, subs: Iterable[dict]) -> "DueIndex":
+        index = cls()
+        index._ordinals = {s["id"]: date.fromisoformat(s["next_due"]).toordinal() for s in subs}
+        index._keys = sorted((ordinal, sub_id) for sub_id, ordinal in index._ordinals.items())
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def copy(self) -> "DueIndex":
+        index = DueIndex()
+        index._keys = list(self._keys)
+        index._ordinals = dict(self._ordinals)
+        return index
+
+    def add(self, sub_id: int, due: date) -> None:
+        ordinal = due.toordinal()
+        self._ordinals[sub_id] = ordinal
+        insort(self._keys, (ordinal, sub_id))
+
+    def remove(self, sub_id: int) -> None:
+        ordinal = self._ordinals.pop(sub_id)
+        del self._keys[bisect_left(self._keys, (ordinal, sub_id))]
+
+    def move(self, sub_id: int, due: date) -> None:
+        self.remove(sub_id)
+        self.add(sub_id, due)
+
+    def due_date(self, sub_id: int) -> date:
+        return date.fromordinal(self._ordinals[sub_id])
+
+    def _span(self, first: date, last: date) -> tuple:
+        # (n,) sorts before every (n, id), so these bound whole days
+        lo = bisect_left(self._keys, (first.toordinal(),))
+        hi = bisect_left(self._keys, (last.toordinal() + 1,))
+        return lo, hi
+
+    def between(self, first: date, last: date) -> List[int]:
+        """Ids due in [first, last], earliest first."""
+        lo, hi = self._span(first, last)
+        return [sub_id for _, sub_id in self._keys[lo:hi]]
+
+    def count_between(self, first: date, last: date) -> int:
+        lo, hi = self._span(first, last)
+        return hi - lo
@@ -0,0 +1,119 @@
+"""Word and trigram index over the columnar store, built once per data version.
+
+The Manage page searches on every rerun. Rather than scan every row, the
+index keeps the sorted words of name, category and notes with the ids that
+contain them, so each query word's prefix matches are one bisect range, and
+the trigrams of the name and category words, so typo candidates are only
+the words sharing a trigram with the query. Ranking follows the backend's
+search: prefix matches first (name matches ahead), then rows whose name or
+category words are within SEARCH_MIN_SIMILARITY trigram similarity.
+It is rebuilt only when the store's version changes.
+"""
+import os
+import re
+import weakref
+from bisect import bisect_left
+from collections import defaultdict
+from typing import List
+from tracker.store import SubscriptionStore
+
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.4"))
+SEARCH_MAX_TERMS = 8
+
+_memo = weakref.WeakKeyDictionary()
+
+
+def words(text: str) -> list:
+    return re.findall(r"\w+", text.lower())
+
+
+def terms(query: str) -> list:
+    return words(query)[:SEARCH_MAX_TERMS]
+
+
+def word_trigrams(word: str) -> frozenset:
+    """pg_trgm's trigrams of one word: padded with two spaces before and one after."""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class SearchIndex:
+    """Word postings and word trigrams for one store version."""
+
+    def __init__(self, store: SubscriptionStore):
+        self.ids = store.column("id").tolist()
+        self._names = dict(zip(self.ids, store.column("name")))
+        self._postings = defaultdict(set)  # any word of name, category or notes -> ids
+        self._in_name = defaultdict(set)
+        self._fuzzy = defaultdict(set)  # name and category words only
+        categories = (store.categories[code] for code in store.column("category").tolist())
+        for sub_id, name, category, notes in zip(
+            self.ids, store.column("name"), categories, store.column("notes")
+        ):
+            for word in words(name):
+                self._in_name[word].add(sub_id)
+                self._fuzzy[word].add(sub_id)
+            for word in words(category):
+                self._fuzzy[word].add(sub_id)
+            for word in words(f"{name} {category} {notes or ''}"):
+                self._postings[word].add(sub_id)
+        self._words = sorted(self._postings)
+        self._grams = {word: word_trigrams(word) for word in self._fuzzy}
+        self._by_gram = defaultdict(set)
+        for word, grams in self._grams.items():
+            for gram in grams:
+                self._by_gram[gram].add(word)
+
+    def _with_prefix(self, prefix: str):
+        """Words of the index starting with `prefix`."""
+        i = bisect_left(self._words, prefix)
+        while i < len(self._words) and self._words[i].startswith(prefix):
+            yield self._words[i]
+            i += 1
+
+    def search(self, query: str, min_similarity: float = SEARCH_MIN_SIMILARITY) -> List[int]:
+        """Ids matching `query`, best first; every id, in store order, for an empty query."""
+        wanted = terms(query)
+        if not wanted:
+            return list(self.ids)
+
+        # Rows where every query word starts a word, ranked by how many start a name word
+        prefix, in_name = None, defaultdict(int)
+        for word in wanted:
+            found, named = set(), set()
+            for match in self._with_prefix(word):
+                found |= self._postings[match]
+                named |= self._in_name.get(match, set())
+            prefix = found if prefix is None else prefix & found
+            for sub_id in named:
+                in_name[sub_id] += 1
+        ranked = sorted(prefix, key=lambda i: (-in_name[i], self._names[i], i))
+
+        # Best similarity per row for each query word, over the words sharing a trigram
+        totals = defaultdict(float)
+        for word in wanted:
+            mine = word_trigrams(word)
+            best = {}
+            candidates = set().union(*(self._by_gram.get(gram, ()) for gram in mine))
+            for candidate in candidates:
+                theirs = self._grams[candidate]
+                score = len(mine & theirs) / len(mine | theirs)
+                for sub_id in self._fuzzy[candidate]:
+                    if score > best.get(sub_id, 0.0):
+                        best[sub_id] = score
+            for sub_id, score in best.items():
+                totals[sub_id] += score
+        fuzzy = [
+            (-total / len(wanted), self._names[sub_id], sub_id)
+            for sub_id, total in totals.items()
+            if sub_id not in prefix and total / len(wanted) >= min_similarity
+        ]
+        return ranked + [sub_id for *_, sub_id in sorted(fuzzy)]
+
+
+def search_index(store: SubscriptionStore) -> SearchIndex:
+    """The store's search index, reused until the store is mutated."""
+    cached = _memo.get(store)
+    if cached is None or cached[0] != store.version:
+        cached = _memo[store] = (store.version, SearchIndex(store))
+    return cached[1]
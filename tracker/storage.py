@@ -0,0 +1,320 @@
+"""Pluggable persistence for the standalone Streamlit app.
+
+A storage backend loads every row once and then writes only the row each
+add, delete or mark-paid touches:
+
+- `memory` (default): nothing persisted (sample data, one copy per browser
+  session)
+- `file:///path.jsonl`: an append-only log of changes, replayed on load
+- `database`: the backend's DATABASE_URL, so the API and the standalone
+  app share one database
+- `sqlite:///path.db` (or any SQLAlchemy URL): the backend's tables there
+
+The SQL backends read and write the rows of one API user,
+TRACKER_OWNER_EMAIL, created on first use without a usable password, and
+report that user's table version so writes made elsewhere (the API, a bulk
+import, the renewal task) are noticed. They also search with the backend's
+full-text index instead of the store's.
+
+`SyncedStore` pairs a backend with the columnar store: a change is
+persisted first and then applied to a copy of the store, which replaces
+it. Streamlit shares one cached store between session threads, so a
+published store is never mutated and readers need no lock.
+"""
+import asyncio
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Optional
+from tracker.search import search_index, terms
+from tracker.store import SubscriptionStore, roll_forward
+
+TRACKER_STORAGE = os.getenv("TRACKER_STORAGE", "memory")
+TRACKER_OWNER_EMAIL = os.getenv("TRACKER_OWNER_EMAIL", "tracker@localhost")
+
+SEARCH_LIMIT = 100  # most matches the database search returns
+
+FIELDS = ("name", "amount", "cycle", "next_due", "billing_day", "category", "notes",
+          "created_at")
+
+
+class MemoryStorage:
+    """Keeps nothing; ids continue from the seed rows."""
+
+    def __init__(self, seed: Iterable[dict] = ()):
+        self._seed = list(seed)
+        self._next_id = max((r["id"] for r in self._seed), default=0) + 1
+
+    def load(self) -> List[dict]:
+        return self._seed
+
+    def version(self) -> Optional[int]:
+        return None  # only this process writes
+
+    def add(self, record: dict) -> int:
+        sub_id, self._next_id = self._next_id, self._next_id + 1
+        return sub_id
+
+    def delete(self, sub_id: int) -> None:
+        pass
+
+    def set_due(self, sub_id: int, due: date, billing_day: int) -> None:
+        pass
+
+
+class SQLStorage:
+    """One owner's rows in the backend's tables, with its rollup and version kept in step."""
+
+    def __init__(self, url: str, owner_email: str = TRACKER_OWNER_EMAIL):
+        # Imported here so the memory and file backends work without SQLAlchemy
+        from sqlalchemy import select
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import NullPool
+        from backend import rollup, search, sync, versioning
+        from backend.database import init_db, make_engine, to_async_url
+        from backend.models import Payment, Subscription, TableVersion, User
+
+        self._rollup, self._versioning, self._sync = rollup, versioning, sync
+        self._search = search
+        self._model, self._version_model, self._payment_model = (
+            Subscription, TableVersion, Payment
+        )
+        self.engine = make_engine(url)
+        # Searches run on their own short-lived event loops, so keep no connections between them
+        self._async_session = async_sessionmaker(
+            bind=create_async_engine(to_async_url(url), poolclass=NullPool)
+        )
+        init_db(self.engine)
+        self._session = sessionmaker(bind=self.engine, autoflush=False)
+        with self._session() as db:
+            rollup.ensure_built(db)
+            search.ensure_index(db)
+            owner = db.scalar(select(User).where(User.email == owner_email))
+            if owner is None:
+                # "!" is never a valid bcrypt hash, so nobody can sign in as this user
+                owner = User(email=owner_email, hashed_password="!")
+                db.add(owner)
+                db.commit()
+            self.owner_id = owner.id
+            self._scope = versioning.scope(self.owner_id)
+
+    def load(self) -> List[dict]:
+        from sqlalchemy import select
+        model = self._model
+        with self._session() as db:
+            rows = db.execute(
+                select(model.id, *(getattr(model, f) for f in FIELDS))
+                .where(model.owner_id == self.owner_id)
+                .order_by(model.id)
+            ).mappings().all()
+        return [{**row, "created_at": str(row["created_at"])} for row in rows]
+
+    def version(self) -> int:
+        """The owner's table version, bumped by every write to its rows from anywhere."""
+        from sqlalchemy import select
+        model = self._version_model
+        with self._session() as db:
+            return db.scalar(select(model.version).where(model.name == self._scope)) or 0
+
+    def add(self, record: dict) -> int:
+        with self._session.begin() as db:
+            fields = {f: record.get(f) for f in FIELDS if f != "created_at"}
+            if isinstance(fields["next_due"], str):
+                fields["next_due"] = date.fromisoformat(fields["next_due"])
+            sub = self._model(**fields, owner_id=self.owner_id)
+            db.add(sub)
+            db.flush()
+            self._rollup.record_change(db, new=self._rollup.rollup_key(sub))
+            sub.change_version = self._versioning.bump(db, self._scope)
+            return sub.id
+
+    def _owned(self, db, sub_id: int):
+        sub = db.get(self._model, sub_id)
+        return sub if sub is not None and sub.owner_id == self.owner_id else None
+
+    def delete(self, sub_id: int) -> None:
+        from sqlalchemy import delete
+        with self._session.begin() as db:
+            sub = self._owned(db, sub_id)
+            if sub is not None:
+                self._rollup.record_change(db, old=self._rollup.rollup_key(sub))
+                version = self._versioning.bump(db, self._scope)
+                self._sync.tombstone(db, self.owner_id, sub_id, version)
+                payments = self._payment_model
+                db.execute(delete(payments).where(payments.subscription_id == sub_id))
+                db.delete(sub)
+
+    def set_due(self, sub_id: int, due: date, billing_day: int) -> None:
+        with self._session.begin() as db:
+            sub = self._owned(db, sub_id)
+            if sub is not None:
+                sub.next_due = due
+                sub.billing_day = billing_day
+                sub.change_version = self._versioning.bump(db, self._scope)
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[int]:
+        """Ids of the owner's best matches from the backend's full-text search, best first."""
+        async def ranked():
+            async with self._async_session() as db:
+                hits = await self._search.search(db, self.owner_id, query, limit)
+            return [sub.id for sub, _, _ in hits]
+
+        return asyncio.run(ranked())
+
+
+class AppendLogStorage:
+    """JSON-lines log of add/delete/due operations; compacted on load once it is mostly history.
+
+    Call `load` before writing: it also restores the next free id.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def load(self) -> List[dict]:
+        rows, ops = {}, 0
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as log:
+                for line in log:
+                    if not line.strip():
+                        continue
+                    op = json.loads(line)
+                    ops += 1
+                    if op["op"] == "add":
+                        rows[op["row"]["id"]] = op["row"]
+                        self._next_id = max(self._next_id, op["row"]["id"] + 1)
+                    elif op["op"] == "delete":
+                        rows.pop(op["id"], None)
+                    elif op["op"] == "due" and op["id"] in rows:
+                        rows[op["id"]]["next_due"] = op["next_due"]
+                        rows[op["id"]]["billing_day"] = op.get("billing_day")
+                    elif op["op"] == "next_id":
+                        self._next_id = max(self._next_id, op["value"])
+        records = [rows[sub_id] for sub_id in sorted(rows)]
+        if ops > 2 * len(records) + 100:
+            self._compact(records)
+        return records
+
+    def version(self) -> Optional[int]:
+        return None  # one process owns the log
+
+    def _compact(self, records: List[dict]) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as log:
+            # Ids of deleted rows are never handed out again
+            log.write(json.dumps({"op": "next_id", "value": self._next_id}) + "\n")
+            for row in records:
+                log.write(json.dumps({"op": "add", "row": row}) + "\n")
+        os.replace(tmp, self.path)
+
+    def _append(self, op: dict) -> None:
+        with self._lock, self.path.open("a", encoding="utf-8") as log:
+            log.write(json.dumps(op, default=str) + "\n")
+
+    def add(self, record: dict) -> int:
+        with self._lock:
+            sub_id, self._next_id = self._next_id, self._next_id + 1
+        row = {"id": sub_id, **{f: record.get(f) for f in FIELDS}}
+        self._append({"op": "add", "row": row})
+        return sub_id
+
+    def delete(self, sub_id: int) -> None:
+        self._append({"op": "delete", "id": sub_id})
+
+    def set_due(self, sub_id: int, due: date, billing_day: int) -> None:
+        self._append(
+            {"op": "due", "id": sub_id, "next_due": str(due), "billing_day": billing_day}
+        )
+
+
+def open_storage(spec: str = TRACKER_STORAGE, seed: Iterable[dict] = ()):
+    """Backend for a TRACKER_STORAGE value; `seed` only applies to memory storage."""
+    if spec == "memory":
+        return MemoryStorage(seed)
+    if spec.startswith("file://"):
+        return AppendLogStorage(spec[len("file://"):])
+    if spec == "database":
+        from backend.database import DATABASE_URL
+        spec = DATABASE_URL
+    return SQLStorage(spec)
+
+
+class SyncedStore:
+    """Write-through pairing of a storage backend and an in-memory `SubscriptionStore`.
+
+    Read `store` (or `refresh()`) once and use that snapshot throughout: writers
+    replace it rather than change it.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        # Read before loading, so a write landing in between triggers a reload
+        self._seen = storage.version()
+        self.store = SubscriptionStore.from_records(storage.load())
+
+    def refresh(self) -> SubscriptionStore:
+        """The current store, reloaded first if the rows were changed outside this process."""
+        if self._seen is not None and self.storage.version() != self._seen:
+            with self._lock:
+                version = self.storage.version()
+                if version != self._seen:
+                    self._seen = version
+                    self.store = SubscriptionStore.from_records(self.storage.load())
+        return self.store
+
+    def search(self, query: str, store: Optional[SubscriptionStore] = None) -> List[int]:
+        """Ids of `store` (default: the current one) matching `query`, best first.
+
+        SQL storage asks the database's search index; the others use the store's
+        own index, built once per version. An empty query returns every id.
+        """
+        store = self.store if store is None else store
+        if terms(query) and hasattr(self.storage, "search"):
+            # The snapshot may trail the database by a write; skip rows it doesn't have yet
+            return [sub_id for sub_id in self.storage.search(query) if sub_id in store]
+        return search_index(store).search(query)
+
+    def _apply(self, change):
+        """Run `change` on a copy of the store and publish it; the caller holds the lock."""
+        store = self.store.copy()
+        result = change(store)
+        self.store = store
+        if self._seen is not None:
+            # Our own write moves the version by one; anything more means another
+            # writer got in too, so leave `_seen` behind and let refresh() reload
+            version = self.storage.version()
+            if version == self._seen + 1:
+                self._seen = version
+        return result
+
+    def add(self, record: dict) -> int:
+        with self._lock:
+            sub_id = self.storage.add(record)
+            return self._apply(lambda store: store.add({**record, "id": sub_id}))
+
+    def delete(self, sub_id: int) -> None:
+        with self._lock:
+            self.storage.delete(sub_id)
+            self._apply(lambda store: store.delete(sub_id))
+
+    def set_due(self, sub_id: int, due: date) -> None:
+        """Move a due date by hand, which also makes its day the billing day."""
+        with self._lock:
+            self.storage.set_due(sub_id, due, due.day)
+            self._apply(lambda store: store.set_due(sub_id, due))
+
+    def mark_paid(self, sub_id: int) -> date:
+        """Roll a subscription on by one cycle from its billing day; returns the new due date."""
+        with self._lock:
+            record = self.store.get(sub_id)
+            day = record["billing_day"]
+            due = roll_forward(date.fromisoformat(record["next_due"]), record["cycle"], day)
+            self.storage.set_due(sub_id, due, day)
+            self._apply(lambda store: store.set_due(sub_id, due, day))
+            return due
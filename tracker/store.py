@@ -0,0 +1,207 @@
+"""Columnar in-memory subscription store for the standalone Streamlit app.
+
+Each field is a typed NumPy column (datetime64 due dates, float amounts,
+small-int codes for the categorical cycle and category) grown by doubling,
+so add, delete and mark-paid touch one row in place and monthly cost is a
+vectorized expression instead of a per-row `apply`. Ids are handed out in
+increasing order and rows are never reordered, so the id column stays
+sorted and a row is found by binary search.
+"""
+import csv
+from datetime import date, datetime
+from typing import Iterable, List, Optional, TextIO
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from tracker.due_index import DueIndex
+
+CYCLES = ("monthly", "annual", "one-time")
+CYCLE_MONTHS = {"monthly": 1, "annual": 12}
+MONTHLY_FACTOR = np.array([1.0, 1 / 12, 0.0])  # indexed by cycle code
+CSV_FIELDS = ("id", "name", "amount", "cycle", "next_due", "category", "notes", "created_at",
+              "monthly_cost")
+
+_COLUMNS = {
+    "id": np.int64,
+    "name": object,
+    "amount": np.float64,
+    "cycle": np.int8,
+    "next_due": "datetime64[D]",
+    "billing_day": np.int8,  # day of month the cycle is anchored to
+    "category": np.int16,
+    "notes": object,
+    "created_at": object,
+}
+
+
+def roll_forward(due: date, cycle: str, billing_day: int) -> date:
+    """The due date one cycle after `due`: the billing day clamped to that month's end,
+    so Jan 31 -> Feb 29 -> Mar 31 rather than drifting to the 29th."""
+    months = CYCLE_MONTHS.get(cycle)
+    return due if months is None else due + relativedelta(months=months, day=billing_day)
+
+
+class SubscriptionStore:
+    """Typed, append-friendly columns plus a due-date index over the same rows."""
+
+    def __init__(self, capacity: int = 64):
+        self._cols = {name: np.empty(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self._size = 0
+        self.categories: List[str] = []
+        self._category_codes = {}
+        self.next_id = 1
+        self.due_index = DueIndex()
+        self.version = 0  # bumped by every mutation; derived views key on it
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "SubscriptionStore":
+        store = cls()
+        for record in records:
+            store.add(record)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, sub_id: int) -> bool:
+        ids = self._cols["id"][:self._size]
+        row = int(np.searchsorted(ids, sub_id))
+        return row < self._size and ids[row] == sub_id
+
+    def copy(self) -> "SubscriptionStore":
+        """An independent copy to mutate while readers keep using this one."""
+        clone = SubscriptionStore.__new__(SubscriptionStore)
+        clone._cols = {name: col.copy() for name, col in self._cols.items()}
+        clone._size = self._size
+        clone.categories = list(self.categories)
+        clone._category_codes = dict(self._category_codes)
+        clone.next_id = self.next_id
+        clone.due_index = self.due_index.copy()
+        clone.version = self.version
+        return clone
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of the live rows of one column."""
+        view = self._cols[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def monthly_cost(self) -> np.ndarray:
+        return self.column("amount") * MONTHLY_FACTOR[self.column("cycle")]
+
+    def category_code(self, category: str) -> int:
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _row(self, sub_id: int) -> int:
+        ids = self._cols["id"][:self._size]
+        row = int(np.searchsorted(ids, sub_id))
+        if row == self._size or ids[row] != sub_id:
+            raise KeyError(sub_id)
+        return row
+
+    def _grow(self) -> None:
+        for name, col in self._cols.items():
+            bigger = np.empty(len(col) * 2, dtype=col.dtype)
+            bigger[:self._size] = col[:self._size]
+            self._cols[name] = bigger
+
+    def add(self, record: dict) -> int:
+        """Append a subscription (string or date `next_due`) and return its id."""
+        if self._size == len(self._cols["id"]):
+            self._grow()
+        sub_id = record.get("id")
+        sub_id = self.next_id if sub_id is None else sub_id
+        if self._size and sub_id <= self._cols["id"][self._size - 1]:
+            raise ValueError(f"Subscription ids must increase; got {sub_id}")
+        due = record["next_due"]
+        due = date.fromisoformat(due) if isinstance(due, str) else due
+        row, cols = self._size, self._cols
+        cols["id"][row] = sub_id
+        cols["name"][row] = record["name"]
+        cols["amount"][row] = float(record["amount"])
+        cols["cycle"][row] = CYCLES.index(record["cycle"])
+        cols["next_due"][row] = due
+        cols["billing_day"][row] = record.get("billing_day") or due.day
+        cols["category"][row] = self.category_code(record["category"])
+        cols["notes"][row] = record.get("notes") or ""
+        cols["created_at"][row] = record.get("created_at") or str(datetime.now())
+        self._size += 1
+        self.next_id = sub_id + 1
+        self.due_index.add(sub_id, due)
+        self.version += 1
+        return sub_id
+
+    def delete(self, sub_id: int) -> None:
+        row = self._row(sub_id)
+        last = self._size - 1
+        for col in self._cols.values():
+            col[row:last] = col[row + 1:last + 1]
+        self._size = last
+        self.due_index.remove(sub_id)
+        self.version += 1
+
+    def set_due(self, sub_id: int, due: date, billing_day: Optional[int] = None) -> None:
+        """Move a due date; the billing day is re-anchored to `due` unless given."""
+        row = self._row(sub_id)
+        self._cols["next_due"][row] = due
+        self._cols["billing_day"][row] = billing_day or due.day
+        self.due_index.move(sub_id, due)
+        self.version += 1
+
+    def get(self, sub_id: int) -> dict:
+        return self._record(self._row(sub_id))
+
+    def _record(self, row: int) -> dict:
+        cols = self._cols
+        return {
+            "id": int(cols["id"][row]),
+            "name": cols["name"][row],
+            "amount": float(cols["amount"][row]),
+            "cycle": CYCLES[cols["cycle"][row]],
+            "next_due": str(cols["next_due"][row]),
+            "billing_day": int(cols["billing_day"][row]),
+            "category": self.categories[cols["category"][row]],
+            "notes": cols["notes"][row],
+            "created_at": cols["created_at"][row],
+        }
+
+    def records(self, ids: Optional[Iterable[int]] = None) -> List[dict]:
+        """Row dicts in insertion order, or in the order of `ids`."""
+        rows = range(self._size) if ids is None else map(self._row, ids)
+        return [self._record(row) for row in rows]
+
+    def write_csv(self, out: TextIO) -> None:
+        """Write every row plus its monthly cost to `out` as CSV, straight from the columns."""
+        writer = csv.writer(out)
+        writer.writerow(CSV_FIELDS)
+        categories = self.categories
+        writer.writerows(zip(
+            self.column("id").tolist(),
+            self.column("name"),
+            self.column("amount").tolist(),
+            (CYCLES[code] for code in self.column("cycle").tolist()),
+            self.column("next_due").astype(str),
+            (categories[code] for code in self.column("category").tolist()),
+            self.column("notes"),
+            self.column("created_at"),
+            self.monthly_cost.tolist(),
+        ))
+
+    def frame(self) -> pd.DataFrame:
+        """All rows as a DataFrame built column-wise, with `monthly_cost` included."""
+        return pd.DataFrame({
+            "id": self.column("id"),
+            "name": self.column("name"),
+            "amount": self.column("amount"),
+            "cycle": pd.Categorical.from_codes(self.column("cycle"), CYCLES),
+            "next_due": self.column("next_due"),
+            "category": pd.Categorical.from_codes(self.column("category"), self.categories),
+            "notes": self.column("notes"),
+            "created_at": self.column("created_at"),
+            "monthly_cost": self.monthly_cost,
+        })
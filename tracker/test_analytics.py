@@ -0,0 +1,36 @@
+"""Tests for the memoized analytics kernel."""
+from datetime import date, timedelta
+import pytest
+from tracker.analytics import analytics
+from tracker.benchmark import sample_subscriptions, scan_due
+from tracker.store import SubscriptionStore
+
+
+def test_aggregates_match_row_by_row_totals():
+    subs = sample_subscriptions(300)
+    store = SubscriptionStore.from_records(subs)
+    stats = analytics(store)
+
+    monthly = {}
+    for s in subs:
+        cost = {"monthly": s["amount"], "annual": s["amount"] / 12}.get(s["cycle"], 0.0)
+        monthly[s["category"]] = monthly.get(s["category"], 0.0) + cost
+    assert stats.category_monthly == pytest.approx(monthly)
+    assert stats.total_monthly == pytest.approx(sum(monthly.values()))
+    assert sum(stats.category_counts.values()) == stats.count == 300
+    assert stats.cycle_counts["annual"] == sum(s["cycle"] == "annual" for s in subs)
+    assert stats.top_category == max(monthly, key=monthly.get)
+    assert sorted(stats.due_within[7]) == sorted(s["id"] for s in scan_due(subs, 7))
+
+
+def test_memoized_until_the_store_or_day_changes():
+    store = SubscriptionStore.from_records(sample_subscriptions(10))
+    today = date.today()
+    first = analytics(store, today)
+    assert analytics(store, today) is first
+    assert analytics(store, today + timedelta(days=1)) is not first
+
+    store.delete(1)
+    after = analytics(store, today)
+    assert after is not first
+    assert after.count == 9
@@ -0,0 +1,32 @@
+"""Tests for the sorted due-date index."""
+from datetime import date, timedelta
+from tracker.benchmark import sample_subscriptions, scan_due
+from tracker.due_index import DueIndex
+
+
+def test_windows_match_a_linear_scan():
+    subs = sample_subscriptions(500)
+    index = DueIndex.build(subs)
+    today = date.today()
+    for days in (0, 3, 7, 30):
+        if days == 0:
+            ids = index.between(today, today)
+        else:
+            ids = index.between(today + timedelta(days=1), today + timedelta(days=days))
+        assert sorted(ids) == sorted(s["id"] for s in scan_due(subs, days))
+        assert [index.due_date(i) for i in ids] == sorted(index.due_date(i) for i in ids)
+
+
+def test_add_remove_and_move_keep_order():
+    index = DueIndex()
+    day = date(2030, 1, 10)
+    index.add(1, day)
+    index.add(2, day)
+    index.add(3, day + timedelta(days=1))
+    assert index.between(day, day) == [1, 2]
+
+    index.move(1, day + timedelta(days=1))
+    assert index.between(day, day + timedelta(days=1)) == [2, 1, 3]
+    index.remove(3)
+    assert index.count_between(date.min, date.max) == 2
+    assert len(index) == 2
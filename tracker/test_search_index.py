@@ -0,0 +1,37 @@
+"""Tests for the store's memoized search index."""
+from tracker.search import search_index
+from tracker.store import SubscriptionStore
+
+ROWS = [
+    {"id": 1, "name": "Netflix Premium", "amount": 199, "cycle": "monthly",
+     "next_due": "2030-01-15", "category": "OTT", "notes": ""},
+    {"id": 2, "name": "Electricity", "amount": 900, "cycle": "monthly",
+     "next_due": "2030-01-10", "category": "Utility", "notes": "premium tariff"},
+    {"id": 3, "name": "Gym", "amount": 1200, "cycle": "annual",
+     "next_due": "2030-03-01", "category": "Fitness", "notes": ""},
+]
+
+
+def test_prefix_matches_rank_name_matches_first():
+    index = search_index(SubscriptionStore.from_records(ROWS))
+    assert index.search("prem") == [1, 2]  # Netflix by name, Electricity by notes
+    assert index.search("net prem") == [1]
+    assert index.search("util") == [2]
+    assert index.search("") == [1, 2, 3]
+
+
+def test_typos_match_names_and_categories():
+    index = search_index(SubscriptionStore.from_records(ROWS))
+    assert index.search("netflx") == [1]
+    assert index.search("fitnes") == [3]
+    assert index.search("tariffs") == []  # notes only match by prefix
+    assert index.search("zzzz") == []
+
+
+def test_rebuilt_only_when_the_store_changes():
+    store = SubscriptionStore.from_records(ROWS)
+    index = search_index(store)
+    assert search_index(store) is index
+    store.add({**ROWS[2], "id": 4, "name": "Yoga"})
+    assert search_index(store) is not index
+    assert search_index(store).search("yoga") == [4]
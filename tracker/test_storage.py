@@ -0,0 +1,127 @@
+"""Tests for the standalone app's storage backends."""
+from datetime import date
+import pytest
+from tracker.storage import AppendLogStorage, SQLStorage, SyncedStore, open_storage
+
+ROW = {"name": "Netflix", "amount": 199.0, "cycle": "monthly", "next_due": date(2030, 1, 15),
+       "category": "OTT", "notes": ""}
+
+
+def spec_for(tmp_path, scheme):
+    return f"sqlite:///{tmp_path}/t.db" if scheme == "sqlite" else f"file://{tmp_path}/t.jsonl"
+
+
+def exercise(spec):
+    synced = SyncedStore(open_storage(spec))
+    first = synced.add(ROW)
+    second = synced.add({**ROW, "name": "Gym", "category": "Fitness", "cycle": "annual"})
+    synced.set_due(first, date(2030, 2, 15))
+    synced.delete(second)
+    return first, SyncedStore(open_storage(spec)).store
+
+
+@pytest.mark.parametrize("scheme", ["sqlite", "file"])
+def test_changes_survive_a_reload(tmp_path, scheme):
+    first, reloaded = exercise(spec_for(tmp_path, scheme))
+    assert [r["name"] for r in reloaded.records()] == ["Netflix"]
+    assert reloaded.get(first)["next_due"] == "2030-02-15"
+    assert reloaded.next_id > first
+
+
+@pytest.mark.parametrize("scheme", ["sqlite", "file"])
+def test_mark_paid_keeps_the_billing_day_across_reloads(tmp_path, scheme):
+    spec = spec_for(tmp_path, scheme)
+    synced = SyncedStore(open_storage(spec))
+    sub_id = synced.add({**ROW, "next_due": date(2030, 1, 31)})
+    assert synced.mark_paid(sub_id) == date(2030, 2, 28)
+    # A reload must not re-anchor the row to the clamped 28th
+    assert SyncedStore(open_storage(spec)).mark_paid(sub_id) == date(2030, 3, 31)
+
+
+def test_sql_storage_keeps_backend_rollup_in_step(tmp_path):
+    from backend import rollup
+    storage = open_storage(f"sqlite:///{tmp_path}/t.db")
+    synced = SyncedStore(storage)
+    synced.add(ROW)
+    synced.delete(synced.add({**ROW, "category": "Fitness"}))
+    with storage._session() as db:
+        assert rollup.verify(db) == []
+
+
+def test_append_log_compacts_history(tmp_path):
+    path = tmp_path / "t.jsonl"
+    synced = SyncedStore(AppendLogStorage(path))
+    sub_id = synced.add(ROW)
+    for day in range(1, 29):
+        synced.set_due(sub_id, date(2030, 3, day))
+    for _ in range(100):
+        synced.delete(synced.add(ROW))
+    assert len(path.read_text().splitlines()) > 200
+
+    log = AppendLogStorage(path)
+    records = log.load()
+    assert len(path.read_text().splitlines()) == 2
+    assert records[0]["next_due"] == "2030-03-28"
+    assert log.add(ROW) == 102
+
+
+def test_sql_storage_only_sees_its_owners_rows(tmp_path):
+    url = f"sqlite:///{tmp_path}/t.db"
+    mine = SyncedStore(open_storage(url))
+    theirs = SQLStorage(url, owner_email="someone@example.com")
+    other = theirs.add(ROW)
+    mine.add({**ROW, "name": "Gym"})
+    mine.storage.delete(other)  # not this owner's row: left alone
+    assert [r["name"] for r in SyncedStore(open_storage(url)).store.records()] == ["Gym"]
+    assert [r["id"] for r in theirs.load()] == [other]
+
+
+def test_writes_publish_a_new_store_and_leave_readers_alone():
+    synced = SyncedStore(open_storage("memory"))
+    first = synced.add(ROW)
+    before = synced.store
+    synced.add({**ROW, "name": "Gym"})
+    synced.delete(first)
+    assert [r["name"] for r in before.records()] == ["Netflix"]
+    assert [r["name"] for r in synced.store.records()] == ["Gym"]
+
+
+def test_refresh_reloads_after_writes_made_elsewhere(tmp_path):
+    url = f"sqlite:///{tmp_path}/t.db"
+    synced = SyncedStore(open_storage(url))
+    synced.add(ROW)
+    store = synced.refresh()
+    assert synced.refresh() is store  # its own write doesn't force a reload
+
+    api = SQLStorage(url)  # same owner, as the API or the renewal task would write
+    api.set_due(api.add({**ROW, "name": "Gym"}), date(2030, 5, 31), 31)
+    reloaded = synced.refresh()
+    assert reloaded is not store
+    assert [(r["name"], r["next_due"]) for r in reloaded.records()] == [
+        ("Netflix", "2030-01-15"), ("Gym", "2030-05-31"),
+    ]
+
+
+def test_sql_storage_searches_with_the_database_index(tmp_path):
+    url = f"sqlite:///{tmp_path}/t.db"
+    synced = SyncedStore(open_storage(url))
+    netflix = synced.add(ROW)
+    gym = synced.add({**ROW, "name": "Gym", "category": "Fitness"})
+    SQLStorage(url, owner_email="someone@example.com").add({**ROW, "name": "Gym"})
+    assert synced.search("gym") == [gym]
+    assert synced.search("netflx") == [netflix]  # a typo still finds it
+    assert synced.search("") == [netflix, gym]
+
+
+def test_sql_storage_delete_takes_the_payment_history_with_it(tmp_path):
+    from sqlalchemy.orm import Session
+    from backend.models import Payment
+    storage = open_storage(f"sqlite:///{tmp_path}/t.db")
+    sub_id = storage.add(ROW)
+    with Session(storage.engine) as db:
+        db.add(Payment(subscription_id=sub_id, owner_id=storage.owner_id, amount=199.0,
+                       due_date=date(2030, 1, 15)))
+        db.commit()
+    storage.delete(sub_id)
+    with Session(storage.engine) as db:
+        assert db.query(Payment).count() == 0
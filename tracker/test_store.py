@@ -0,0 +1,58 @@
+"""Tests for the columnar subscription store."""
+import csv
+import io
+from datetime import date
+import pytest
+from tracker.benchmark import sample_subscriptions
+from tracker.store import SubscriptionStore
+
+
+def test_columns_are_typed_and_monthly_cost_is_vectorized():
+    store = SubscriptionStore.from_records(sample_subscriptions(200))
+    assert len(store) == 200
+    assert store.column("next_due").dtype == "datetime64[D]"
+    assert store.column("amount").dtype == "float64"
+    expected = [
+        r["amount"] if r["cycle"] == "monthly" else r["amount"] / 12 if r["cycle"] == "annual"
+        else 0.0
+        for r in store.records()
+    ]
+    assert store.monthly_cost == pytest.approx(expected)
+    frame = store.frame()
+    assert list(frame["monthly_cost"]) == pytest.approx(expected)
+    assert set(frame["cycle"].cat.categories) == {"monthly", "annual", "one-time"}
+
+
+def test_add_delete_and_set_due_update_in_place():
+    store = SubscriptionStore(capacity=2)
+    for name in ("A", "B", "C"):
+        store.add({"name": name, "amount": 10, "cycle": "monthly",
+                   "next_due": "2030-01-01", "category": "OTT"})
+    assert [r["id"] for r in store.records()] == [1, 2, 3]
+
+    store.delete(2)
+    assert [r["name"] for r in store.records()] == ["A", "C"]
+    with pytest.raises(KeyError):
+        store.get(2)
+
+    version = store.version
+    store.set_due(3, date(2030, 2, 1))
+    assert store.get(3)["next_due"] == "2030-02-01"
+    assert store.due_index.between(date(2030, 2, 1), date(2030, 2, 1)) == [3]
+    assert store.version == version + 1
+    assert store.add({"name": "D", "amount": 1, "cycle": "annual",
+                      "next_due": date(2030, 3, 1), "category": "SaaS"}) == 4
+
+
+def test_write_csv_streams_rows_with_monthly_cost():
+    store = SubscriptionStore.from_records(sample_subscriptions(20))
+    buffer = io.StringIO()
+    store.write_csv(buffer)
+    rows = list(csv.DictReader(io.StringIO(buffer.getvalue())))
+    assert len(rows) == 20
+    first, record = rows[0], store.records()[0]
+    assert {k: first[k] for k in ("id", "name", "cycle", "next_due", "category")} == {
+        "id": str(record["id"]), "name": record["name"], "cycle": record["cycle"],
+        "next_due": record["next_due"], "category": record["category"],
+    }
+    assert [float(r["monthly_cost"]) for r in rows] == pytest.approx(store.monthly_cost)